@@ -1,3 +1,5 @@
+import numpy as np
+
 from openmdao.main.api import Component
 from openmdao.lib.datatypes.api import Float
 
@@ -19,3 +21,18 @@ class Aero(Component):
         #Drag = 0.5*Cd*rho*Veloc*Area
         self.drag = 0.5*self.coef_drag*self.rho*self.velocity_capsule*self.area_capsule 
         self.net_force = self.gross_thrust - self.drag
+
+    def list_deriv_vars(self): 
+        return ('coef_drag', 'area_capsule', 'velocity_capsule', 'rho', 'gross_thrust'), ('net_force', 'drag')
+
+    def provideJ(self): 
+        ddrag = 0.5*np.array([
+            self.rho*self.velocity_capsule*self.area_capsule, 
+            self.coef_drag*self.rho*self.velocity_capsule, 
+            self.coef_drag*self.rho*self.area_capsule, 
+            self.coef_drag*self.velocity_capsule*self.area_capsule, 
+            0.
+        ])
+        dthrust = np.array([0., 0., 0., 0., 1.])
+
+        return np.vstack((dthrust-ddrag, ddrag))
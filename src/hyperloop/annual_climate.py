@@ -0,0 +1,120 @@
+"""
+    annual_climate.py -
+        Tube wall temperature over a year of hourly weather. All 8760 hours
+        are solved in one vectorized equilibrium_temperature call, instead
+        of one TubeHeatBalance solve per hour. Reports percentiles of the
+        wall temperature and of the heat the pods reject into the tube, and
+        how many hours exceed given temperature limits.
+"""
+from math import pi
+from collections import OrderedDict
+
+import numpy as np
+
+from hyperloop.tube_wall_temp import equilibrium_temperature
+
+
+HOURS_PER_YEAR = 8760
+PERCENTILES = (1, 5, 50, 95, 99)
+
+#weather columns, with the value used when a file doesn't have one
+WEATHER_COLUMNS = OrderedDict([
+    ('temp_outside_ambient', None), #K
+    ('solar_insolation', None), #W/m**2
+    ('nn_incidence_factor', .7),
+])
+
+
+def load_weather(filename):
+    """Reads an hourly weather CSV with a header row. Needs the columns
+    temp_outside_ambient (K) and solar_insolation (W/m**2); nn_incidence_factor
+    is optional. A temp_C column is accepted in place of temp_outside_ambient.
+    Returns an OrderedDict of arrays"""
+
+    data = np.genfromtxt(filename, delimiter=',', names=True, dtype=float)
+    names = data.dtype.names
+    weather = OrderedDict()
+    for name, default in WEATHER_COLUMNS.iteritems():
+        if name in names:
+            weather[name] = np.asarray(data[name], dtype=float)
+        elif name == 'temp_outside_ambient' and 'temp_C' in names:
+            weather[name] = np.asarray(data['temp_C'], dtype=float) + 273.15
+        elif default is not None:
+            weather[name] = np.full(len(data), default)
+        else:
+            raise ValueError("weather file '%s' has no '%s' column"%(filename, name))
+    return weather
+
+
+def synthetic_weather(temp_mean=290., temp_seasonal=10., temp_daily=6., peak_insolation=1000.):
+    """a smooth year of weather (seasonal and daily cycles), for trying things out"""
+    hour = np.arange(HOURS_PER_YEAR, dtype=float)
+    day = hour/24.
+    season = -np.cos(2*pi*(day-15.)/365.)
+    temp = temp_mean + temp_seasonal*season + temp_daily*np.sin(2*pi*(hour % 24 - 9.)/24.)
+
+    day_length = 12. + 2.5*season
+    sunrise = 12. - day_length/2.
+    t_sun = (hour % 24 - sunrise)/day_length
+    insolation = np.where((t_sun > 0) & (t_sun < 1), peak_insolation*(.8+.2*season)*np.sin(pi*t_sun), 0.)
+
+    return OrderedDict([
+        ('temp_outside_ambient', temp),
+        ('solar_insolation', np.maximum(insolation, 0.)),
+        ('nn_incidence_factor', np.full(HOURS_PER_YEAR, .7)),
+    ])
+
+
+def annual_run(weather, temp_limits=(320., 330., 340.), percentiles=PERCENTILES, **tube_args):
+    """Wall temperature for every hour of `weather` (dict of arrays, e.g. from
+    load_weather), as one batch.
+
+    temp_limits: wall temperatures (K) to count exceedance hours for
+    tube_args: any other equilibrium_temperature arguments (num_pods,
+        diameter_outer_tube, WCp_pod, ...), e.g. from TubeWallTemp.balance_args()
+
+    Returns an OrderedDict with the hourly temp_boundary and heat_rate_pods
+    (W, all pods) arrays, their percentiles and the exceedance hours.
+    """
+
+    tube_args = dict(tube_args)
+    for name in WEATHER_COLUMNS:
+        tube_args[name] = weather[name]
+
+    temps = equilibrium_temperature(**tube_args)
+    num_pods = tube_args.get('num_pods', 34.)
+    WCp_pod = tube_args.get('WCp_pod', 563.)
+    temp_exhaust = tube_args.get('temp_pod_exhaust', 950.)
+    heat_pods = num_pods*WCp_pod*(temp_exhaust-temps)
+
+    res = OrderedDict()
+    res['temp_boundary'] = temps
+    res['heat_rate_pods'] = heat_pods
+    res['temp_percentiles'] = OrderedDict(zip(percentiles, np.percentile(temps, percentiles)))
+    res['heat_percentiles'] = OrderedDict(zip(percentiles, np.percentile(heat_pods, percentiles)))
+    res['exceedance_hours'] = OrderedDict((limit, int(np.count_nonzero(temps > limit)))
+                                          for limit in temp_limits)
+    return res
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) > 1:
+        weather = load_weather(sys.argv[1])
+    else:
+        weather = synthetic_weather()
+
+    start = time.time()
+    res = annual_run(weather, length_tube=563270.)
+    print "%d hours in %.3f s"%(len(res['temp_boundary']), time.time()-start)
+
+    print "wall temperature percentiles:"
+    for p, T in res['temp_percentiles'].iteritems():
+        print "    %3d%%: %7.2f K"%(p, T)
+    print "pod heat rejection percentiles:"
+    for p, q in res['heat_percentiles'].iteritems():
+        print "    %3d%%: %7.2f MW"%(p, q/1e6)
+    for limit, hours in res['exceedance_hours'].iteritems():
+        print "hours above %.0f K: %d"%(limit, hours)
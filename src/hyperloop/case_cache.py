@@ -0,0 +1,214 @@
+"""
+    case_cache.py -
+        Disk backed cache of converged cases. Entries are keyed on a hash of
+        all the boundary inputs of an assembly, so rerunning a design point
+        that has already been solved just reads the stored outputs back.
+
+        The cache is shared between processes (sweep workers, notebooks, the
+        example scripts). Least recently used entries are evicted once the
+        size cap is reached, and the whole cache is dropped when the installed
+        hyperloop version changes.
+"""
+import os
+import hashlib
+import cPickle as pickle
+from collections import OrderedDict
+
+from openmdao.main.api import Assembly, Driver
+
+
+DEFAULT_CACHE_DIR = os.environ.get('HYPERLOOP_CACHE',
+    os.path.join(os.path.expanduser('~'), '.hyperloop_cache'))
+
+_framework_inputs = None
+
+
+def package_version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('hyperloop').version
+    except Exception:
+        return 'unknown'
+
+
+def boundary_inputs(assembly):
+    """all inputs on the boundary of the assembly (design variables and
+    parameters), excluding the ones every OpenMDAO assembly has"""
+
+    global _framework_inputs
+    if _framework_inputs is None:
+        _framework_inputs = set(Assembly().list_inputs())
+
+    names = sorted(set(assembly.list_inputs()) - _framework_inputs)
+    return OrderedDict((name, assembly.get(name)) for name in names)
+
+
+def converged(assembly, tol=None):
+    """True if the equality constraints of every solver in the assembly are
+    met, to tol or else to the solver's own atol (NewtonSolver) or tol
+    (BroydenSolver)"""
+
+    for name in assembly.list_containers():
+        driver = getattr(assembly, name)
+        if not isinstance(driver, Driver) or not hasattr(driver, 'eval_eq_constraints'):
+            continue
+        residuals = driver.eval_eq_constraints()
+        if not len(residuals):
+            continue
+        limit = tol if tol is not None else getattr(driver, 'atol', getattr(driver, 'tol', 1e-6))
+        if not max(abs(r) for r in residuals) <= limit: #catches nan too
+            return False
+    return True
+
+
+class CaseCache(object):
+    """Content addressed store of converged outputs
+
+    directory: where the entries are kept, one file per case
+    max_entries: maximum number of cases to keep
+    max_bytes: maximum total size of the cached cases
+    evict_every: the caps are enforced every this many writes, so a put
+        doesn't have to scan the whole cache directory
+    """
+
+    def __init__(self, directory=None, max_entries=100000, max_bytes=512*2**20, version=None,
+                 evict_every=100):
+        self.directory = os.path.join(directory or DEFAULT_CACHE_DIR, 'cases')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._n_puts = 0
+        self.version = version or package_version()
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError: #another process got there first
+                pass
+        self._check_version()
+
+    def _check_version(self):
+        version_file = os.path.join(self.directory, 'VERSION')
+        try:
+            with open(version_file) as f:
+                cached_version = f.read().strip()
+        except IOError:
+            cached_version = None
+
+        if cached_version != self.version:
+            self.clear()
+            self._write(version_file, self.version)
+
+    def _write(self, filename, data):
+        #write then rename, so readers in other processes never see a partial file
+        tmp = '%s.%d.tmp'%(filename, os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.rename(tmp, filename)
+
+    def _entries(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith('.pkl')]
+
+    def key(self, inputs):
+        """hash of the version and the (name, value) pairs of the inputs"""
+        items = sorted((name, repr(value)) for name, value in inputs.iteritems())
+        return hashlib.sha1(repr((self.version, items))).hexdigest()
+
+    def get(self, inputs):
+        """returns the cached outputs for these inputs, or None"""
+
+        filename = os.path.join(self.directory, self.key(inputs)+'.pkl')
+        try:
+            with open(filename, 'rb') as f:
+                outputs = pickle.load(f)
+            os.utime(filename, None) #mark as recently used
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return outputs
+
+    def put(self, inputs, outputs):
+        filename = os.path.join(self.directory, self.key(inputs)+'.pkl')
+        self._write(filename, pickle.dumps(outputs, pickle.HIGHEST_PROTOCOL))
+        self._n_puts += 1
+        if self._n_puts % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """removes the least recently used entries until the cache is within
+        both max_entries and max_bytes"""
+
+        entries = []
+        for filename in self._entries():
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, filename))
+
+        total = sum(size for _, size, _ in entries)
+        if len(entries) <= self.max_entries and total <= self.max_bytes:
+            return
+
+        entries.sort()
+        n = len(entries)
+        for _, size, filename in entries:
+            if n <= self.max_entries and total <= self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            n -= 1
+            total -= size
+
+    def clear(self):
+        for filename in self._entries():
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries())
+
+
+def cached_run(assembly, cache, outputs=None):
+    """Runs the assembly unless a converged case with the same boundary inputs
+    is already in the cache. Returns an OrderedDict of the requested outputs
+    (the driver printvars by default). Only converged runs are stored, see
+    converged"""
+
+    if outputs is None:
+        outputs = list(assembly.driver.printvars)
+
+    inputs = boundary_inputs(assembly)
+    cached = cache.get(inputs)
+    if cached is not None and all(name in cached for name in outputs):
+        return OrderedDict((name, cached[name]) for name in outputs)
+
+    assembly.run()
+    results = OrderedDict((name, float(assembly.get(name))) for name in outputs)
+    if converged(assembly):
+        cache.put(inputs, results)
+    return results
+
+
+if __name__ == "__main__":
+    from openmdao.main.api import set_as_top
+    from hyperloop.hyperloop_sim import HyperloopPod
+
+    hl = set_as_top(HyperloopPod())
+    hl.Mach_pod_max = .9
+    hl.Mach_c1_in = .75
+    hl.c1_PR_des = 13
+
+    cache = CaseCache()
+    for label, value in cached_run(hl, cache).iteritems():
+        print '%s: %.2f'%(label, value)
+    print "hits: %d, misses: %d"%(cache.hits, cache.misses)
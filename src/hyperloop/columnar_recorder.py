@@ -0,0 +1,209 @@
+"""
+    columnar_recorder.py -
+        Append-only binary case recorder. Each recorded variable is stored
+        as its own typed column file in a directory, next to a small json
+        header with the names and dtypes. Rows are buffered and written a
+        chunk at a time, and readers memory map the columns, so a column
+        loads without any parsing (even while a sweep is still writing).
+"""
+import os
+import json
+import time
+
+import numpy as np
+
+from openmdao.main.interfaces import implements, ICaseRecorder
+
+
+HEADER = 'header.json'
+
+
+def _column_file(path, index):
+    return os.path.join(path, 'col%04d.bin'%index)
+
+
+def _dtype_of(value):
+    if isinstance(value, (bool, int, long, np.integer)):
+        return 'i8'
+    if isinstance(value, (float, np.floating)):
+        return 'f8'
+    return None #strings, flow stations, arrays... aren't recorded
+
+
+class ColumnarCaseRecorder(object):
+    """Records cases into a directory of column files
+
+    path: directory to write to
+    append: keep the cases already in `path` instead of starting over. A
+        recorder always keeps the cases it wrote itself, so later driver
+        runs (or records after close) add to the same columns
+    chunk_size: number of rows buffered before they are written out
+    flush_interval: buffered rows are also written when this many seconds
+        have passed since the last write, so readers don't lag far behind
+    """
+
+    implements(ICaseRecorder)
+
+    def __init__(self, path='cases.col', append=False, chunk_size=1024, flush_interval=1.):
+        self.path = path
+        self.append = append
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+
+        self._names = None
+        self._dtypes = None
+        self._files = None
+        self._buffer = None
+        self._n_buffered = 0
+        self._last_flush = time.time()
+        self._started = False
+        self._resume = append
+
+    def startup(self):
+        if self._files is not None:
+            raise RuntimeError("recorder '%s' is still open, close it before starting again"%self.path)
+
+        self._names = None
+        self._dtypes = None
+        self._buffer = None
+        self._n_buffered = 0
+        self._last_flush = time.time()
+        self._started = True
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        header = os.path.join(self.path, HEADER)
+        if self._resume and os.path.exists(header):
+            with open(header) as f:
+                columns = json.load(f)['columns']
+            self._open([name for name, _ in columns], [dtype for _, dtype in columns], 'ab')
+        else:
+            for name in os.listdir(self.path):
+                if name == HEADER or name.endswith('.bin'):
+                    os.remove(os.path.join(self.path, name))
+        #from here on the cases in path are ours
+        self._resume = True
+
+    def _open(self, names, dtypes, mode):
+        self._names = names
+        self._dtypes = dtypes
+        self._index = dict((name, i) for i, name in enumerate(names))
+        self._files = [open(_column_file(self.path, i), mode) for i in xrange(len(names))]
+        self._buffer = [[] for name in names]
+
+    def _start_columns(self, values):
+        names = []
+        dtypes = []
+        for name, value in values:
+            dtype = _dtype_of(value)
+            if dtype is not None:
+                names.append(name)
+                dtypes.append(dtype)
+
+        self._open(names, dtypes, 'wb')
+        #header goes last, readers wait for it
+        with open(os.path.join(self.path, HEADER), 'w') as f:
+            json.dump({'columns': zip(names, dtypes)}, f)
+
+    def record_values(self, values):
+        """Records one row from a sequence of (name, value) pairs or a dict.
+        The columns are fixed by the first row; names that weren't in it are
+        ignored and missing values are stored as nan (or 0 for integers)"""
+
+        if hasattr(values, 'items'):
+            values = values.items()
+        if self._files is None:
+            if not self._started:
+                self.startup()
+            if self._files is None:
+                self._start_columns(values)
+
+        row = [np.nan if dtype == 'f8' else 0 for dtype in self._dtypes]
+        for name, value in values:
+            i = self._index.get(name)
+            if i is not None:
+                row[i] = value
+        for col, value in zip(self._buffer, row):
+            col.append(value)
+        self._n_buffered += 1
+
+        if self._n_buffered >= self.chunk_size or \
+           time.time()-self._last_flush > self.flush_interval:
+            self.flush()
+
+    def record(self, case):
+        self.record_values([('timestamp', case.timestamp)] + list(case.items()))
+
+    def flush(self):
+        if self._files is None:
+            return
+        for f, col, dtype in zip(self._files, self._buffer, self._dtypes):
+            np.asarray(col, dtype=dtype).tofile(f)
+            f.flush()
+            del col[:]
+        self._n_buffered = 0
+        self._last_flush = time.time()
+
+    def close(self):
+        self.flush()
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+        #the next record starts up again, appending to the columns
+        self._started = False
+
+    def get_iterator(self):
+        self.flush()
+        return ColumnarCaseReader(self.path)
+
+
+class ColumnarCaseReader(object):
+    """Read access to the output of a ColumnarCaseRecorder. Columns are
+    memory mapped read-only views of the files on disk. Only complete rows
+    are visible, so it is safe to read while the recorder is still writing"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER)) as f:
+            columns = json.load(f)['columns']
+        self._names = [str(name) for name, _ in columns]
+        self._dtypes = dict((str(name), np.dtype(dtype)) for name, dtype in columns)
+        self._index = dict((name, i) for i, name in enumerate(self._names))
+
+    def keys(self):
+        return list(self._names)
+
+    def __len__(self):
+        """number of complete rows"""
+        if not self._names:
+            return 0
+        return min(os.path.getsize(_column_file(self.path, i))//self._dtypes[name].itemsize
+                   for i, name in enumerate(self._names))
+
+    def column(self, name):
+        """memory mapped array of one variable"""
+        n = len(self)
+        dtype = self._dtypes[name]
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(_column_file(self.path, self._index[name]), dtype=dtype, mode='r', shape=(n,))
+
+    __getitem__ = column
+
+    def __iter__(self):
+        """rows as dicts, mostly for quick inspection"""
+        columns = [self.column(name) for name in self._names]
+        for i in xrange(min(len(col) for col in columns) if columns else 0):
+            yield dict((name, col[i]) for name, col in zip(self._names, columns))
+
+
+if __name__ == "__main__":
+    import sys
+
+    reader = ColumnarCaseReader(sys.argv[1] if len(sys.argv) > 1 else 'hyperloop_data.col')
+    print "%d cases"%len(reader)
+    for name in reader.keys():
+        col = reader.column(name)
+        if len(col):
+            print "%-35s %14.6g %14.6g"%(name, col.min(), col.max())
@@ -1,4 +1,8 @@
-from openmdao.main.api import Assembly, Component
+from collections import OrderedDict
+
+import numpy as np
+
+from openmdao.main.api import Assembly, Component, convert_units as cu
 from openmdao.lib.drivers.api import DOEdriver
 from openmdao.lib.doegenerators.api import FullFactorial
 from openmdao.lib.casehandlers.api import DumpCaseRecorder
@@ -8,6 +12,25 @@ from pycycle.api import (FlowStartStatic, SplitterW, Inlet, Compressor, Duct,
     Nozzle, CycleComponent, HeatExchanger, FlowStationVar, FlowStation)
 
 
+#cycle elements, in execution order, that have a design mode
+CYCLE_ELEMENTS = ['tube', 'inlet', 'comp1', 'duct1', 'split', 'nozzle', 'comp2', 'duct2', 'perf']
+
+#off-design states of the cycle, solved for at every pod speed
+OFF_DESIGN_STATES = ('W_in', 'c1_PR_des', 'c2_PR_des')
+
+
+def _total_ratio(Mach, gam=1.4): 
+    """Pt/sqrt(Tt) relative to the static state, the speed dependence of the 
+    flow a fixed compressor face swallows"""
+    T_ratio = 1 + (gam-1)/2.*Mach**2
+    return T_ratio**(gam/(gam-1))/np.sqrt(T_ratio)
+
+
+def _corrected_flow(fs): 
+    """W*sqrt(Tt)/Pt, constant through a choked throat of fixed area"""
+    return fs.W*np.sqrt(fs.Tt)/fs.Pt
+
+
 class Performance(CycleComponent): 
 
     C1_pwr = Float(0, iotype='in', units='hp')
@@ -30,6 +53,18 @@ class Performance(CycleComponent):
         self.F_net = self.Fg - self.F_ram
         self.Ps_bearing_residual = .001*(self.Ps_bearing - self.Ps_bearing_target)
 
+    def list_deriv_vars(self): 
+        return ('C1_pwr', 'C2_pwr', 'Fg', 'F_ram', 'Ps_bearing_target', 'Ps_bearing'), \
+            ('pwr', 'F_net', 'Ps_bearing_residual')
+
+    def provideJ(self): 
+        #all linear
+        return np.array([
+            [1., 1., 0., 0., 0., 0.], 
+            [0., 0., 1., -1., 0., 0.], 
+            [0., 0., 0., 0., -.001, .001],
+        ])
+
 
 class CompressionSystem(Assembly): 
 
@@ -153,12 +188,137 @@ class CompressionSystem(Assembly):
 
         #driver setup
         design = self.driver
-        comp_list = ['tube','inlet','comp1',
-            'duct1', 'split', 'nozzle', 'comp2', 'duct2', 'perf']
-
-        design.workflow.add(comp_list)
-        for comp_name in comp_list: #need to put everything in design mode
-            design.add_event('%s.design'%comp_name)
+        design.workflow.add(CYCLE_ELEMENTS)
+        self.set_design_mode(True)
+
+    def set_design_mode(self, design=True): 
+        """In design mode every run re-sizes the cycle (the design events are 
+        fired on every element). Off-design, the elements keep the flow areas 
+        from the last design run, and OFF_DESIGN_STATES become states"""
+
+        self.driver.clear_events()
+        if design: 
+            for comp_name in CYCLE_ELEMENTS: #need to put everything in design mode
+                self.driver.add_event('%s.design'%comp_name)
+        self._design_mode = design
+
+    def off_design_residuals(self): 
+        """with the inlet exit area fixed, W_in has to give the design Mach at 
+        the first compressor; the choked nozzle throat keeps its size, so 
+        c1_PR_des has to give the design corrected flow at the nozzle; 
+        c2_PR_des has to give the bearing pressure"""
+        return np.array([self.inlet.Fl_O.Mach - self.Mach_c1_in, 
+                         _corrected_flow(self.nozzle.Fl_I)/self._nozzle_flow_des - 1., 
+                         self.Ps_bearing_residual/self.Ps_bearing])
+
+    def evaluate_off_design(self, Mach_pods, tol=1e-8, max_iter=25, fd_step=1e-4): 
+        """Sizes the cycle once at Mach_pod_max, then evaluates it off-design 
+        at every pod Mach in Mach_pods (e.g. along a trajectory). 
+
+        Each speed solves the off-design states (W_in, c1_PR_des, c2_PR_des) 
+        against off_design_residuals by Newton's 
+        method with a Broyden updated Jacobian. The speeds are visited 
+        outward from the design point, and each one starts from its 
+        neighbour's solution (W_in scaled by the inlet total conditions) and 
+        Jacobian, so most take a couple of cycle runs. 
+
+        Returns an OrderedDict of arrays in the order of Mach_pods: Mach_pod, 
+        speed (m/s), the states, pwr_req (kW), F_net (N), the nozzle and 
+        bearing exhaust W (kg/s), Tt (K) and WCp (W/K), the cycle runs used 
+        and converged. The cycle is re-run in design mode at the design point 
+        afterwards, so its outputs are the design ones again.
+
+        The design point should be converged first (c2_PR_des meeting the 
+        bearing pressure, e.g. by the HyperloopSim solver). 
+        """
+
+        Mach_pods = np.atleast_1d(np.asarray(Mach_pods, dtype=float))
+        Mach_des = self.Mach_pod_max
+
+        self.set_design_mode(True)
+        self.run()
+        design_states = np.array([getattr(self, name) for name in OFF_DESIGN_STATES])
+        self._nozzle_flow_des = _corrected_flow(self.nozzle.Fl_I)
+        self.set_design_mode(False)
+
+        names = ('Mach_pod', 'speed') + OFF_DESIGN_STATES + ('pwr_req', 'F_net', 'nozzle_W', 'nozzle_Tt', 
+            'nozzle_WCp', 'bearing_W', 'bearing_Tt', 'bearing_WCp', 'runs', 'converged')
+        res = OrderedDict((name, np.zeros(len(Mach_pods))) for name in names)
+        res['converged'] = np.zeros(len(Mach_pods), dtype=bool)
+
+        def evaluate(x): 
+            for name, value in zip(OFF_DESIGN_STATES, x): 
+                setattr(self, name, value)
+            self.run()
+            return self.off_design_residuals()
+
+        #outward from the design speed, below it and then above it
+        order = np.argsort(np.abs(Mach_pods - Mach_des))
+        below = [i for i in order if Mach_pods[i] <= Mach_des]
+        above = [i for i in order if Mach_pods[i] > Mach_des]
+
+        try: 
+            for branch in (below, above): 
+                x, M_prev, jac = design_states.copy(), Mach_des, None
+                for i in branch: 
+                    M = Mach_pods[i]
+                    self.Mach_pod_max = M
+                    x[0] *= _total_ratio(M)/_total_ratio(M_prev)
+                    runs = 0
+
+                    r = evaluate(x)
+                    runs += 1
+                    if jac is None: 
+                        jac = np.empty((len(x), len(x)))
+                        for j in xrange(len(x)): 
+                            dx = fd_step*max(abs(x[j]), 1.)
+                            x_step = x.copy()
+                            x_step[j] += dx
+                            jac[:, j] = (evaluate(x_step) - r)/dx
+                            runs += 1
+                        #back from the last step, so the outputs are the ones at x
+                        r = evaluate(x)
+                        runs += 1
+
+                    converged = np.max(np.abs(r)) < tol
+                    for it in xrange(max_iter): 
+                        if converged: 
+                            break
+                        step = -np.linalg.solve(jac, r)
+                        x += step
+                        r_new = evaluate(x)
+                        runs += 1
+                        #Broyden update, carried on to the next speed
+                        jac += np.outer(r_new - r - jac.dot(step), step)/step.dot(step)
+                        r = r_new
+                        converged = np.max(np.abs(r)) < tol
+
+                    self._record_off_design(res, i, M, x, runs, converged)
+                    M_prev = M
+        finally: 
+            #back to the design point
+            self.Mach_pod_max = Mach_des
+            for name, value in zip(OFF_DESIGN_STATES, design_states): 
+                setattr(self, name, value)
+            self.set_design_mode(True)
+            self.run()
+
+        return res
+
+    def _record_off_design(self, res, i, Mach, x, runs, converged): 
+        res['Mach_pod'][i] = Mach
+        res['speed'][i] = self.speed_max
+        for name, value in zip(OFF_DESIGN_STATES, x): 
+            res[name][i] = value
+        res['pwr_req'][i] = self.pwr_req
+        res['F_net'][i] = self.F_net
+        for prefix, fs in (('nozzle', self.nozzle_Fl_O), ('bearing', self.bearing_Fl_O)): 
+            W = cu(fs.W, 'lbm/s', 'kg/s')
+            res[prefix+'_W'][i] = W
+            res[prefix+'_Tt'][i] = cu(fs.Tt, 'degR', 'degK')
+            res[prefix+'_WCp'][i] = W*cu(fs.Cp, 'Btu/(lbm*degR)', 'J/(kg*K)')
+        res['runs'][i] = runs
+        res['converged'][i] = converged
 
 
 if __name__ == "__main__": 
@@ -180,6 +340,16 @@ if __name__ == "__main__":
 
     fs = hlc.tube.Fl_O
 
+    #power and thrust along the speed range, sized once at Mach_pod_max
+    import time
+    start = time.time()
+    sweep = hlc.evaluate_off_design(np.linspace(.3, 1., 50))
+    print "50 off-design points in %.1f s, %d cycle runs, all converged: %s"%(time.time()-start, 
+        sweep['runs'].sum(), sweep['converged'].all())
+    for i in (0, 24, 49): 
+        print "Mach %.2f, %.1f m/s: W_in %.3f kg/s, pwr %.1f kW, F_net %.1f N"%(sweep['Mach_pod'][i], 
+            sweep['speed'][i], sweep['W_in'][i], sweep['pwr_req'][i], sweep['F_net'][i])
+
 
 
 
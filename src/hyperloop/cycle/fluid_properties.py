@@ -0,0 +1,174 @@
+"""
+    fluid_properties.py -
+        Temperature dependent properties of liquid water and air (density,
+        Cp, dynamic and kinematic viscosity, conductivity and Prandtl
+        number), shared by the cycle components. The reference data are
+        resampled once per process onto a fine uniform temperature grid,
+        and lookups are vectorized linear interpolation on that grid.
+        Air is an ideal gas, so its density (and kinematic viscosity) also
+        depend on pressure; the other properties are taken at 1 atm.
+
+        SI units: K, Pa, kg/m**3, J/(kg*K), kg/(m*s), m**2/s, W/(m*K)
+"""
+from collections import OrderedDict
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+
+R_AIR = 287.05 #J/(kg*K)
+
+#saturated liquid water (pressurized above 373.15 K)
+#T, rho, cp, mu, k
+WATER_DATA = np.array([
+    [273.15, 999.8, 4217., 1.792e-3, .561],
+    [277.15, 1000.0, 4205., 1.567e-3, .569],
+    [283.15, 999.7, 4194., 1.307e-3, .580],
+    [293.15, 998.2, 4182., 1.002e-3, .598],
+    [303.15, 995.7, 4178., .798e-3, .615],
+    [313.15, 992.2, 4179., .653e-3, .631],
+    [323.15, 988.1, 4181., .547e-3, .644],
+    [333.15, 983.2, 4185., .467e-3, .654],
+    [343.15, 977.8, 4190., .404e-3, .663],
+    [353.15, 971.8, 4197., .355e-3, .670],
+    [363.15, 965.3, 4205., .315e-3, .675],
+    [373.15, 958.4, 4216., .282e-3, .679],
+    [393.15, 943.1, 4244., .232e-3, .683],
+    [413.15, 926.1, 4286., .197e-3, .684],
+    [433.15, 907.4, 4340., .170e-3, .680],
+    [453.15, 887.0, 4410., .150e-3, .673],
+])
+
+#air at 1 atm
+#T, cp, mu, k
+AIR_DATA = np.array([
+    [150., 1012., 103.4e-7, 13.8e-3],
+    [200., 1007., 132.5e-7, 18.1e-3],
+    [250., 1006., 159.6e-7, 22.3e-3],
+    [300., 1007., 184.6e-7, 26.3e-3],
+    [350., 1009., 208.2e-7, 30.0e-3],
+    [400., 1014., 230.1e-7, 33.8e-3],
+    [450., 1021., 250.7e-7, 37.3e-3],
+    [500., 1030., 270.1e-7, 40.7e-3],
+    [550., 1040., 288.4e-7, 43.9e-3],
+    [600., 1051., 305.8e-7, 46.9e-3],
+    [650., 1063., 322.5e-7, 49.7e-3],
+    [700., 1075., 338.8e-7, 52.4e-3],
+    [750., 1087., 354.6e-7, 54.9e-3],
+    [800., 1099., 369.8e-7, 57.3e-3],
+    [850., 1110., 384.3e-7, 59.6e-3],
+    [900., 1121., 398.1e-7, 62.0e-3],
+    [950., 1131., 411.3e-7, 64.3e-3],
+    [1000., 1141., 424.4e-7, 66.7e-3],
+    [1100., 1159., 449.0e-7, 71.5e-3],
+    [1200., 1175., 473.0e-7, 76.3e-3],
+    [1300., 1189., 496.0e-7, 82.0e-3],
+    [1400., 1207., 530.0e-7, 91.0e-3],
+    [1500., 1230., 557.0e-7, 100.0e-3],
+])
+
+
+class PropertyTable(object):
+    """Properties on a uniform temperature grid, resampled from reference
+    data with a monotone cubic. Temperatures outside the data are clipped
+    to its range.
+
+    data: array with temperature in the first column and one column per
+        property
+    names: the property names of the other columns
+    """
+
+    def __init__(self, data, names, n_T=2001):
+        data = np.asarray(data, dtype=float)
+        self.T_min, self.T_max = data[0, 0], data[-1, 0]
+        self.dT = (self.T_max-self.T_min)/(n_T-1)
+        self.T = np.linspace(self.T_min, self.T_max, n_T)
+        self.names = names
+        self.values = OrderedDict((name, PchipInterpolator(data[:, 0], data[:, i+1])(self.T))
+                                  for i, name in enumerate(names))
+
+    def lookup(self, name, T):
+        """one property at temperatures T (any shape)"""
+        x = (np.clip(np.asarray(T, dtype=float), self.T_min, self.T_max) - self.T_min)/self.dT
+        i = np.minimum(x.astype(int), len(self.T)-2)
+        w = x - i
+        v = self.values[name]
+        return (1-w)*v[i] + w*v[i+1]
+
+
+class Water(PropertyTable):
+    """liquid water properties versus temperature"""
+
+    def __init__(self, n_T=2001):
+        super(Water, self).__init__(WATER_DATA, ('rho', 'cp', 'mu', 'k'), n_T)
+
+    def __call__(self, T):
+        """OrderedDict of rho, cp, mu, nu, k and Pr at temperatures T"""
+        props = OrderedDict((name, self.lookup(name, T)) for name in self.names)
+        props['nu'] = props['mu']/props['rho']
+        props['Pr'] = props['cp']*props['mu']/props['k']
+        return props
+
+    def rho(self, T):
+        return self.lookup('rho', T)
+
+    def cp(self, T):
+        return self.lookup('cp', T)
+
+
+class Air(PropertyTable):
+    """air properties versus temperature, with an ideal gas density"""
+
+    def __init__(self, n_T=2001):
+        super(Air, self).__init__(AIR_DATA, ('cp', 'mu', 'k'), n_T)
+
+    def __call__(self, T, P=101325.):
+        """OrderedDict of rho, cp, mu, nu, k and Pr at temperatures T and
+        pressures P (broadcast against each other)"""
+        props = OrderedDict()
+        props['rho'] = np.asarray(P, dtype=float)/(R_AIR*np.asarray(T, dtype=float))
+        props.update((name, self.lookup(name, T)) for name in self.names)
+        props['nu'] = props['mu']/props['rho']
+        props['Pr'] = props['cp']*props['mu']/props['k']
+        return props
+
+    def rho(self, T, P=101325.):
+        return np.asarray(P, dtype=float)/(R_AIR*np.asarray(T, dtype=float))
+
+    def cp(self, T):
+        return self.lookup('cp', T)
+
+
+_water = None
+_air = None
+
+
+def water():
+    """the Water table shared by the whole process"""
+    global _water
+    if _water is None:
+        _water = Water()
+    return _water
+
+
+def air():
+    """the Air table shared by the whole process"""
+    global _air
+    if _air is None:
+        _air = Air()
+    return _air
+
+
+if __name__ == "__main__":
+    import time
+
+    T = np.linspace(280., 450., 1000000)
+    start = time.time()
+    props = water()(T)
+    print "water, %d temperatures in %.3f s"%(len(T), time.time()-start)
+    for T_check in (288.15, 323.15, 363.15):
+        print "    %.2f K: " % T_check + ", ".join("%s %.4g"%(name, float(value))
+            for name, value in water()(T_check).iteritems())
+    for T_check in (300., 573.15):
+        print "air %.2f K: " % T_check + ", ".join("%s %.4g"%(name, float(value))
+            for name, value in air()(T_check).iteritems())
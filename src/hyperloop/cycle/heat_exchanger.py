@@ -18,6 +18,8 @@ from openmdao.main.api import convert_units as cu
 
 from pycycle.api import FlowStationVar, FlowStation, CycleComponent
 
+from hyperloop.cycle.fluid_properties import water
+
 
 class HeatExchanger(CycleComponent): 
     """Calculates required Q to reach perscribed temperatures for a water-to-air heat exchanger"""
@@ -31,7 +33,9 @@ class HeatExchanger(CycleComponent):
     T_cold_in = Float(288.1, iotype="in", units = 'K', desc='Temp of water into heat exchanger') 
     effectiveness = Float(.9765, iotype="in", desc='Heat Exchange Effectiveness') 
     MNexit_des = Float(.6, iotype="in", desc="mach number at the exit of heat exchanger")
-    #State Vars
+    explicit = Bool(False, iotype="in", desc="compute the outlet temperatures directly from the effectiveness (T_hot_exit and T_cold_exit), so no solver is needed and the residuals are zero")
+    use_property_library = Bool(False, iotype="in", desc="take Cp_cold (in kJ/(kg*K), like the air Cp) from the fluid property library at the mean water temperature")
+    #State Vars (unless explicit)
     T_hot_out = Float(338.4, iotype="in", units = 'K', desc='Temp of air out of the heat exchanger')    
     T_cold_out = Float(iotype="in", units = 'K', desc='Temp of water out of the heat exchanger') 
     
@@ -46,6 +50,8 @@ class HeatExchanger(CycleComponent):
  
     residual_qmax = Float(iotype="out", desc='Residual of max*effectiveness') 
     residual_e_balance = Float(iotype="out", desc='Residual of the energy balance')
+    T_hot_exit = Float(iotype="out", units = 'K', desc='Temp of air out of the heat exchanger, T_hot_out or (explicit) from the effectiveness')
+    T_cold_exit = Float(iotype="out", units = 'K', desc='Temp of water out of the heat exchanger, T_cold_out or (explicit) from the effectiveness')
 
     Fl_O = FlowStationVar(iotype="out", desc="outgoing air stream from heat exchanger", copy=None)
 
@@ -63,11 +69,28 @@ class HeatExchanger(CycleComponent):
         Wh = Fl_I.W
         Cp_hot = Fl_I.Cp/2.388459e-1 #BTU/lbm-C to Kj/kg-k
         Cp_cold = self.Cp_cold
-        
-        W_coldCpMin = W_cold*Cp_cold;
-        if ( Wh*Cp_hot < W_cold*Cp_cold ):
-            W_coldCpMin = Wh*Cp_hot
-        self.Qmax = W_coldCpMin*(T_hot_in - T_cold_in);
+
+        #with the property library, Cp_cold depends on T_cold_out, so the 
+        #explicit outlets take a few passes
+        for i in xrange(20 if self.explicit and self.use_property_library else 1): 
+            if self.use_property_library: 
+                Cp_cold = float(water().cp(.5*(T_cold_in + T_cold_out)))/1000. #kJ/(kg*K)
+
+            W_coldCpMin = W_cold*Cp_cold;
+            if ( Wh*Cp_hot < W_cold*Cp_cold ):
+                W_coldCpMin = Wh*Cp_hot
+            self.Qmax = W_coldCpMin*(T_hot_in - T_cold_in);
+
+            if self.explicit: 
+                #Q = effectiveness*Qmax, and each stream's energy balance gives its outlet
+                Q = self.effectiveness*self.Qmax
+                T_hot_out = T_hot_in - Q/(Wh*Cp_hot)
+                T_cold_prev, T_cold_out = T_cold_out, T_cold_in + Q/(W_cold*Cp_cold)
+                if abs(T_cold_out - T_cold_prev) < 1e-9*T_cold_out: 
+                    break
+
+        self.T_hot_exit = T_hot_out
+        self.T_cold_exit = T_cold_out
 
         self.Qreleased = Wh*Cp_hot*(T_hot_in - T_hot_out);
         self.Qabsorbed = W_cold*Cp_cold*(T_cold_out - T_cold_in);
@@ -125,6 +148,16 @@ if __name__ == "__main__":
     set_as_top(test)
     test.hx.design = True
 
+    #the same exchanger without the solver
+    explicit = set_as_top(HeatExchanger())
+    explicit.Fl_I = test.hx.Fl_I
+    explicit.W_cold = test.hx.W_cold
+    explicit.Cp_cold = test.hx.Cp_cold
+    explicit.T_cold_in = test.hx.T_cold_in
+    explicit.explicit = True
+    explicit.design = True
+    explicit.run()
+
 
     #good values: 
     #air:      Tin       Tout         Q      Q' 
@@ -140,4 +173,8 @@ if __name__ == "__main__":
     print 
     print "water:    Tin       Tout         Q      Q\' \n";
     print "    {}    {}    {}    {}".format(test.hx.T_cold_in, test.hx.T_cold_out, test.hx.Qabsorbed, test.hx.Qmax)
-    print " LMTD = {}  ".format(test.hx.LMTD)
\ No newline at end of file
+    print " LMTD = {}  ".format(test.hx.LMTD)
+
+    print
+    print "explicit: T_hot_exit {}  T_cold_exit {}  residuals {} {}".format(explicit.T_hot_exit, explicit.T_cold_exit, 
+        explicit.residual_qmax, explicit.residual_e_balance)
\ No newline at end of file
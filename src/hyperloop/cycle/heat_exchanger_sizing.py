@@ -13,6 +13,12 @@ LMTD Limitations
 
 Compatible with OpenMDAO v0.8.1
 """
+from collections import OrderedDict
+
+import numpy as np
+
+from hyperloop.cycle.fluid_properties import water, air
+
 from openmdao.main.api import Component
 from openmdao.lib.datatypes.api import Float, Bool
 from openmdao.main.api import convert_units as cu
@@ -32,6 +38,201 @@ k_w = 0.58#, units = 'W/(m*K)', iotype='in', desc='thermal conductivity for wate
 k_a = 0.0454#, units = 'W/(m*K)', iotype='in', desc='thermal conductivity for air')
 k_p = 400.0#, units = 'W/(m*K)', iotype='in', desc='thermal conductivity of the pipe')
 
+#ASTM B88 type M copper tube: nominal size, OD, ID (in)
+#(the default Do_tube/Di_tube are 1-1/4", Di_shell is the ID of 2")
+COPPER_TYPE_M = [
+    ('1/2', 0.625, 0.569),
+    ('3/4', 0.875, 0.811),
+    ('1', 1.125, 1.055),
+    ('1-1/4', 1.375, 1.291),
+    ('1-1/2', 1.625, 1.527),
+    ('2', 2.125, 2.009),
+    ('2-1/2', 2.625, 2.495),
+    ('3', 3.125, 2.981),
+    ('3-1/2', 3.625, 3.459),
+    ('4', 4.125, 3.935),
+]
+PIPE_CATALOGUE = [(name, OD*.0254, ID*.0254) for name, OD, ID in COPPER_TYPE_M]
+
+
+def fluid_properties(T_win, T_wout, T_ain, T_aout, P_a=101325.):
+    """water and air properties at the mean temperature of each stream from
+    the shared fluid property library, with this module's names"""
+    w = water()(.5*(T_win+T_wout))
+    a = air()(.5*(T_ain+T_aout), P_a)
+    return dict(rho_w=w['rho'], cp_w=w['cp'], dvisc_w=w['mu'], kvisc_w=w['nu'], k_w=w['k'], Pr_w=w['Pr'], 
+                rho_a=a['rho'], cp_a=a['cp'], dvisc_a=a['mu'], kvisc_a=a['nu'], k_a=a['k'], Pr_a=a['Pr'])
+
+
+def friction_factor(Re):
+    """Darcy friction factor of a smooth pipe: 64/Re when laminar, Petukhov
+    (0.79*ln(Re) - 1.64)**-2 when turbulent"""
+    Re = np.asarray(Re, dtype=float)
+    turbulent = (.79*np.log(np.maximum(Re, 2300.)) - 1.64)**-2
+    return np.where(Re < 2300., 64./np.maximum(Re, 1e-12), turbulent)
+
+
+def nusselt(Re, Pr, n=.4, correlation='dittus_boelter'):
+    """Nusselt number of turbulent pipe flow, arrays in and out.
+
+    dittus_boelter: 0.023*Re**0.8*Pr**n, n = 0.4 heated or 0.3 cooled
+    gnielinski: ((f/8)*(Re-1000)*Pr)/(1+12.7*(f/8)**0.5*(Pr**(2/3)-1)),
+        valid down to Re = 3000
+    """
+    Re = np.asarray(Re, dtype=float)
+    if correlation == 'dittus_boelter':
+        return 0.023*Re**(4./5)*Pr**n
+    if correlation == 'gnielinski':
+        f8 = friction_factor(Re)/8.
+        return f8*(Re-1000.)*Pr/(1+12.7*np.sqrt(f8)*(Pr**(2./3)-1))
+    raise ValueError("unknown correlation '%s'"%correlation)
+
+
+#(Re_min, Re_max, Pr_min, Pr_max) each correlation is valid for
+VALIDITY = {
+    'dittus_boelter': (10000., np.inf, .6, 160.),
+    'gnielinski': (3000., 5e6, .5, 2000.),
+}
+
+
+def nusselt_valid(Re, Pr, correlation='dittus_boelter'):
+    """True where Re and Pr are inside the validity range of the correlation"""
+    Re_min, Re_max, Pr_min, Pr_max = VALIDITY[correlation]
+    return (Re >= Re_min) & (Re <= Re_max) & (Pr >= Pr_min) & (Pr <= Pr_max)
+
+
+def size_heat_exchangers(T_win, T_wout, T_ain, T_aout, Mdot_a, Di_shell=0.05102, Do_tube=0.03493,
+                         Di_tube=0.03279, N=1, rho_a=0.616, cp_a=1006., kvisc_a=0.00001568,
+                         Pr_a=0.68, correlation='dittus_boelter', F_min=.75,
+                         use_property_library=False, P_a=101325.):
+    """HeatExchangerSizing.execute for arrays of designs: all arguments
+    broadcast against each other, and each element is one exchanger.
+
+    Returns an OrderedDict of arrays: the execute outputs (Re_a, Re_w, Nu_a,
+    Nu_w, h_a, h_w, U_o, LMTD, F, q_a, Mdot_w, L), the pressure drops dP_a
+    and dP_w (Pa, Darcy friction over the whole pipe length, with the same
+    hydraulic diameters as the Reynolds numbers) and a feasible mask
+    (positive temperature differences, F >= F_min, a finite length and both
+    streams inside the validity range of the Nusselt correlation).
+
+    use_property_library: take the water and air properties from the
+    fluid property library at each stream's mean temperature (and the air
+    at P_a, Pa) instead of the constants and the given air properties
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        T_win, T_wout, T_ain, T_aout, Mdot_a, Di_shell, Do_tube, Di_tube, N = np.broadcast_arrays(
+            *[np.asarray(x, dtype=float) for x in (T_win, T_wout, T_ain, T_aout, Mdot_a, Di_shell,
+                                                    Do_tube, Di_tube, N)])
+
+        props = dict(rho_w=rho_w, cp_w=cp_w, kvisc_w=kvisc_w, k_w=k_w, Pr_w=cp_w*dvisc_w/k_w,
+                     rho_a=rho_a, cp_a=cp_a, kvisc_a=kvisc_a, k_a=k_a, Pr_a=Pr_a)
+        if use_property_library:
+            props.update(fluid_properties(T_win, T_wout, T_ain, T_aout, P_a))
+
+        A_a = pi*(Di_tube/2)**2
+        A_w = pi*(Di_shell/2)**2 - pi*(Do_tube/2)**2
+        Veloc_a = Mdot_a/(props['rho_a']*A_a)
+        q_a = Mdot_a*props['cp_a']*(T_ain - T_aout)
+        Mdot_w = q_a/(props['cp_w']*(T_wout - T_win))
+        Veloc_w = Mdot_w/(props['rho_w']*A_w)
+
+        Da_h = Di_shell - Do_tube
+        Da_e = (Di_shell**2 - Do_tube**2)/Do_tube
+        Dw_h = Di_tube
+
+        Re_a = Veloc_a*Da_h/props['kvisc_a']
+        Re_w = Veloc_w*Dw_h/props['kvisc_w']
+
+        Nu_a = nusselt(Re_a, props['Pr_a'], .4, correlation)
+        Nu_w = nusselt(Re_w, props['Pr_w'], .3, correlation)
+        h_a = Nu_a*props['k_a']/Da_e
+        h_w = Nu_w*props['k_w']/Di_tube
+
+        U_o = 1/(Do_tube/(Di_tube*h_w) + Do_tube*np.log(Do_tube/Di_tube)/(2*k_p) + 1/h_a)
+
+        #counter-flow
+        dT1 = T_ain - T_wout
+        dT2 = T_aout - T_win
+        LMTD = np.abs((dT1-dT2)/np.log(dT1/dT2))
+        LMTD = np.where(np.isclose(dT1, dT2), dT1, LMTD)
+
+        #multi-pass correction
+        P = (T_wout-T_win)/(T_aout-T_win)
+        R = (T_ain-T_aout)/(T_wout-T_win)
+        X1 = ((R*P-1)/(P-1))**(1./N)
+        X = (1-X1)/(R-X1)
+        F_sqr = np.sqrt(R**2+1)
+        F = (F_sqr/(R-1))*np.log((1-X)/(1-R*X)) / \
+            np.log(((2/X)-1-R+F_sqr)/((2/X)-1-R-F_sqr))
+        F = np.where(N > 1, F, 1.)
+
+        L = q_a/(U_o*pi*F*Do_tube*LMTD)/N
+
+        #pressure drop over the full pipe length, all passes
+        dP_a = friction_factor(Re_a)*(L*N/Da_h)*.5*props['rho_a']*Veloc_a**2
+        dP_w = friction_factor(Re_w)*(L*N/Dw_h)*.5*props['rho_w']*Veloc_w**2
+
+        feasible = (Da_h > 0) & (dT1 > 0) & (dT2 > 0) & (q_a > 0) & (Mdot_w > 0) & \
+            np.isfinite(F) & (F >= F_min) & np.isfinite(L) & (L > 0) & \
+            nusselt_valid(Re_a, props['Pr_a'], correlation) & nusselt_valid(Re_w, props['Pr_w'], correlation)
+
+    return OrderedDict([
+        ('Re_a', Re_a), ('Re_w', Re_w), ('Nu_a', Nu_a), ('Nu_w', Nu_w), ('h_a', h_a), ('h_w', h_w),
+        ('U_o', U_o), ('LMTD', LMTD), ('F', F), ('q_a', q_a), ('Mdot_w', Mdot_w), ('L', L),
+        ('dP_a', dP_a), ('dP_w', dP_w), ('feasible', feasible),
+    ])
+
+
+def pareto_front(costs):
+    """indices of the rows of costs (designs x objectives, all minimized)
+    that no other row dominates (no worse in every objective and better in
+    at least one). Identical designs are all kept"""
+
+    costs = np.asarray(costs, dtype=float)
+    #starting from the designs that are good overall prunes the most
+    remaining = np.argsort(np.sum(np.argsort(np.argsort(costs, axis=0), axis=0), axis=1))
+    costs = costs[remaining]
+    i = 0
+    while i < len(costs):
+        keep = np.any(costs < costs[i], axis=1) | np.all(costs == costs[i], axis=1)
+        remaining = remaining[keep]
+        costs = costs[keep]
+        i = np.count_nonzero(keep[:i]) + 1
+    return np.sort(remaining)
+
+
+def design_space(T_ain, Mdot_a, T_aout, T_win, T_wout, passes=(1, 2, 4), catalogue=PIPE_CATALOGUE,
+                 objectives=('L', 'dP_w', 'Mdot_w'), **kwargs):
+    """Sizes every combination of a tube and a larger shell from the pipe
+    catalogue, pass count and air out/water in/water out temperature (each a
+    sequence of options) in one array pass.
+
+    kwargs: other size_heat_exchangers arguments (air properties, correlation)
+
+    Returns (designs, pareto): designs is an OrderedDict with the option
+    arrays (tube, shell, N, T_aout, T_win, T_wout) and the
+    size_heat_exchangers results for every combination; pareto holds the
+    indices of the feasible designs that are Pareto optimal in objectives
+    """
+
+    sizes = np.arange(len(catalogue))
+    grids = np.meshgrid(sizes, sizes, np.asarray(passes, dtype=float), np.atleast_1d(T_aout),
+                        np.atleast_1d(T_win), np.atleast_1d(T_wout), indexing='ij')
+    tube, shell, N, T_ao, T_wi, T_wo = [g.ravel() for g in grids]
+    OD = np.array([c[1] for c in catalogue])
+    ID = np.array([c[2] for c in catalogue])
+
+    res = size_heat_exchangers(T_wi, T_wo, T_ain, T_ao, Mdot_a, Di_shell=ID[shell], Do_tube=OD[tube],
+                               Di_tube=ID[tube], N=N, **kwargs)
+    designs = OrderedDict([('tube', tube), ('shell', shell), ('N', N), ('T_aout', T_ao),
+                           ('T_win', T_wi), ('T_wout', T_wo)])
+    designs.update(res)
+
+    feasible = np.flatnonzero(res['feasible'])
+    costs = np.column_stack([res[name][feasible] for name in objectives])
+    return designs, feasible[pareto_front(costs)]
+
 class HeatExchangerSizing(Component):
     """ Main Component """
 
@@ -56,6 +257,10 @@ class HeatExchangerSizing(Component):
     cp_a = Float(1006., units = 'J/(kg*K)', iotype='in', desc='specific heat of air')
     dvisc_a = Float(0.00002, units = 'kg/(m*s)', iotype='in', desc='dynamic viscosity for air')
     kvisc_a = Float(0.00001568, units = 'm**2/s', iotype='in', desc='kinematic viscosity for air')
+
+    #Temperature dependent properties instead of the constants above
+    use_property_library = Bool(False, iotype='in', desc='take the water and air properties from the fluid property library at the mean temperature of each stream')
+    P_a = Float(101325., units = 'Pa', iotype='in', desc='pressure of the air, for its density (only with use_property_library)')
     
 
     #--Outputs--
@@ -106,6 +311,12 @@ class HeatExchangerSizing(Component):
         Do_tube = self.Do_tube
         Di_tube = self.Di_tube
 
+        props = dict(rho_w=rho_w, cp_w=cp_w, dvisc_w=dvisc_w, kvisc_w=kvisc_w, k_w=k_w, k_a=k_a, 
+                     rho_a=self.rho_a, cp_a=self.cp_a, dvisc_a=self.dvisc_a, kvisc_a=self.kvisc_a)
+        if self.use_property_library: 
+            props.update((name, float(value)) for name, value in 
+                         fluid_properties(Tc_in, Tc_out, Th_in, Th_out, self.P_a).iteritems())
+
         #Determine the cross sectional area of the air tube
         self.A_a = pi*(self.Di_tube/2)**2
 
@@ -114,25 +325,25 @@ class HeatExchangerSizing(Component):
         #self.A_w = 0.0008444
         #Determine the fluid velocity of the air
         #Rearrange Mdot = rho * Area * Velocity --> Velocity = Mdot/(rho*Area)
-        self.Veloc_a = self.Mdot_a / (self.rho_a * self.A_a)
+        self.Veloc_a = self.Mdot_a / (props['rho_a'] * self.A_a)
         
         #Determine q
         #q = mdot * cp * deltaT
-        self.q_a = self.Mdot_a* self.cp_a * -(Th_out - Th_in)
+        self.q_a = self.Mdot_a* props['cp_a'] * -(Th_out - Th_in)
 
         #Energy Balance: Q_water must equal Q_air
         self.q_w = self.q_a
 
         #Determine water Mdot
         #q = mdot * cp * deltaT
-        self.Mdot_w = self.q_w / (cp_w * -(Tc_in - Tc_out))
+        self.Mdot_w = self.q_w / (props['cp_w'] * -(Tc_in - Tc_out))
         
         #Determine the Water Cross sectional Area 
         self.A_w = (pi*(Di_shell/2)**2)- pi*((Do_tube/2)**2)
 
         #Determin flow velocity of the water, from Mdot and Area
         #Rearrange Mdot = rho * Area * Velocity --> Velocity = Mdot/(rho*Area)
-        self.Veloc_w = self.Mdot_w / (rho_w * self.A_w)
+        self.Veloc_w = self.Mdot_w / (props['rho_w'] * self.A_w)
         
         #prevent cascading
         #self.Veloc_w = 1.71
@@ -155,9 +366,9 @@ class HeatExchangerSizing(Component):
         #Determine the Reynolds Number
         #Re = velocity * hydraulic dimater / kinematic viscostiy   (general form for pipes)
         #Re = inertial forces/ viscous forces
-        self.Re_a = self.Veloc_a*self.Da_h/self.kvisc_a
+        self.Re_a = self.Veloc_a*self.Da_h/props['kvisc_a']
         
-        self.Re_w = self.Veloc_w*self.Dw_h/kvisc_w
+        self.Re_w = self.Veloc_w*self.Dw_h/props['kvisc_w']
 
         #Re_w = 174215
  
@@ -165,11 +376,13 @@ class HeatExchangerSizing(Component):
         #Pr = viscous diffusion rate/ thermal diffusion rate = Cp * dyanamic viscosity / thermal conductivity
         #Pr << 1 means thermal diffusivity dominates
         #Pr >> 1 means momentum diffusivity dominates
-        self.Pr_a = self.cp_a*self.dvisc_a/k_a
-        self.Pr_w = cp_w*dvisc_w/k_w
+        self.Pr_a = props['cp_a']*props['dvisc_a']/props['k_a']
+        self.Pr_w = props['cp_w']*props['dvisc_w']/props['k_w']
 
         #Override Pr calculation based on better information @ 300 degree C 
-        self.Pr_a = 0.68 #http://www.engineeringtoolbox.com/air-properties-d_156.html
+        #(the property library is consistent, so its Pr is kept)
+        if not self.use_property_library: 
+            self.Pr_a = 0.68 #http://www.engineeringtoolbox.com/air-properties-d_156.html
 
         #Determine the Nusselt Number
         #Nu = convecive heat transfer / conductive heat transfer
@@ -198,19 +411,17 @@ class HeatExchangerSizing(Component):
         #Valid for 0.5<= Pr <=2000
         #and      3000<= Re <= 5*(10^6)
         if ((self.Re_a >10000) and (self.Re_w > 10000) and (0.6 < self.Pr_a < 160) and (0.6 < self.Pr_w < 160)):
-            print ""
-            print "   Dittus-Boelter Equation Valid. Calculating Nusselt Number   "
+            self._logger.debug("Dittus-Boelter Equation Valid. Calculating Nusselt Number")
         else:
-            print ""
-            print "!!!** Dittus-Boelter Equation not valid. Use alternate method  **!!!"
+            self._logger.debug("Dittus-Boelter Equation not valid. Use alternate method")
 
         self.Nu_a = 0.023*(self.Re_a**(4./5))*(self.Pr_a**0.4) #fluid is heated n=0.4
         self.Nu_w = 0.023*(self.Re_w**(4./5))*(self.Pr_w**0.3) #fluid is cooled n=0.3
 
         #Determine h
         # h = Nu * k/ D
-        self.h_a = self.Nu_a*k_a/self.Da_e
-        self.h_w = self.Nu_w*k_w/self.Dw_e
+        self.h_a = self.Nu_a*props['k_a']/self.Da_e
+        self.h_w = self.Nu_w*props['k_w']/self.Dw_e
 
         #cascading
         #self.h_a = 1467.95
@@ -266,9 +477,9 @@ class HeatExchangerSizing(Component):
             F_denom = log(F_denom1/F_denom2,e)
             self.F = F_num / F_denom 
             
-            print "   {} pass design, correction factor calculated to be: {}".format(self.N,self.F)
+            self._logger.debug("{} pass design, correction factor calculated to be: {}".format(self.N,self.F))
         else:
-            print "   Single Pass Design, no correction factor"
+            self._logger.debug("Single Pass Design, no correction factor")
             self.F = 1
         #Determine the required length of the heat exchanger
         # Q = U * A * LMTD
@@ -351,4 +562,17 @@ if __name__ == "__main__":
     tot_vol = x*y * cu(test.L,'m','ft')
     
     print "Heat Exchanger Dimensions: {}ft (Length) x {}ft (Width) x {}ft (Height)".format(cu(test.L,'m','ft')/2,x,y)
-    print "Heat Exchanger Volume: {} ft^3".format( tot_vol)
\ No newline at end of file
+    print "Heat Exchanger Volume: {} ft^3".format( tot_vol)
+
+    #sweep the catalogue, pass counts and temperatures for the same air stream
+    import time
+    start = time.time()
+    designs, pareto = design_space(test.T_ain, test.Mdot_a, T_aout=np.linspace(320., 360., 6), 
+                                   T_win=np.linspace(285., 300., 4), T_wout=np.linspace(330., 420., 10))
+    print ""
+    print "{} designs, {} feasible, {} Pareto optimal in {:.3f} s".format(len(designs['L']), 
+        np.count_nonzero(designs['feasible']), len(pareto), time.time()-start)
+    for i in pareto[np.argsort(designs['L'][pareto])][:10]: 
+        print "tube {:>6}\" shell {:>6}\" N={:.0f}: L {:6.2f} m, dP_w {:8.1f} Pa, Mdot_w {:.3f} kg/s".format(
+            PIPE_CATALOGUE[designs['tube'][i]][0], PIPE_CATALOGUE[designs['shell'][i]][0], designs['N'][i], 
+            designs['L'][i], designs['dP_w'][i], designs['Mdot_w'][i])
@@ -0,0 +1,213 @@
+"""
+    fleet_sim.py -
+        Traffic of a fleet of pods sharing the tube. Pods are dispatched on
+        headways and all fly the same Mission trajectory. The tube is split
+        into block segments with a pod capacity each, and a pod is held at
+        the station until it can fly the whole route without entering a full
+        segment. Because every pod flies the same trajectory, the departure
+        times determine everything else. Segment occupancy, the pods in the
+        tube, their heat rejection and the fleet power draw are binned in
+        time in closed form, without stepping through events, and a day of
+        tens of thousands of trips runs in about a second. The binned pod
+        counts can be handed straight to the tube thermal models (num_pods
+        in tube_transient_temp, pod_density in tube_route_temp).
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+
+def headway_schedule(headway, duration, start=0.):
+    """scheduled departure times (s) over duration for a headway (s) that is
+    a constant or a function of time (e.g. shorter at rush hour)"""
+
+    if not callable(headway):
+        return np.arange(start, start+duration, float(headway))
+    times = []
+    t = start
+    while t < start+duration:
+        times.append(t)
+        t += float(headway(t))
+    return np.array(times)
+
+
+def pod_heat_rate(WCp_pod=563., temp_pod_exhaust=950., temp_boundary=322.):
+    """heat one pod rejects into the tube (W), as TubeWallTemp.heat_rate_pod
+    computes it from pod_exhaust(): the WCp (W/K) and WCp weighted total
+    temperature (K) of the exhaust against the wall temperature (K). The
+    defaults are the baseline pod of tube_wall_temp.heat_balance. Works on
+    arrays"""
+    return WCp_pod*(temp_pod_exhaust - temp_boundary)
+
+
+def exhaust_heat_rate(speed, off_design, temp_boundary=322.):
+    """pod_heat_rate at each speed (m/s) from the nozzle and bearing exhaust
+    of a CompressionSystem.evaluate_off_design result, interpolated in speed
+    between its converged points (and held at the end values outside them).
+    Pass the trajectory speed to get the heat_rate_pod of a FleetSimulator"""
+
+    ok = np.asarray(off_design['converged'], dtype=bool)
+    if not np.any(ok):
+        raise ValueError("no converged off-design points")
+    heat = pod_heat_rate(off_design['nozzle_WCp'], off_design['nozzle_Tt'], temp_boundary) + \
+        pod_heat_rate(off_design['bearing_WCp'], off_design['bearing_Tt'], temp_boundary)
+    order = np.argsort(off_design['speed'][ok])
+    return np.interp(speed, off_design['speed'][ok][order], heat[ok][order])
+
+
+def _ramp_sum(x, times, prefix):
+    """sum over the sorted times of max(0, x - time), for any array x. This is
+    the integral up to x of the number of events that have happened"""
+    n = np.searchsorted(times, x, side='right')
+    return n*x - prefix[n]
+
+
+class FleetSimulator(object):
+    """Pods flying one trajectory on a shared tube
+
+    trajectory: dict of time, distance, pwr_onboard and pwr_propulsion arrays
+        for one trip (e.g. Mission.trajectory() or trajectory.fly_profile)
+    n_segments: number of equal length block segments along the route
+    capacity: pods allowed in a segment at once
+    heat_rate_pod: heat one pod rejects into the tube (W), a constant or an
+        array along the trajectory time (e.g. from exhaust_heat_rate). By
+        default the trajectory's own heat_rate_pod, if it has one, or else
+        pod_heat_rate() for the baseline pod
+    """
+
+    def __init__(self, trajectory, n_segments=50, capacity=1, heat_rate_pod=None):
+        self.time = np.asarray(trajectory['time'], dtype=float)
+        self.distance = np.asarray(trajectory['distance'], dtype=float)
+        self.n_segments = n_segments
+        self.capacity = capacity
+        if heat_rate_pod is None:
+            heat_rate_pod = trajectory.get('heat_rate_pod', pod_heat_rate())
+        self.heat_rate_pod = heat_rate_pod
+
+        #time of flight to each segment boundary
+        self.length = self.distance[-1]
+        self.boundaries = np.linspace(0, self.length, n_segments+1)
+        self.boundary_time = np.interp(self.boundaries, self.distance, self.time)
+        self.boundary_time[-1] = self.time[-1]
+
+        #cumulative energy of one trip, J, for binning the power draw and
+        #the heat released into the tube
+        self.energy_onboard = self._cumulative(1000.*np.asarray(trajectory['pwr_onboard'], dtype=float))
+        self.energy_propulsion = self._cumulative(1000.*np.asarray(trajectory['pwr_propulsion'], dtype=float))
+        self.energy_heat = self._cumulative(np.asarray(heat_rate_pod, dtype=float))
+
+    def _cumulative(self, pwr):
+        """cumulative energy (J) of one trip for the power (W) along it"""
+        pwr = pwr*np.ones(len(self.time))
+        return np.concatenate(([0.], np.cumsum(.5*(pwr[1:]+pwr[:-1])*np.diff(self.time))))
+
+    def dispatch(self, scheduled):
+        """Actual departure times for the scheduled ones. A pod leaves when
+        no segment on its way would be over capacity. All pods fly the same
+        trajectory, in order, so each segment only has to remember the exit
+        times of its last `capacity` pods"""
+
+        enter = self.boundary_time[:-1]
+        leave = self.boundary_time[1:]
+        #every pod passes every segment, so the segments' exit histories are
+        #kept as one ring buffer of the last `capacity` pods
+        exits = np.full((self.capacity, self.n_segments), -np.inf)
+
+        departures = np.empty(len(scheduled))
+        for k, t in enumerate(np.sort(scheduled)):
+            #the oldest of the last `capacity` pods must be out before we get in
+            oldest = exits[k % self.capacity]
+            t = max(t, np.max(oldest - enter), departures[k-1] if k else t)
+            departures[k] = t
+            exits[k % self.capacity] = t + leave
+        return departures
+
+    def run(self, scheduled, bin_width=60., duration=None, hook=None):
+        """Simulates the scheduled departures (s).
+
+        bin_width: width of the time bins the results are averaged over, s
+        duration: simulated time, long enough for the last trip by default
+        hook: called as hook(time, pods_in_tube) at every departure and
+            arrival, in time order, e.g. to drive a thermal model event by
+            event
+
+        Returns an OrderedDict with the bin start times, the mean occupancy
+        of every segment in each bin (bins x segments), the mean pods_in_tube,
+        heat_rate_pods (W), pwr_onboard and pwr_propulsion (kW) per bin, the
+        departure times and the station delay of every trip
+        """
+
+        departures = self.dispatch(scheduled)
+        trip_time = self.boundary_time[-1]
+        if duration is None:
+            duration = departures[-1] + trip_time if len(departures) else 0.
+        n_bins = int(np.ceil(duration/bin_width))
+        edges = np.arange(n_bins+1)*bin_width
+
+        if hook is not None:
+            #departures and arrivals are both sorted, so merging them puts
+            #every event in time order (an arrival before a departure at a tie)
+            times = np.concatenate((departures + trip_time, departures))
+            change = np.concatenate((-np.ones(len(departures), dtype=int), np.ones(len(departures), dtype=int)))
+            order = np.argsort(times, kind='mergesort')
+            for t, in_tube in zip(times[order], np.cumsum(change[order])):
+                hook(t, in_tube)
+
+        #every pod is in segment j from departure + enter_j to departure +
+        #leave_j, so the time integral of a segment's occupancy up to each
+        #bin edge is a difference of two ramp sums over the departures
+        prefix = np.concatenate(([0.], np.cumsum(departures)))
+        x = edges[None, :] - self.boundary_time[:, None]
+        ramps = _ramp_sum(x, departures, prefix)
+        occupancy = np.diff(ramps[:-1]-ramps[1:], axis=1).T/bin_width
+        pods_in_tube = occupancy.sum(axis=1)
+
+        return OrderedDict([
+            ('time', edges[:-1]),
+            ('occupancy', occupancy),
+            ('pods_in_tube', pods_in_tube),
+            ('heat_rate_pods', 1000.*self._binned_power(self.energy_heat, departures, edges)),
+            ('pwr_onboard', self._binned_power(self.energy_onboard, departures, edges)),
+            ('pwr_propulsion', self._binned_power(self.energy_propulsion, departures, edges)),
+            ('departures', departures),
+            ('delay', departures - np.sort(scheduled)),
+        ])
+
+    def _binned_power(self, energy, departures, edges, chunk=2000):
+        """mean fleet power (kW) per bin, from every trip's cumulative energy
+        at the bin edges"""
+
+        total = np.zeros(len(edges))
+        for i in xrange(0, len(departures), chunk):
+            t = edges[None, :] - departures[i:i+chunk, None]
+            total += np.interp(t, self.time, energy, left=0., right=energy[-1]).sum(axis=0)
+        return np.diff(total)/np.diff(edges)/1000.
+
+
+if __name__ == "__main__":
+    import time as timer
+    from hyperloop.trajectory import scale_profile, fly_profile
+    from hyperloop.tube_transient_temp import transient_wall_temperature
+
+    t, v = scale_profile(308., 563270.)
+    trip = fly_profile(t, v, pwr_compressor=420.)
+
+    #every 10 s in the day, every 4 s at the morning and evening peaks
+    def headway(t):
+        hour = (t/3600.) % 24
+        return 4. if (7 <= hour < 9) or (17 <= hour < 19) else 10.
+    scheduled = headway_schedule(headway, 24*3600.)
+
+    #1 km blocks with room for 4 pods, so the pods pulling away from the 
+    #station (the slowest blocks) are what limits the peak headway
+    fleet = FleetSimulator(trip, n_segments=563, capacity=4)
+    start = timer.time()
+    res = fleet.run(scheduled, bin_width=60.)
+    print "%d trips in %.2f s, longest station delay %.1f s"%(len(scheduled), timer.time()-start, res['delay'].max())
+    print "pods in the tube: mean %.1f, max %.1f; peak heat %.1f MW, peak propulsion %.1f MW"%(
+        res['pods_in_tube'].mean(), res['pods_in_tube'].max(), res['heat_rate_pods'].max()/1e6,
+        res['pwr_propulsion'].max()/1000.)
+
+    #the traffic drives the tube wall temperature
+    wall = transient_wall_temperature(res['time'], num_pods=res['pods_in_tube'], solar_insolation=0.)
+    print "wall temperature %.2f K to %.2f K"%(wall['temp_boundary'].min(), wall['temp_boundary'].max())
@@ -1,8 +1,15 @@
+import numpy as np
+
 from openmdao.main.api import Component
 from openmdao.lib.datatypes.api import Float
 
 
 #NOTE: This is a VERY oversimplified calculation! But it gets us a ballpark figure
+#gathered from http://en.wikipedia.org/wiki/Lithium-ion_battery
+SPECIFIC_ENERGY = .182 #.100-.265 kW*h/kg
+ENERGY_DENSITY = 494 #250-739 kW*h/m**3
+
+
 class Battery(Component): 
 
     #Inputs
@@ -16,13 +23,19 @@ class Battery(Component):
 
     def execute(self): 
 
-        #gathered from http://en.wikipedia.org/wiki/Lithium-ion_battery
-        specific_energy = .182 #.100-.265 kW*h/kg
-        energy_density = 494 #250-739 kW*h/m**3
-
-        self.mass = self.energy/specific_energy
-        self.volume = self.energy/energy_density
+        self.mass = self.energy/SPECIFIC_ENERGY
+        self.volume = self.energy/ENERGY_DENSITY
         self.length = self.volume/self.area_cross_section
+
+    def list_deriv_vars(self): 
+        return ('energy', 'area_cross_section'), ('mass', 'volume', 'length')
+
+    def provideJ(self): 
+        return np.array([
+            [1./SPECIFIC_ENERGY, 0.], 
+            [1./ENERGY_DENSITY, 0.], 
+            [1./(ENERGY_DENSITY*self.area_cross_section), -self.length/self.area_cross_section], 
+        ])
         
 
 if __name__ == "__main__": 
@@ -1,5 +1,7 @@
 from math import pi
 
+import numpy as np
+
 from openmdao.main.api import Component
 from openmdao.lib.datatypes.api import Float
 
@@ -25,6 +27,23 @@ class InletGeom(Component):
         self.area_bypass = pi*(self.radius_back_inner)**2 - self.area_passenger_capsule
         self.area_frontal = pi*(self.radius_back_outer)**2
 
+    def list_deriv_vars(self): 
+        return ('area_out', 'hub_to_tip', 'area_passenger_capsule', 'inlet_wall_thickness'), \
+            ('radius_back_inner', 'radius_back_outer', 'area_bypass', 'area_frontal')
+
+    def provideJ(self): 
+        r_in = self.radius_back_inner
+        r_out = self.radius_back_outer
+        dr_in = np.array([r_in/(2*self.area_out), r_in*self.hub_to_tip/(1-self.hub_to_tip**2), 0., 0.])
+        dr_out = dr_in + np.array([0., 0., 0., 1.])
+
+        return np.vstack((
+            dr_in, 
+            dr_out, 
+            2*pi*r_in*dr_in - np.array([0., 0., 1., 0.]), 
+            2*pi*r_out*dr_out, 
+        ))
+
 if __name__ == "__main__": 
 
     from openmdao.main.api import set_as_top
@@ -1,3 +1,5 @@
+import numpy as np
+
 from openmdao.main.api import Component
 from openmdao.lib.datatypes.api import Float, Int
 
@@ -14,3 +16,10 @@ class PassengerCapsule(Component):
     def execute(self):
         self.length_capsule = 1.1*self.n_rows*self.length_row #10% fudge factor
         self.area_cross_section = 14000 # page 15 of the original proposal
+
+    def list_deriv_vars(self): 
+        #n_rows is an integer, so it is left out
+        return ('length_row',), ('length_capsule',)
+
+    def provideJ(self): 
+        return np.array([[1.1*self.n_rows]])
@@ -1,3 +1,5 @@
+import numpy as np
+
 from openmdao.main.api import Component
 
 from openmdao.lib.datatypes.api import Float
@@ -18,6 +20,12 @@ class TubeStructural(Component):
         thickness = self.radius_inner*THICKNESS_RATIO
         self.radius_outer = self.radius_inner + thickness
 
+    def list_deriv_vars(self): 
+        return ('radius_inner',), ('radius_outer',)
+
+    def provideJ(self): 
+        return np.array([[1+THICKNESS_RATIO]])
+
 
 
 
@@ -1,11 +1,11 @@
 from openmdao.main.api import Assembly 
 from openmdao.lib.datatypes.api import Float, Int
-from openmdao.lib.drivers.api import BroydenSolver
-from openmdao.lib.casehandlers.api import CSVCaseRecorder
+from openmdao.lib.drivers.api import NewtonSolver
 
 
 from hyperloop.api import (TubeLimitFlow, CompressionSystem, TubeWallTemp,
     Pod, Mission)
+from hyperloop.columnar_recorder import ColumnarCaseRecorder
 
 
 class HyperloopPod(Assembly): 
@@ -37,6 +37,7 @@ class HyperloopPod(Assembly):
         pod = self.add('pod', Pod())
         flow_limit = self.add('flow_limit', TubeLimitFlow())
         tube_wall_temp = self.add('tube_wall_temp', TubeWallTemp())
+        tube_wall_temp.solve_steady_state = True #residual is temp_boundary - equilibrium temp
 
         #Boundary Input Connections
         #Hyperloop -> Compress
@@ -47,6 +48,8 @@ class HyperloopPod(Assembly):
         #Hyperloop -> Mission
         self.connect('tube_length', 'mission.tube_length')
         self.connect('pwr_marg','mission.pwr_marg')
+        self.connect('Ps_tube', 'mission.Ps_tube')
+        self.connect('coef_drag', 'mission.coef_drag')
         #Hyperloop -> Flow Limit
         self.connect('Mach_pod_max', 'flow_limit.Mach_pod')
         self.connect('Ps_tube', 'flow_limit.Ps_tube')
@@ -79,12 +82,18 @@ class HyperloopPod(Assembly):
         self.connect('mission.energy', 'pod.energy')
 
         #Add Solver
-        solver = self.add('solver',BroydenSolver())
-        solver.itmax = 50 #max iterations
-        solver.tol = .001
+        #Newton uses the analytic partials from the components, only the
+        #pycycle elements in compress get finite differenced
+        solver = self.add('solver',NewtonSolver())
+        solver.max_iteration = 50 #max iterations
+        solver.atol = .001
         #Add Parameters and Constraints
         solver.add_parameter('compress.W_in',low=-1e15,high=1e15)
         solver.add_parameter('compress.c2_PR_des', low=-1e15, high=1e15)
+        #the tube air temperature feeds the compression system, whose exhaust 
+        #heats the wall, so the tube temperature stays a Newton parameter. 
+        #tube_wall_temp solves its own heat balance for the current exhaust 
+        #and its residual is just temp_boundary - temp_equilibrium
         solver.add_parameter(['compress.Ts_tube','flow_limit.Ts_tube','tube_wall_temp.temp_boundary'], low=-1e-15, high=1e15)
         solver.add_parameter(['flow_limit.radius_tube', 'pod.radius_tube_inner'], low=-1e15, high=1e15)
 
@@ -95,7 +104,7 @@ class HyperloopPod(Assembly):
 
         driver = self.driver
         driver.workflow.add('solver')
-        driver.recorders = [CSVCaseRecorder(filename="hyperloop_data.csv")] #record only converged
+        driver.recorders = [ColumnarCaseRecorder(path="hyperloop_data.col")] #record only converged
         driver.printvars = ['Mach_bypass', 'Mach_pod_max', 'Mach_c1_in', 'c1_PR_des', 'pod.radius_inlet_back_outer',
                             'pod.inlet.radius_back_inner', 'flow_limit.radius_tube', 'compress.W_in', 'compress.c2_PR_des',
                             'pod.net_force', 'compress.F_net', 'compress.pwr_req', 'pod.energy', 'mission.time',
@@ -118,23 +127,21 @@ if __name__=="__main__":
     #initial guesses
     hl.compress.W_in = .35
     hl.flow_limit.radius_tube = hl.pod.radius_tube_inner = 178
-    hl.compress.Ts_tube = hl.flow_limit.Ts_tube = hl.tube_wall_temp.tubeWallTemp = 322 
+    hl.compress.Ts_tube = hl.flow_limit.Ts_tube = hl.tube_wall_temp.temp_boundary = 322 
     hl.compress.c2_PR_des = 5 
 
-    machs = []
-    tube_r = []
-    capsule_r = []
+    #warm start each Mach from the converged neighbours
+    from hyperloop.sweep import continuation_sweep
+    path = [{'Mach_pod_max': m} for m in np.arange(.781,.95, .01)]
+    results = continuation_sweep(hl, path)
 
-    for m in np.arange(.781,.95, .01):
-        hl.Mach_pod_max = m
-        hl.run()
-        machs.append(m)
-        tube_r.append(hl.pod.radius_inlet_back_outer)
-        capsule_r.append(hl.flow_limit.radius_tube)
+    machs = [res['Mach_pod_max'] for res in results]
+    tube_r = [res['pod.radius_inlet_back_outer'] for res in results]
+    capsule_r = [res['flow_limit.radius_tube'] for res in results]
 
-        print machs
-        print tube_r
-        print capsule_r
+    print machs
+    print tube_r
+    print capsule_r
 
     design_data = OrderedDict([
         ('Mach bypass', hl.Mach_bypass), 
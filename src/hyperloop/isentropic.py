@@ -0,0 +1,143 @@
+"""
+    isentropic.py -
+        Isentropic area-Mach relation and a tabulated inverse of it. The
+        subsonic Mach number for a given A/A* and ratio of specific heats is
+        interpolated from a table on w = sqrt(1 - A*/A), in which Mach is
+        nearly linear at both ends of the subsonic range, and then polished
+        with one Newton step.
+"""
+import numpy as np
+
+
+def area_ratio(mach, gam=1.4):
+    """A/A* for isentropic flow at the given Mach number"""
+    g_exp = (gam+1)/(2*(gam-1))
+    return ((gam+1)/2)**(-1*g_exp)*((1+ (gam-1)/2*mach**2)**g_exp)/mach
+
+
+def subsonic_mach(ratio, gam=1.4, tol=1e-12, max_iter=100):
+    """Subsonic Mach number where A/A* = ratio, for arrays of area ratios.
+
+    Newton's method started from the low Mach asymptote, which is always
+    below the root. A/A* is convex and decreasing on the subsonic branch, so
+    the iterates climb monotonically towards the root and never overshoot"""
+
+    ratio = np.asarray(ratio, dtype=float)
+    k = (gam-1)/2.
+    g_exp = (gam+1)/(2*(gam-1))
+    mach = ((gam+1)/2)**(-1*g_exp)/ratio
+    for i in xrange(max_iter):
+        ar = area_ratio(mach, gam)
+        dar = ar*(mach**2-1)/(mach*(1+k*mach**2))
+        step = (ar-ratio)/dar
+        mach = np.minimum(mach - step, 1.)
+        if np.all(np.abs(step) < tol):
+            break
+    return mach
+
+
+class AreaMachTable(object):
+    """Inverse of the subsonic area-Mach relation, tabulated over w = sqrt(1-A*/A)
+    and gamma. The table is refined until lookups (including the Newton
+    polish) are within `tol` of the exact Mach number at the cell midpoints,
+    where the interpolation error is largest.
+
+    gam_range: (low, high) ratios of specific heats covered by the table
+    tol: required accuracy of the polished Mach number
+    """
+
+    def __init__(self, gam_range=(1.1, 1.7), tol=1e-9, n_w=65, n_gam=13):
+        self.gam_range = gam_range
+        self.tol = tol
+        while True:
+            self._build(n_w, n_gam)
+            self.max_error = self._check()
+            if self.max_error <= tol:
+                break
+            n_w = 2*n_w-1
+            n_gam = 2*n_gam-1
+
+    def _build(self, n_w, n_gam):
+        self.w = np.linspace(0, 1, n_w)
+        self.gam = np.linspace(self.gam_range[0], self.gam_range[1], n_gam)
+        self.table = np.empty((n_gam, n_w))
+        with np.errstate(divide='ignore'):
+            ratio = 1/(1-self.w[1:-1]**2)
+        for j, gam in enumerate(self.gam):
+            self.table[j, 1:-1] = subsonic_mach(ratio, gam)
+        self.table[:, 0] = 1. #A = A*
+        self.table[:, -1] = 0. #infinite area ratio
+
+    def _check(self):
+        """largest error of mach() at the cell midpoints in both directions"""
+        w_mid = .5*(self.w[1:-2]+self.w[2:-1]) #skip the infinite area ratio cell
+        gam_mid = np.concatenate((self.gam, .5*(self.gam[:-1]+self.gam[1:])))
+        W, G = np.meshgrid(w_mid, gam_mid)
+        ratio = 1/(1-W**2)
+        error = 0.
+        for gam, row in zip(gam_mid, ratio):
+            error = max(error, np.max(np.abs(self.mach(row, gam)-subsonic_mach(row, gam))))
+        return error
+
+    def mach(self, ratio, gam=1.4, polish=True):
+        """subsonic Mach number where A/A* = ratio, ratio and gam broadcast
+        against each other. Area ratios below 1 have no isentropic solution,
+        the flow is choked there and the Mach number is 1 (solvers can pass
+        through them while iterating). nan ratios give nan"""
+
+        ratio, gam = np.broadcast_arrays(np.asarray(ratio, dtype=float), np.asarray(gam, dtype=float))
+        if np.any(gam < self.gam_range[0]) or np.any(gam > self.gam_range[1]):
+            raise ValueError("gamma outside of the tabulated range %s"%(self.gam_range,))
+        valid = ~np.isnan(ratio)
+        ratio = np.where(valid, np.maximum(ratio, 1.), 1.)
+
+        w = np.sqrt(1-1/ratio)
+        x = w*(len(self.w)-1)
+        i = np.minimum(x.astype(int), len(self.w)-2)
+        fx = x-i
+        y = (gam-self.gam[0])/(self.gam[1]-self.gam[0])
+        j = np.minimum(y.astype(int), len(self.gam)-2)
+        fy = y-j
+
+        t = self.table
+        mach = (1-fy)*((1-fx)*t[j, i] + fx*t[j, i+1]) + fy*((1-fx)*t[j+1, i] + fx*t[j+1, i+1])
+
+        if polish:
+            #Newton step on w(M) = w, which stays well conditioned at M = 1
+            ok = (mach > 0) & (w > 1e-6)
+            m = np.where(ok, mach, .5)
+            k = (gam-1)/2.
+            ar = area_ratio(m, gam)
+            w_m = np.sqrt(np.maximum(1-1/ar, 1e-300))
+            dw = (m**2-1)/(2*w_m*ar*m*(1+k*m**2))
+            mach = np.where(ok, m-(w_m-w)/dw, mach)
+
+        mach = np.where(valid, mach, np.nan)
+        if mach.ndim == 0:
+            return float(mach)
+        return mach
+
+
+_table = None
+
+def lookup_mach(ratio, gam=1.4):
+    """Subsonic Mach number where A/A* = ratio, from a table shared by the
+    whole process (built on first use)"""
+    global _table
+    if _table is None:
+        _table = AreaMachTable()
+    return _table.mach(ratio, gam)
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.time()
+    table = AreaMachTable()
+    print "table %s built in %.3f s, max error %.2e"%(table.table.shape, time.time()-start, table.max_error)
+
+    ratio = np.linspace(1.001, 100, 1000000)
+    start = time.time()
+    mach = table.mach(ratio, 1.4)
+    print "1e6 lookups in %.3f s"%(time.time()-start)
+    print "max A/A* error: %.2e"%np.max(np.abs(area_ratio(mach)/ratio-1))
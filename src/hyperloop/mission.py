@@ -2,60 +2,148 @@ import numpy as np
 
 from openmdao.main.api import Component
 
-from openmdao.lib.datatypes.api import Float
+from openmdao.lib.datatypes.api import Float, Array
 
+from hyperloop.trajectory import normalized_profile, speed_fraction, scale_profile, fly_profile
 
-#speed profile data from hyperloop alpha proposal, pg 43
-data = np.array([[0,0],
-    [12.5, 300],
-    [165, 300],
-    [182, 555],
-    [427, 555],
-    [444, 760],
-    [1660, 760],
-    [1670, 555],
-    [1756, 555],
-    [1765, 300],
-    [2112, 299],
-    [2132, 0]])
 
-max_speed = np.max(data[:,1])
-data[:,1] /= max_speed #Normalize data
+#speed profile from hyperloop alpha proposal, pg 43, normalized to unit time and speed
+data = normalized_profile()
 
-max_time = np.max(data[:,0])
-data[:,0] /= max_time #Normalize data
+#average speed fraction relative to the max speed
+SPEED_FRAC = speed_fraction()
 
-#integrate normalized data to get an average speed fraction relative to the max speed
-SPEED_FRAC = np.trapz(data[:,1], data[:,0])
+R_AIR = 287.05 #J/(kg*K)
+
+
+def route_profile(distance, speed, speed_max): 
+    """time and speed along a route speed envelope (from route.speed_envelope), 
+    capped at speed_max, and d(trip time)/d(speed_max)"""
+    distance = np.asarray(distance, dtype=float)
+    speed = np.asarray(speed, dtype=float)
+    capped = speed > speed_max
+    speed = np.where(capped, speed_max, speed)
+
+    #constant acceleration between envelope points
+    w = speed[1:]+speed[:-1]
+    dt = 2*np.diff(distance)/w
+    time = np.concatenate(([0.], np.cumsum(dt)))
+    dtime_dspeed = -np.sum(dt/w*(capped[1:]*1.+capped[:-1]))
+    return time, speed, dtime_dspeed
 
 
 class Mission(Component): 
-    """Place holder for real mission analysis. Could consider a 
-    pseudospectral optimal control approach""" 
+    """Flies the proposal speed profile, scaled to the max speed and tube 
+    length, or a route speed envelope, through the trajectory integrator. 
+    The compression system power is pwr_req, or a power curve in speed. 
+    With the proposal profile and a constant power the trip has a closed 
+    form, and nothing is integrated""" 
     #Inputs
     speed_max = Float(308, iotype="in", units="m/s", desc="Maximum travel speed for the pod")
     tube_length = Float(563270, iotype="in", units="m", desc="length of one trip")
     pwr_marg = Float(.3, iotype="in", desc="fractional extra energy requirement")
     pwr_req = Float(420, iotype="in", units="kW", desc="average power requriment for the mission")
+    route_distance = Array(np.zeros(0), iotype="in", units="m", desc="distance along the route of the "
+        "speed envelope points. When empty, the proposal profile is used instead")
+    route_speed = Array(np.zeros(0), iotype="in", units="m/s", desc="route speed envelope (from "
+        "route.speed_envelope), capped at speed_max. The route sets the trip length, not tube_length")
+    pwr_speed = Array(np.zeros(0), iotype="in", units="m/s", desc="pod speeds of the compression system "
+        "power curve. When empty, pwr_req is used throughout")
+    pwr_curve = Array(np.zeros(0), iotype="in", units="kW", desc="compression system power at each of pwr_speed")
+    #drag, only used for the propulsion power of the trajectory
+    coef_drag = Float(2, iotype="in", desc="capsule drag coefficient")
+    area_capsule = Float(18000, iotype="in", units="cm**2", desc="capsule frontal area")
+    Ps_tube = Float(99, iotype="in", units="Pa", desc="static pressure in the tube")
+    Ts_tube = Float(292.1, iotype="in", units="degK", desc="static temperature in the tube")
     #Outputs
     time = Float(iotype="out", units="s", desc="travel time for a pod to make one trip")
     energy = Float(iotype="out", units="kW*h", desc="total energy storage requirements")
 
-    def execute(self): 
-        """this is a *VERY* course approximation that takes the speed profile given in the 
-        original proposal as given. It just serves as a place holder for now. It's better 
-        than nothing, but a real analysis is needed here""" 
+    def _profile(self, speed_max, tube_length): 
+        """time and speed of the trip, with d(time)/d(speed_max) and d(time)/d(tube_length)"""
+        if len(self.route_speed): 
+            time, speed, dtime_dspeed = route_profile(self.route_distance, self.route_speed, speed_max)
+            return time, speed, dtime_dspeed, 0.
+        time, speed = scale_profile(speed_max, tube_length)
+        return time, speed, -float(time[-1])/speed_max, 1./(speed_max*SPEED_FRAC)
+
+    def _pwr_compressor(self): 
+        if len(self.pwr_curve): 
+            pwr_speed, pwr_curve = self.pwr_speed, self.pwr_curve
+            return lambda v: np.interp(v, pwr_speed, pwr_curve)
+        return self.pwr_req
+
+    def _fly(self, time, speed): 
+        return fly_profile(time, speed, coef_drag=self.coef_drag, rho=self.Ps_tube/(R_AIR*self.Ts_tube), 
+                           area_capsule=self.area_capsule/1e4, pwr_compressor=self._pwr_compressor())
+
+    def _energy_onboard(self, speed_max, tube_length): 
+        time, speed = self._profile(speed_max, tube_length)[:2]
+        return float(self._fly(time, speed)['energy'][-1])
+
+    def trajectory(self): 
+        """the whole trip (trajectory.fly_profile arrays) for the current inputs"""
+        time, speed = self._profile(self.speed_max, self.tube_length)[:2]
+        return self._fly(time, speed)
 
-        avg_speed = self.speed_max*SPEED_FRAC
-        self.time = self.tube_length/avg_speed
-
-        self.energy = (self.pwr_req*self.time/3600.)*(1+self.pwr_marg) #convert to hours
-
-        print self.itername 
-        print " W_in: ", self.parent.compress.W_in, 10*(self.parent.compress.W_in-self.parent.flow_limit.W_excess)
-        print " R_tube:  ", self.parent.pod.radius_tube_inner, .01*(self.parent.pod.area_compressor_bypass-self.parent.compress.area_c1_out)
-        print " Bearing_Ps:  ", self.parent.compress.c2_PR_des, self.parent.compress.Ps_bearing_residual
-        print 
+    def execute(self): 
+        """without a route, the shape of the speed profile is the one given in 
+        the original proposal, only its top speed and length change""" 
+
+        if not len(self.route_speed) and not len(self.pwr_curve): 
+            #the average speed is a fixed fraction of the top speed
+            self.time = self.tube_length/(self.speed_max*SPEED_FRAC)
+            self._dtime_dspeed = -self.time/self.speed_max
+            self._dtime_dlength = 1./(self.speed_max*SPEED_FRAC)
+            self.energy = (self.pwr_req*self.time/3600.)*(1+self.pwr_marg)
+            return
+
+        time, speed, self._dtime_dspeed, self._dtime_dlength = self._profile(self.speed_max, self.tube_length)
+        self.time = float(time[-1])
+        self.energy = float(self._fly(time, speed)['energy'][-1])*(1+self.pwr_marg)
+
+    def list_deriv_vars(self): 
+        inputs = ('speed_max', 'tube_length', 'pwr_req', 'pwr_marg')
+        if len(self.pwr_curve): 
+            inputs += ('pwr_curve',)
+        return inputs, ('time', 'energy')
+
+    def provideJ(self): 
+        dtime_dspeed = self._dtime_dspeed
+        dtime_dlength = self._dtime_dlength
+        denergy_dtime = self.pwr_req/3600.*(1+self.pwr_marg)
+
+        if len(self.pwr_curve): 
+            marg = 1+self.pwr_marg
+            energy = self.energy/marg
+            #the power varies along the trip, so the speed and length partials are finite differenced
+            step = 1e-6
+            denergy_dspeed = (self._energy_onboard(self.speed_max*(1+step), self.tube_length) - energy)/\
+                (step*self.speed_max)*marg
+            denergy_dlength = (self._energy_onboard(self.speed_max, self.tube_length*(1+step)) - energy)/\
+                (step*self.tube_length)*marg
+
+            #the power is linear in the curve points: the trapezoid weights in 
+            #time times the interpolation weights in speed
+            time, speed = self._profile(self.speed_max, self.tube_length)[:2]
+            dt = np.diff(time)
+            weights = np.zeros(len(time))
+            weights[:-1] += .5*dt
+            weights[1:] += .5*dt
+            n = len(self.pwr_curve)
+            interp = np.array([np.interp(speed, self.pwr_speed, unit) for unit in np.eye(n)])
+            denergy_dcurve = interp.dot(weights)/3600.*marg
+
+            return np.array([
+                np.concatenate(([dtime_dspeed, dtime_dlength, 0., 0.], np.zeros(n))), 
+                np.concatenate(([denergy_dspeed, denergy_dlength, 0., energy], denergy_dcurve)), 
+            ])
+
+        return np.array([
+            [dtime_dspeed, dtime_dlength, 0., 0.], 
+            [denergy_dtime*dtime_dspeed, denergy_dtime*dtime_dlength, 
+                self.time/3600.*(1+self.pwr_marg), self.pwr_req*self.time/3600.], 
+        ])
 
 if __name__ == "__main__": 
 
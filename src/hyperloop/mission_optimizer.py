@@ -0,0 +1,236 @@
+"""
+    mission_optimizer.py -
+        Minimum time or minimum energy speed profile for a pod on a route,
+        by direct collocation in the distance domain. The unknowns are the
+        kinetic energies (v**2/2) at the nodes, so the acceleration limits
+        between nodes are linear constraints and the speed limits are
+        bounds. The segment time 2*ds/(v_i + v_i+1) is exact for constant
+        acceleration. Every Jacobian and Hessian is banded, so thousands
+        of nodes solve quickly with scipy's trust-constr, and each solve is
+        warm started from the previous one.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import minimize, Bounds, LinearConstraint, NonlinearConstraint
+
+from hyperloop.trajectory import drag_force
+from hyperloop.route import acceleration_envelope
+
+
+G = 9.81 #m/s**2
+
+
+def _segment_sum_hessian(d2, n):
+    """Hessian of sum_k f(w_k), w_k = v_k + v_k+1, in v, given d2 = f''(w_k)"""
+    diag = np.zeros(n)
+    diag[:-1] += d2
+    diag[1:] += d2
+    return sparse.diags([d2, diag, d2], [-1, 0, 1], format='csr')
+
+
+class MissionOptimizer(object):
+    """Optimal speed profile along a route
+
+    objective: 'time' (shortest trip) or 'energy' (least onboard plus drag
+        energy, with the trip time limited to time_max)
+    n_nodes: number of collocation nodes along the route
+    accel_max, decel_max: longitudinal acceleration limits, m/s**2
+    speed_end: speed at both ends of the route, m/s (small but not zero)
+    pwr_onboard: onboard (compressor and bearing) power, kW, constant or a
+        function of speed
+    """
+
+    def __init__(self, objective='time', n_nodes=1000, accel_max=.5*G, decel_max=.5*G, speed_end=1.,
+                 coef_drag=2., rho=.00118, area_capsule=1.8, pwr_onboard=420., time_max=None):
+        if objective not in ('time', 'energy'):
+            raise ValueError("objective must be 'time' or 'energy', not '%s'"%objective)
+        if objective == 'energy' and time_max is None:
+            raise ValueError("an energy objective needs a time_max")
+        self.objective = objective
+        self.n_nodes = n_nodes
+        self.accel_max = accel_max
+        self.decel_max = decel_max
+        self.speed_end = speed_end
+        self.coef_drag = coef_drag
+        self.rho = rho
+        self.area_capsule = area_capsule
+        self.pwr_onboard = pwr_onboard
+        self.time_max = time_max
+
+        self._last = None #(distance, speed) of the last solution, for warm starts
+
+    def _speed_limit(self, speed_limit, s):
+        if callable(speed_limit):
+            return np.asarray(speed_limit(s), dtype=float)*np.ones(len(s))
+        if isinstance(speed_limit, tuple):
+            distance, limit = speed_limit
+            return np.interp(s, distance, limit)
+        return float(speed_limit)*np.ones(len(s))
+
+    #segment functions of w = v_i + v_i+1, with first and second derivatives
+    def _time_terms(self, w, ds):
+        return 2*ds/w, -2*ds/w**2, 4*ds/w**3
+
+    def _energy_terms(self, w, ds):
+        """onboard energy P(w/2)*dt plus drag work D(w/2)*ds, J"""
+        #drag is quadratic in speed: D(w/2)*ds = c*w**2*ds
+        c = drag_force(.5, self.coef_drag, self.rho, self.area_capsule)
+        f, d1, d2 = c*w**2*ds, 2*c*w*ds, 2*c*ds
+
+        if not callable(self.pwr_onboard):
+            pwr = 1000.*self.pwr_onboard
+            return f + 2*pwr*ds/w, d1 - 2*pwr*ds/w**2, d2 + 4*pwr*ds/w**3
+
+        #power curve, differentiated numerically
+        def onboard(w):
+            return 2000.*self.pwr_onboard(w/2.)*ds/w
+        h = 1e-4*w
+        e0, ep, em = onboard(w), onboard(w+h), onboard(w-h)
+        return f + e0, d1 + (ep-em)/(2*h), d2 + (ep-2*e0+em)/h**2
+
+    def envelope(self, s, v_max):
+        """fastest profile under the speed and acceleration limits (forward
+        and backward passes), which is the minimum time solution"""
+        return acceleration_envelope(s, v_max, self.accel_max, self.decel_max)
+
+    def solve(self, route_length, speed_limit, warm_start=True, max_iter=500, gtol=1e-10):
+        """Optimizes the speed profile along a route of route_length (m).
+
+        speed_limit: m/s, a constant, a function of distance, or a tuple of
+            (distance, limit) arrays (e.g. a route speed envelope)
+
+        Returns an OrderedDict with the node distance, speed, acceleration,
+        cumulative time, the trip_time, energy (kW*h), success and message
+        """
+
+        n = self.n_nodes
+        s = np.linspace(0, route_length, n)
+        ds = np.diff(s)
+        v_max = np.maximum(self._speed_limit(speed_limit, s), self.speed_end)
+        v_max[0] = v_max[-1] = self.speed_end
+
+        #work in x = v**2/(2*e_ref), so everything is order one. the end 
+        #points are fixed, only the interior nodes are optimized
+        v_ref = np.max(v_max)
+        e_ref = .5*v_ref**2
+        x_end = .5*self.speed_end**2/e_ref
+        x_lo = np.full(n-2, x_end)
+        x_hi = .5*v_max[1:-1]**2/e_ref
+        bounds = Bounds(x_lo, x_hi)
+
+        #-decel_max <= (x_i+1 - x_i)*e_ref/ds <= accel_max
+        D = sparse.diags([-1./ds, 1./ds], [0, 1], shape=(n-1, n), format='csc')*e_ref
+        D_in = D[:, 1:-1]
+        offset = D[:, 0].toarray().ravel()*x_end + D[:, -1].toarray().ravel()*x_end
+        accel = LinearConstraint(D_in, -self.decel_max-offset, self.accel_max-offset)
+
+        def full(y):
+            return np.concatenate(([x_end], y, [x_end]))
+
+        def speeds(x):
+            return np.sqrt(2*e_ref*np.maximum(x, 1e-12))
+
+        def obj_parts(y, terms):
+            """value, gradient and Hessian in y of sum_k f(v_k + v_k+1)"""
+            v = speeds(full(y))
+            w = v[:-1]+v[1:]
+            f, d1, d2 = terms(w, ds)
+            dv_dx = e_ref/v
+            d2v_dx2 = -e_ref**2/v**3
+
+            dfdv = np.zeros(n)
+            dfdv[:-1] += d1
+            dfdv[1:] += d1
+            grad = dfdv*dv_dx
+
+            H_v = _segment_sum_hessian(d2, n)
+            J = sparse.diags(dv_dx)
+            hess = J.dot(H_v).dot(J) + sparse.diags(dfdv*d2v_dx2)
+            return np.sum(f), grad[1:-1], hess.tocsr()[1:-1, 1:-1]
+
+        time_ref = route_length/v_ref
+        terms = self._time_terms if self.objective == 'time' else self._energy_terms
+        scale = [time_ref if self.objective == 'time' else None]
+
+        def objective(x):
+            f, g, h = obj_parts(x, terms)
+            if scale[0] is None:
+                scale[0] = max(abs(f), 1.)
+            return f/scale[0], g/scale[0]
+
+        def hessian(x):
+            return obj_parts(x, terms)[2]/scale[0]
+
+        constraints = [accel]
+        if self.objective == 'energy':
+            trip = NonlinearConstraint(
+                lambda x: np.array([obj_parts(x, self._time_terms)[0]/time_ref]),
+                -np.inf, self.time_max/time_ref,
+                jac=lambda x: sparse.csr_matrix(obj_parts(x, self._time_terms)[1]/time_ref),
+                hess=lambda x, lam: obj_parts(x, self._time_terms)[2]*(lam[0]/time_ref))
+            constraints.append(trip)
+
+        #start from the last solution when there is one, else from just inside 
+        #the fastest possible profile
+        if warm_start and self._last is not None:
+            last_s, last_v = self._last
+            v0 = np.interp(s/route_length, last_s/last_s[-1], last_v)
+        else:
+            v0 = self.envelope(s, v_max)
+        x0 = np.clip(.5*v0[1:-1]**2/e_ref, x_lo, x_hi)
+        x0 = x_lo + .98*(x0-x_lo)
+
+        #the start is close to the solution, so the barrier starts small
+        result = minimize(objective, x0, jac=True, hess=hessian, method='trust-constr',
+                          bounds=bounds, constraints=constraints,
+                          options={'maxiter': max_iter, 'gtol': gtol, 'xtol': 1e-12,
+                                   'initial_barrier_parameter': 1e-4, 'initial_constr_penalty': 1.})
+
+        x = full(result.x)
+        v = speeds(x)
+        w = v[:-1]+v[1:]
+        dt = 2*ds/w
+        time = np.concatenate(([0.], np.cumsum(dt)))
+        energy = np.sum(self._energy_terms(w, ds)[0])/3.6e6
+
+        self._last = (s, v)
+        return OrderedDict([
+            ('distance', s),
+            ('speed', v),
+            ('acceleration', np.concatenate((D.dot(x), [0.]))),
+            ('time', time),
+            ('trip_time', time[-1]),
+            ('energy', energy),
+            ('success', result.success),
+            ('message', result.message),
+            ('iterations', result.nit),
+        ])
+
+
+if __name__ == "__main__":
+    import time as timer
+
+    length = 563270.
+    #slower through a curvy stretch in the middle
+    limit = (np.array([0, 250e3, 260e3, 300e3, 310e3, length]), np.array([340, 340, 200, 200, 340, 340]))
+
+    opt = MissionOptimizer(n_nodes=2000)
+    start = timer.time()
+    res = opt.solve(length, limit)
+    print "min time, %d nodes: %.1f s trip, %.1f kW*h (%.2f s, %d iterations, %s)"%(
+        opt.n_nodes, res['trip_time'], res['energy'], timer.time()-start, res['iterations'], res['message'])
+
+    #a slightly longer route, warm started from the solution above
+    start = timer.time()
+    res = opt.solve(1.02*length, limit)
+    print "warm start: %.1f s trip (%.2f s, %d iterations)"%(res['trip_time'], timer.time()-start, res['iterations'])
+
+    #compressor power growing with speed, so going slower saves energy
+    opt_e = MissionOptimizer('energy', n_nodes=2000, time_max=1.1*res['trip_time'],
+                             pwr_onboard=lambda v: 420.*(v/308.)**3)
+    start = timer.time()
+    res_e = opt_e.solve(length, limit)
+    print "min energy within %.0f s: %.1f s trip, %.1f kW*h (%.2f s, %d iterations)"%(
+        opt_e.time_max, res_e['trip_time'], res_e['energy'], timer.time()-start, res_e['iterations'])
@@ -0,0 +1,193 @@
+"""
+    profiling.py -
+        Per component timing for an assembly tree. When enabled, the execute
+        method of every component, assembly and driver is wrapped to count
+        calls and accumulate wall time, and every driver's workflow is wrapped
+        to count solver iterations. Nothing is wrapped while the profiler is
+        disabled, so it costs nothing then.
+
+        Times are inclusive: an assembly's time contains its children.
+
+        The wrapping goes through MethodHook, which chains onto whatever is
+        already there, so the profiler and a ResidualTrace can be attached
+        to the same driver, and removed, in any order.
+"""
+import json
+import time
+from collections import OrderedDict
+
+from openmdao.main.api import Component, Assembly, Driver
+
+
+def iter_components(container):
+    """all the components (including assemblies and drivers) below the container"""
+    for name in container.list_containers():
+        obj = getattr(container, name)
+        if isinstance(obj, Component):
+            yield obj
+            if isinstance(obj, Assembly):
+                for child in iter_components(obj):
+                    yield child
+
+
+class _Stat(object):
+    __slots__ = ('calls', 'time')
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.
+
+
+_MISSING = object()
+
+
+class MethodHook(object):
+    """Replaces the method `name` of one instance with func(call, *args,
+    **kwargs), where call is whatever the method was before (the class
+    method or another hook). remove() takes out just this hook, even if
+    others were added on top of it since"""
+
+    def __init__(self, obj, name, func):
+        self.obj = obj
+        self.name = name
+        self.func = func
+        self.saved = obj.__dict__.get(name, _MISSING)
+        self.call = getattr(obj, name)
+        obj.__dict__[name] = self
+
+    def __call__(self, *args, **kwargs):
+        return self.func(self.call, *args, **kwargs)
+
+    def remove(self):
+        current = self.obj.__dict__.get(self.name)
+        if current is self:
+            if self.saved is _MISSING:
+                del self.obj.__dict__[self.name]
+            else:
+                self.obj.__dict__[self.name] = self.saved
+            return
+
+        #hooked over since, splice this one out of the chain
+        hook = current
+        while isinstance(hook, MethodHook) and hook.call is not self:
+            hook = hook.call
+        if isinstance(hook, MethodHook):
+            hook.call = self.call
+            hook.saved = self.saved
+
+
+def _timed(stat):
+    def timed(call, *args, **kwargs):
+        start = time.time()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            stat.calls += 1
+            stat.time += time.time()-start
+    return timed
+
+
+class ExecutionProfiler(object):
+    """Collects execute counts and times for every component under `top`.
+
+    usage:
+        prof = ExecutionProfiler(hl)
+        with prof:
+            hl.run()
+        print prof.report()
+    """
+
+    def __init__(self, top):
+        self.top = top
+        self.stats = OrderedDict()
+        self.iterations = OrderedDict() #driver pathname -> workflow runs
+        self.parents = {} #component pathname -> pathname of the driver iterating it
+        self._patched = []
+
+    @property
+    def enabled(self):
+        return bool(self._patched)
+
+    def enable(self):
+        if self.enabled:
+            return
+
+        for comp in iter_components(self.top):
+            path = comp.get_pathname()
+            stat = self.stats.setdefault(path, _Stat())
+            self._patched.append(MethodHook(comp, 'execute', _timed(stat)))
+
+            if isinstance(comp, Driver):
+                iters = self.iterations.setdefault(path, _Stat())
+                self._patched.append(MethodHook(comp.workflow, 'run', _timed(iters)))
+                for child in comp.workflow.get_names():
+                    self.parents['.'.join(filter(None, (comp.parent.get_pathname(), child)))] = path
+
+    def disable(self):
+        for hook in reversed(self._patched):
+            hook.remove()
+        self._patched = []
+
+    def reset(self):
+        for stat in self.stats.values()+self.iterations.values():
+            stat.calls = 0
+            stat.time = 0.
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def results(self):
+        """OrderedDict of pathname -> dict of calls, time, time_per_call and
+        time_per_iter (per iteration of the driver that runs the component),
+        sorted by total time"""
+
+        res = OrderedDict()
+        for path, stat in sorted(self.stats.iteritems(), key=lambda item: -item[1].time):
+            if not stat.calls:
+                continue
+            entry = OrderedDict([
+                ('calls', stat.calls),
+                ('time', stat.time),
+                ('time_per_call', stat.time/stat.calls),
+            ])
+            parent = self.parents.get(path)
+            iters = self.iterations.get(parent)
+            if iters is not None and iters.calls:
+                entry['driver'] = parent
+                entry['time_per_iter'] = stat.time/iters.calls
+            if path in self.iterations:
+                entry['iterations'] = self.iterations[path].calls
+            res[path] = entry
+        return res
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.results(), **kwargs)
+
+    def report(self):
+        lines = ['%-40s %8s %11s %11s %11s %6s'%('component', 'calls', 'total (s)',
+                                                 'call (ms)', 'iter (ms)', 'iters')]
+        lines.append('-'*len(lines[0]))
+        for path, entry in self.results().iteritems():
+            per_iter = entry.get('time_per_iter')
+            lines.append('%-40s %8d %11.4f %11.4f %11s %6s'%(
+                path, entry['calls'], entry['time'], 1e3*entry['time_per_call'],
+                '' if per_iter is None else '%.4f'%(1e3*per_iter), entry.get('iterations', '')))
+        return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    from openmdao.main.api import set_as_top
+    from hyperloop.hyperloop_sim import HyperloopPod
+
+    hl = set_as_top(HyperloopPod())
+    hl.Mach_pod_max = .9
+    hl.Mach_c1_in = .75
+    hl.c1_PR_des = 13
+
+    with ExecutionProfiler(hl) as prof:
+        hl.run()
+    print prof.report()
@@ -0,0 +1,126 @@
+"""
+    residual_trace.py -
+        Level gated trace of solver convergence. Once attached to a solver,
+        the parameter and residual vectors are captured after every iteration
+        into a fixed size ring buffer, which can be exported for convergence
+        analysis. At level OFF nothing is attached, so it costs nothing.
+"""
+import numpy as np
+
+from hyperloop.profiling import MethodHook
+
+
+OFF = 0
+ITERATION = 1 #capture every iteration into the buffer
+DEBUG = 2 #also log every iteration through the solver's logger
+
+
+class ResidualTrace(object):
+    """Captures the parameters and equality constraint residuals of a solver
+
+    driver: the solver to trace (e.g. HyperloopPod.solver)
+    level: OFF, ITERATION or DEBUG
+    capacity: number of iterations kept, older ones are overwritten
+    """
+
+    def __init__(self, driver, level=ITERATION, capacity=10000):
+        self.driver = driver
+        self.level = level
+        self.capacity = capacity
+
+        self.param_names = list(driver.get_parameters().keys())
+        self.residual_names = list(driver.get_eq_constraints().keys())
+        self._params = np.zeros((capacity, len(self.param_names)))
+        self._residuals = np.zeros((capacity, len(self.residual_names)))
+        self._runs = np.zeros(capacity, dtype=int)
+        self._n = 0 #total number of captured iterations
+        self._n_runs = 0 #number of solver executions seen
+        self._hooks = []
+
+        if level > OFF:
+            self.attach()
+
+    def attach(self):
+        if self._hooks or self.level <= OFF:
+            return
+
+        def traced_run(run, *args, **kwargs):
+            result = run(*args, **kwargs)
+            self._capture()
+            return result
+
+        def traced_execute(execute, *args, **kwargs):
+            self._n_runs += 1
+            return execute(*args, **kwargs)
+
+        #chained onto any other wrappers, e.g. an ExecutionProfiler's
+        self._hooks = [MethodHook(self.driver.workflow, 'run', traced_run),
+                       MethodHook(self.driver, 'execute', traced_execute)]
+
+    def detach(self):
+        for hook in reversed(self._hooks):
+            hook.remove()
+        self._hooks = []
+
+    def _capture(self):
+        i = self._n % self.capacity
+        self._params[i] = self.driver.get_param_values()
+        self._residuals[i] = self.driver.eval_eq_constraints()
+        self._runs[i] = self._n_runs
+        self._n += 1
+
+        if self.level >= DEBUG:
+            self.driver._logger.debug('run %d, iteration %d: residuals %s', self._n_runs, self._n,
+                                      ', '.join('%s=%g'%item for item in zip(self.residual_names, self._residuals[i])))
+
+    def clear(self):
+        self._n = 0
+        self._n_runs = 0
+
+    def __len__(self):
+        return min(self._n, self.capacity)
+
+    def _ordered(self, data):
+        if self._n <= self.capacity:
+            return data[:self._n].copy()
+        i = self._n % self.capacity
+        return np.concatenate((data[i:], data[:i]))
+
+    @property
+    def params(self):
+        """parameter values, one row per iteration, oldest first"""
+        return self._ordered(self._params)
+
+    @property
+    def residuals(self):
+        """residual values, one row per iteration, oldest first"""
+        return self._ordered(self._residuals)
+
+    @property
+    def runs(self):
+        """which solver execution each row belongs to (counted from 1)"""
+        return self._ordered(self._runs)
+
+    def residual_norms(self):
+        return np.sqrt(np.sum(self.residuals**2, axis=1))
+
+    def save(self, filename):
+        """writes the trace to a .npz file"""
+        np.savez(filename, param_names=self.param_names, residual_names=self.residual_names,
+                 params=self.params, residuals=self.residuals, runs=self.runs)
+
+
+if __name__ == "__main__":
+    from openmdao.main.api import set_as_top
+    from hyperloop.hyperloop_sim import HyperloopPod
+
+    hl = set_as_top(HyperloopPod())
+    hl.Mach_pod_max = .9
+    hl.Mach_c1_in = .75
+    hl.c1_PR_des = 13
+
+    trace = ResidualTrace(hl.solver)
+    hl.run()
+
+    for i, norm in enumerate(trace.residual_norms()):
+        print "%3d %12.6g"%(i, norm)
@@ -0,0 +1,153 @@
+"""
+    results_db.py -
+        Indexed SQLite store for sweep results. Every case is one row, with
+        one column per variable (design inputs, outputs and the converged
+        flag). Queries return NumPy arrays, so plotting scripts can read
+        stored sweeps instead of re-running them.
+"""
+import sqlite3
+from collections import OrderedDict
+
+import numpy as np
+
+
+#design inputs that get an index, since they are what queries filter on
+DESIGN_KEYS = ('Mach_pod_max', 'Mach_c1_in', 'c1_PR_des', 'Mach_bypass', 'Ps_tube',
+               'solar_heating_factor', 'tube_length', 'coef_drag')
+
+#tolerance for equality matches on floating point columns
+MATCH_TOL = 1e-9
+
+
+def _quote(name):
+    return '"%s"'%name.replace('"', '""')
+
+
+class SweepDatabase(object):
+    """Sweep results stored in a single SQLite file
+
+    filename: the database file, created if it doesn't exist
+    keys: columns to index
+    """
+
+    def __init__(self, filename='hyperloop_sweeps.db', keys=DESIGN_KEYS):
+        self.filename = filename
+        self.keys = keys
+        self._conn = sqlite3.connect(filename)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS cases (id INTEGER PRIMARY KEY, converged INTEGER)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_converged ON cases (converged)')
+        self._conn.commit()
+        self._columns = self._read_columns()
+
+    def _read_columns(self):
+        return set(row[1] for row in self._conn.execute('PRAGMA table_info(cases)'))
+
+    def _add_column(self, name):
+        self._conn.execute('ALTER TABLE cases ADD COLUMN %s REAL'%_quote(name))
+        if name in self.keys:
+            self._conn.execute('CREATE INDEX IF NOT EXISTS %s ON cases (%s)'%(
+                _quote('idx_'+name), _quote(name)))
+        self._columns.add(name)
+
+    def columns(self):
+        return sorted(self._columns - set(('id',)))
+
+    def store(self, results):
+        """Adds cases to the database. `results` is a list of dicts, such as
+        the ones returned by sweep.run_sweep. Non numeric values are skipped"""
+
+        rows = []
+        for result in results:
+            row = OrderedDict()
+            for name, value in result.iteritems():
+                if isinstance(value, (bool, int, long, float, np.number)):
+                    row[name] = float(value)
+            row.setdefault('converged', 1.)
+            rows.append(row)
+
+        with self._conn:
+            for name in set(name for row in rows for name in row):
+                if name not in self._columns:
+                    self._add_column(name)
+
+            #group rows with the same columns so they go in with one executemany
+            groups = OrderedDict()
+            for row in rows:
+                groups.setdefault(tuple(row.keys()), []).append(row.values())
+            for names, values in groups.iteritems():
+                sql = 'INSERT INTO cases (%s) VALUES (%s)'%(
+                    ', '.join(_quote(name) for name in names), ', '.join('?'*len(names)))
+                self._conn.executemany(sql, values)
+
+    def _where(self, where, converged):
+        clauses = []
+        args = []
+        if converged is not None:
+            clauses.append('converged = ?')
+            args.append(int(converged))
+
+        for name, value in (where or {}).iteritems():
+            if name not in self._columns:
+                raise KeyError("no column named '%s' in %s"%(name, self.filename))
+            if isinstance(value, (tuple, list)): #(low, high) range, None for open ended
+                low, high = value
+                if low is not None:
+                    clauses.append('%s >= ?'%_quote(name))
+                    args.append(low)
+                if high is not None:
+                    clauses.append('%s <= ?'%_quote(name))
+                    args.append(high)
+            else:
+                clauses.append('%s BETWEEN ? AND ?'%_quote(name))
+                args.extend((value-MATCH_TOL, value+MATCH_TOL))
+
+        if not clauses:
+            return '', args
+        return ' WHERE '+' AND '.join(clauses), args
+
+    def query(self, columns, where=None, converged=True, order_by=None):
+        """Returns an OrderedDict of NumPy arrays, one per requested column.
+
+        where: dict of column name to either a value (equality) or a
+            (low, high) range, e.g. {'Mach_c1_in': .65, 'Mach_pod_max': (.8, .9)}
+        converged: only return converged cases (True), failed ones (False)
+            or everything (None)
+        order_by: column to sort the results on
+
+        Missing values come back as nan.
+        """
+
+        for name in columns:
+            if name not in self._columns:
+                raise KeyError("no column named '%s' in %s"%(name, self.filename))
+
+        clause, args = self._where(where, converged)
+        sql = 'SELECT %s FROM cases%s'%(', '.join(_quote(name) for name in columns), clause)
+        if order_by is not None:
+            sql += ' ORDER BY %s'%_quote(order_by)
+
+        data = np.array(self._conn.execute(sql, args).fetchall(), dtype=float)
+        data = data.reshape(-1, len(columns))
+        return OrderedDict((name, data[:, i]) for i, name in enumerate(columns))
+
+    def count(self, where=None, converged=True):
+        clause, args = self._where(where, converged)
+        return self._conn.execute('SELECT COUNT(*) FROM cases%s'%clause, args).fetchone()[0]
+
+    def distinct(self, column, where=None, converged=True):
+        """sorted unique values of a column"""
+        clause, args = self._where(where, converged)
+        sql = 'SELECT DISTINCT %s FROM cases%s ORDER BY 1'%(_quote(column), clause)
+        return np.array([row[0] for row in self._conn.execute(sql, args)], dtype=float)
+
+    def close(self):
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    db = SweepDatabase(*sys.argv[1:2])
+    print "%d converged cases"%db.count()
+    for name in db.columns():
+        print "   ", name
@@ -0,0 +1,199 @@
+"""
+    route.py -
+        Maximum speed envelope along a route centerline. The centerline is a
+        lat/lon/elevation polyline, memory-mapped from disk and processed in
+        fixed size chunks, so memory use doesn't grow with the number of
+        points. The horizontal and vertical curvature at every point give
+        speed limits from the lateral and vertical passenger acceleration
+        limits. These are collected on a regular distance grid, capped at
+        the pod's top speed, and limited by the longitudinal acceleration
+        and braking of the pod (forward and backward passes).
+"""
+import os
+from math import pi
+from collections import OrderedDict
+
+import numpy as np
+
+
+G = 9.81 #m/s**2
+R_EARTH = 6371000. #m, mean radius
+
+#one centerline point: degrees, degrees, m
+ROUTE_DTYPE = np.dtype([('lat', '<f8'), ('lon', '<f8'), ('elev', '<f8')])
+
+
+def load_route(filename):
+    """Memory maps a route centerline. A .npy file holds either a structured
+    array of ROUTE_DTYPE or an (n, 3) float array of lat, lon, elev; any other
+    file is read as raw ROUTE_DTYPE records. Nothing is read until it is used"""
+
+    if os.path.splitext(filename)[1] == '.npy':
+        route = np.load(filename, mmap_mode='r')
+    else:
+        route = np.memmap(filename, dtype=ROUTE_DTYPE, mode='r')
+
+    if route.dtype.names is None:
+        if route.ndim != 2 or route.shape[1] != 3:
+            raise ValueError("route '%s' must be (n, 3) lat, lon, elev, not %s"%(filename, route.shape))
+        return route
+    return route.view(np.float64).reshape(-1, 3)
+
+
+def save_route(filename, lat, lon, elev):
+    """writes a centerline as raw ROUTE_DTYPE records, for load_route"""
+    route = np.empty(len(lat), dtype=ROUTE_DTYPE)
+    route['lat'], route['lon'], route['elev'] = lat, lon, elev
+    route.tofile(filename)
+
+
+def acceleration_envelope(distance, speed_limit, accel_max=.5*G, decel_max=.5*G):
+    """Fastest speed profile under speed_limit that can be reached with
+    accel_max and stopped from with decel_max (m/s**2). This is the
+    sequential forward/backward pass e_i = min(e_i, e_i-1 + a*ds) on the
+    kinetic energy e = v**2/2, written as a running minimum"""
+
+    s = np.asarray(distance, dtype=float)
+    e = .5*np.asarray(speed_limit, dtype=float)**2
+    e = accel_max*s + np.minimum.accumulate(e - accel_max*s)
+    e = -decel_max*s + np.minimum.accumulate((e + decel_max*s)[::-1])[::-1]
+    return np.sqrt(2*np.maximum(e, 0.))
+
+
+def _curvature_limits(points, accel_lateral, accel_vertical):
+    """segment lengths of a chunk of points, and the curvature speed limit at
+    each interior point"""
+
+    lat = np.radians(points[:, 0])
+    lon = np.radians(points[:, 1])
+    elev = points[:, 2]
+
+    #local flat earth steps, fine for segments much shorter than the earth
+    dlon = (np.diff(lon) + pi) % (2*pi) - pi
+    dx = R_EARTH*np.cos(.5*(lat[1:]+lat[:-1]))*dlon
+    dy = R_EARTH*np.diff(lat)
+    ds = np.hypot(dx, dy)
+
+    ds_mid = np.maximum(.5*(ds[1:]+ds[:-1]), 1e-9)
+    turn = (np.diff(np.arctan2(dx, dy)) + pi) % (2*pi) - pi
+    kappa_h = np.abs(turn)/ds_mid
+    grade = np.diff(elev)/np.maximum(ds, 1e-9)
+    kappa_v = np.abs(np.diff(grade))/ds_mid
+
+    with np.errstate(divide='ignore'):
+        limit = np.minimum(np.sqrt(accel_lateral/kappa_h), np.sqrt(accel_vertical/kappa_v))
+    return ds, limit
+
+
+def _fill_empty(bins):
+    """nan bins get the lower of the nearest non-nan bins on either side
+    (inf if there are none)"""
+
+    have = ~np.isnan(bins)
+    if have.all():
+        return bins
+    idx = np.arange(len(bins))
+    before = np.maximum.accumulate(np.where(have, idx, -1))
+    after = np.minimum.accumulate(np.where(have, idx, len(bins))[::-1])[::-1]
+    padded = np.concatenate((bins, [np.inf])) #index -1 and len(bins) both land on the inf
+    return np.where(have, bins, np.fmin(padded[before], padded[after]))
+
+
+def speed_envelope(route, speed_max=308., accel_lateral=.5*G, accel_vertical=.2*G, accel_max=.5*G,
+                   decel_max=.5*G, resolution=100., chunk_size=1000000):
+    """Maximum speed along a route.
+
+    route: (n, 3) lat (deg), lon (deg), elevation (m) array, typically from
+        load_route. It is read chunk_size points at a time.
+    speed_max: top speed of the pod (e.g. CompressionSystem.speed_max), m/s
+    accel_lateral, accel_vertical: passenger acceleration limits in curves
+        and over crests and dips, m/s**2
+    accel_max, decel_max: longitudinal acceleration and braking, m/s**2
+    resolution: spacing of the returned envelope, m. Each grid point gets
+        the lowest curvature limit of the route points around it. Bins with
+        no route points in them (a route sparser than the grid) take the
+        lower limit of the nearest populated bins on either side.
+
+    Returns an OrderedDict of arrays on the grid: distance (m), speed_limit
+    (curvature and speed_max only) and speed (the envelope, starting and
+    ending at rest), plus the route length
+    """
+
+    n = len(route)
+    if n < 2:
+        raise ValueError("a route needs at least 2 points, not %d"%n)
+
+    #lowest limit in each resolution wide bin, grown as the route is read.
+    #nan marks a bin no point has landed in yet
+    bins = np.full(1024, np.nan)
+    length = 0.
+    for start in xrange(0, n-1, chunk_size):
+        #one point of overlap on each side, for the curvature at the chunk ends
+        lo = max(start-1, 0)
+        points = np.array(route[lo:min(start+chunk_size+1, n)], dtype=float)
+        ds, limit = _curvature_limits(points, accel_lateral, accel_vertical)
+
+        #distance of every point in this chunk, and the segments it owns
+        first = start-lo
+        s_points = length + np.concatenate(([0.], np.cumsum(ds[first:])))
+        length = s_points[-1] if start+chunk_size >= n-1 else s_points[chunk_size]
+
+        #points this chunk owns, interior to the whole route (the ends are stations)
+        idx = np.arange(start, start+len(s_points))
+        owned = (idx > 0) & (idx < n-1) & (idx < start+chunk_size)
+        s_int = s_points[owned]
+        lim_int = limit[idx[owned]-lo-1]
+
+        k = (s_int/resolution).astype(int)
+        if len(k) and k.max() >= len(bins):
+            bins = np.concatenate((bins, np.full(max(k.max()+1, 2*len(bins))-len(bins), np.nan)))
+        np.fmin.at(bins, k, lim_int)
+
+    n_bins = max(int(np.ceil(length/resolution)), 1)
+    bins = np.concatenate((bins, np.full(max(n_bins-len(bins), 0), np.nan)))[:n_bins]
+    bins = _fill_empty(bins)
+    distance = np.minimum(np.arange(len(bins)+1)*resolution, length)
+
+    #a grid point is limited by the bins on both sides of it
+    limit = np.full(len(distance), np.inf)
+    limit[:-1] = bins
+    limit[1:] = np.minimum(limit[1:], bins)
+    limit = np.minimum(limit, speed_max)
+
+    stop = limit.copy()
+    stop[0] = stop[-1] = 0.
+    speed = acceleration_envelope(distance, stop, accel_max, decel_max)
+
+    return OrderedDict([
+        ('distance', distance),
+        ('speed_limit', limit),
+        ('speed', speed),
+        ('length', length),
+    ])
+
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    #a 3000 km route at 1 m spacing with gentle curves and hills, written to disk
+    n = 3000001
+    s = np.linspace(0, 3000e3, n)
+    heading = .3*np.sin(s/40e3) + .4*np.sin(s/4e3)
+    dx, dy = np.sin(heading)*np.gradient(s), np.cos(heading)*np.gradient(s)
+    lat = 35. + np.degrees(np.cumsum(dy)/R_EARTH)
+    lon = -120. + np.degrees(np.cumsum(dx)/(R_EARTH*np.cos(np.radians(lat))))
+    elev = 200. + 50.*np.sin(s/5e3)
+
+    filename = os.path.join(tempfile.mkdtemp(), 'route.bin')
+    save_route(filename, lat, lon, elev)
+    del s, heading, dx, dy, lat, lon, elev
+
+    start = time.time()
+    env = speed_envelope(load_route(filename), speed_max=308., chunk_size=200000)
+    print "%d points in %.2f s: %.1f km, %d envelope points"%(
+        n, time.time()-start, env['length']/1000., len(env['distance']))
+
+    v = env['speed']
+    trip = np.sum(2*np.diff(env['distance'])/(v[1:]+v[:-1]))
+    print "slowest curve limit %.1f m/s, fastest possible trip %.1f min"%(env['speed_limit'].min(), trip/60.)
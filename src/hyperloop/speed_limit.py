@@ -1,6 +1,15 @@
+"""
+    speed_limit.py - 
+        Tube and pod radius vs max pod Mach for several compressor designs. 
+        The plotted points are read from the sweep results database. The 
+        arrays below are the results of earlier sweeps, and are loaded into 
+        the database the first time it is used. 
+"""
 import numpy as np
 import pylab as p
 
+from hyperloop.results_db import SweepDatabase
+
 
 #0:mach, 1:capsule_radius, 2:tube_radius
 data = np.array([
@@ -16,8 +25,8 @@ data = np.array([
 [156.81475861600063, 163.0669923880096, 169.39639140732967, 176.17567073947652, 183.48993559762917, 191.40688843767666, 200.00123550617204, 209.60446822904663, 220.0237203915824, 231.50658773165995, 244.26303992772819, 258.63028289363103, 274.82679261741077, 292.93901871709897, 313.99136072483941, 338.3422083202567, 366.45335115502922, 400.29991217359503, 441.9186119743261, 491.97554081777361, 557.62439921482735, 646.7153090091789, 776.45804070888335, 992.88105221017327],
 ])
 
-#0:mach, 1:capsule_radius, 2:tube_radius ---- Mach_c1_in = .65, c1_PR_des 15
-data2 = np.array([
+#0:mach, 2:tube_radius ---- Mach_c1_in = .65, c1_PR_des 15
+data9 = np.array([
 	[0.69999999999999996, 0.70999999999999996, 0.71999999999999997, 0.72999999999999998, 0.73999999999999999, 0.75, 0.76000000000000001, 0.77000000000000002, 0.78000000000000003, 0.79000000000000004, 0.80000000000000004, 0.81000000000000005, 0.82000000000000006, 0.83000000000000007, 0.84000000000000008, 0.85000000000000009, 0.8600000000000001, 0.87000000000000011, 0.88000000000000012, 0.89000000000000012, 0.90000000000000013, 0.91000000000000014, 0.92000000000000015, 0.93000000000000016, 0.94000000000000017],
 	[155.93175216175968, 161.90775815558786, 168.16135931735269, 174.86816149320694, 182.09656156505773, 189.9066763043113, 198.63355972499093, 208.050898522587, 218.37651279956833, 229.77299314219405, 242.47206935679745, 256.81619737359483, 272.75628900411186, 290.56823116367968, 311.31544125085532, 335.48503571636502, 364.03768554760808, 397.33671923676832, 438.253060800215, 488.7354855968785, 553.98661765922532, 641.9473572566377, 770.39183611247699, 985.31963743906749, 1456.0149446680291],
 	])
@@ -71,18 +80,65 @@ data8 = np.array([
 [76.383930307437893, 76.383714325343874, 76.383496014082866, 76.38325462489091, 76.38299149379759, 76.382698877616349, 76.382578432312556, 76.382299136681098, 76.381937341629154, 76.38164088246684, 76.381428076206859, 76.381096737480689, 76.380887221275259, 76.380661239416739, 76.380392869077056, 76.380016289409554, 76.379704442526503, 76.379369492112701, 76.379054315469588, 76.378758441190982, 76.378431369120705, 76.378091356136764, 76.377729977464426, 76.377365160011067, 76.377129723793402],
 [-169.00026986905911, -175.30664848493868, -182.10694166195665, -189.4280559404375, -197.33586462797501, -205.90057339373914, -215.43233885250876, -225.67057375287627, -236.82954496582198, -249.19477555182917, -263.0470428325238, -278.40056650997246, -295.89396428628015, -315.63824895202657, -338.03823476833298, -364.06938357527105, -394.54967896708246, -430.81201684238351, -474.89187256554533, -529.89735797389187, -600.73317759210192, -696.59535352143939, -836.31403010916938, -1068.0631819812488, -1581.2019140503339],
 ])
-p.tick_params(axis='both', which='major', labelsize=15)
-p.xlabel('Max Pod Mach', fontsize=18)
-p.ylabel('Radius (cm)', fontsize=18)
-p.title('Tube and Pod Radius vs Max Pod Mach', fontsize=20)
-p.plot(data8[0],-1*data8[2], label="Tube (c1MN = .55)", lw=3) #'--',
-p.plot(data[0],1*data[2], label="Tube (c1MN = .65)", lw=3)
-p.plot(data6[0],1*data6[2], label="Tube (c1MN = .75)", lw=3) #':',
-p.plot(data[0],1*data[1], label="Pod   (c1MN = .55,.65,.75)", lw=3)
-p.xlim([0.79,0.92])
-p.ylim([0,1000])
-p.legend(loc="best")
-    
-p.gcf().set_size_inches(11,5.5)
-#p.gcf().savefig('test2png.png',dpi=130)
-p.show()
\ No newline at end of file
+
+#(Mach_c1_in, c1_PR_des, data) for the sweeps above
+LEGACY_SWEEPS = [
+    (.55, 13, data8), 
+    (.61, 13, data7), 
+    (.65, 13, data), 
+    (.65, 15, data9), 
+    (.65, 19, data4), 
+    (.67, 13, data2), 
+    (.7, 13, data5), 
+    (.7, 16, data3), 
+    (.75, 13, data6), 
+]
+
+
+def seed_database(db): 
+    """stores the legacy sweeps that aren't in the database yet"""
+
+    for Mach_c1_in, c1_PR_des, sweep in LEGACY_SWEEPS: 
+        design = {'Mach_c1_in': Mach_c1_in, 'c1_PR_des': c1_PR_des}
+        if 'Mach_c1_in' in db.columns() and db.count(design): 
+            continue
+
+        results = []
+        for i, mach in enumerate(sweep[0]): 
+            res = {'Mach_pod_max': mach, 'flow_limit.radius_tube': abs(sweep[-1][i])} #data8 was stored negative
+            res.update(design)
+            if len(sweep) == 3: #data9 has no capsule radius
+                res['pod.radius_inlet_back_outer'] = sweep[1][i]
+            results.append(res)
+        db.store(results)
+
+
+def radius_vs_mach(db, Mach_c1_in, c1_PR_des=13, mach_range=(None, None)): 
+    """mach, capsule radius and tube radius arrays for one compressor design"""
+    res = db.query(['Mach_pod_max', 'pod.radius_inlet_back_outer', 'flow_limit.radius_tube'], 
+        {'Mach_c1_in': Mach_c1_in, 'c1_PR_des': c1_PR_des, 'Mach_pod_max': mach_range}, 
+        order_by='Mach_pod_max')
+    return res.values()
+
+
+if __name__ == "__main__": 
+
+    db = SweepDatabase()
+    seed_database(db)
+
+    p.tick_params(axis='both', which='major', labelsize=15)
+    p.xlabel('Max Pod Mach', fontsize=18)
+    p.ylabel('Radius (cm)', fontsize=18)
+    p.title('Tube and Pod Radius vs Max Pod Mach', fontsize=20)
+    for c1MN in (.55, .65, .75): 
+        mach, capsule_r, tube_r = radius_vs_mach(db, c1MN)
+        p.plot(mach, tube_r, label="Tube (c1MN = %.2f)"%c1MN, lw=3)
+    mach, capsule_r, tube_r = radius_vs_mach(db, .65)
+    p.plot(mach, capsule_r, label="Pod   (c1MN = .55,.65,.75)", lw=3)
+    p.xlim([0.79,0.92])
+    p.ylim([0,1000])
+    p.legend(loc="best")
+        
+    p.gcf().set_size_inches(11,5.5)
+    #p.gcf().savefig('test2png.png',dpi=130)
+    p.show()
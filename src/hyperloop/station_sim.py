@@ -0,0 +1,180 @@
+"""
+    station_sim.py -
+        Passenger throughput of a two station line. The pods shuttle between
+        the stations, and at each one they go through an airlock to come
+        back up to pressure, unload, board whoever is waiting, pump back
+        down in the airlock and wait for a departure slot. Passengers arrive
+        as Poisson streams at 1 second resolution. The pods' station events
+        run through a priority queue, and the airlocks and departure slots
+        are shared resources. Reports queue lengths, passenger waits, pod
+        utilization and the throughput the system achieves.
+"""
+import heapq
+from collections import OrderedDict
+
+import numpy as np
+
+
+DAY = 86400
+
+
+def poisson_arrivals(rate, duration, seed=None):
+    """Passengers arriving in each second of duration (s), for a rate in
+    passengers per hour that is a constant or a function of the hour of the
+    day (vectorized over an array of hours)"""
+
+    hours = (np.arange(int(duration))/3600.) % 24
+    lam = (rate(hours) if callable(rate) else rate*np.ones(len(hours)))/3600.
+    return np.random.RandomState(seed).poisson(lam)
+
+
+class StationSimulator(object):
+    """A line of two stations served by a fleet of pods
+
+    num_pods: pods in the fleet, split evenly between the two stations at
+        the start
+    n_rows, seats_per_row: seating of a PassengerCapsule
+    time_mission: travel time between the stations (Mission.time), s
+    n_airlocks: airlocks at each station; a pod holds one while it comes
+        up to pressure and while it pumps back down
+    time_airlock: time to pressurize or pump down an airlock, s
+    time_unload, time_board: dwell for unloading, and the minimum boarding
+        dwell, s. A pod that isn't full waits up to time_board_max for more
+        passengers
+    headway_min: minimum time between departures from a station, s
+    """
+
+    def __init__(self, num_pods=34, n_rows=14, seats_per_row=2, time_mission=2132., n_airlocks=2,
+                 time_airlock=60., time_unload=60., time_board=60., time_board_max=300.,
+                 headway_min=30.):
+        self.num_pods = num_pods
+        self.seats = n_rows*seats_per_row
+        self.time_mission = time_mission
+        self.n_airlocks = n_airlocks
+        self.time_airlock = time_airlock
+        self.time_unload = time_unload
+        self.time_board = time_board
+        self.time_board_max = time_board_max
+        self.headway_min = headway_min
+
+    def run(self, arrivals):
+        """Simulates the line for as many seconds as there are in the
+        arrivals, a pair of per second passenger count arrays (one per
+        station, e.g. from poisson_arrivals).
+
+        Returns an OrderedDict with, for each station, the queue length at
+        every second, and summary statistics of the queues, waits, pod
+        utilization and throughput
+        """
+
+        arrivals = [np.asarray(a) for a in arrivals]
+        duration = len(arrivals[0])
+        #passengers arrived by the end of each second
+        arrived = [np.cumsum(a) for a in arrivals]
+        boarded = [0, 0]
+        boardings = [np.zeros(duration+1, dtype=int) for i in (0, 1)]
+
+        airlocks = [[0.]*self.n_airlocks for i in (0, 1)]
+        next_slot = [0., 0.]
+
+        def airlock(station, t):
+            """end of the next airlock cycle that can start after t"""
+            free = heapq.heappop(airlocks[station])
+            start = max(t, free)
+            heapq.heappush(airlocks[station], start + self.time_airlock)
+            return start + self.time_airlock
+
+        def waiting(station, t):
+            #passengers who arrived in the seconds before t
+            k = min(int(t), duration)
+            return arrived[station][k-1] - boarded[station] if k > 0 else 0
+
+        #(time, pod, event, station), the pod number breaks ties
+        events = [(0., pod, 'board', pod % 2) for pod in xrange(self.num_pods)]
+        heapq.heapify(events)
+        trips = 0
+        passengers = 0
+        time_moving = 0.
+
+        while events:
+            t, pod, event, station = heapq.heappop(events)
+            if t >= duration:
+                continue
+
+            if event == 'arrive':
+                t = airlock(station, t) + self.time_unload
+                heapq.heappush(events, (t, pod, 'board', station))
+
+            elif event == 'board':
+                #wait for a full pod, between the minimum and maximum dwell
+                target = boarded[station] + self.seats
+                full = np.searchsorted(arrived[station], target)
+                t_ready = min(max(float(full+1), t + self.time_board), t + self.time_board_max)
+                n = min(self.seats, waiting(station, t_ready))
+                boarded[station] += n
+                boardings[station][min(int(t_ready), duration)] += n
+                passengers += n
+                heapq.heappush(events, (airlock(station, t_ready), pod, 'depart', station))
+
+            elif event == 'depart':
+                t = max(t, next_slot[station])
+                next_slot[station] = t + self.headway_min
+                trips += 1
+                time_moving += min(self.time_mission, duration-t)
+                heapq.heappush(events, (t + self.time_mission, pod, 'arrive', 1-station))
+
+        res = OrderedDict()
+        for station in (0, 1):
+            boarded_by = np.cumsum(boardings[station])
+            queue = arrived[station] - boarded_by[:duration]
+            res['queue_%d'%station] = queue
+            res['queue_mean_%d'%station] = queue.mean()
+            res['queue_max_%d'%station] = queue.max()
+            #FIFO, so passenger j boards in the second the j-th boarding happens.
+            #only the passengers served count, the ones still queueing at the end
+            #have no wait yet
+            j = np.arange(1, boarded[station]+1)
+            waits = np.searchsorted(boarded_by, j) - np.searchsorted(arrived[station], j)
+            res['wait_mean_%d'%station] = waits.mean() if len(j) else 0.
+            res['unserved_%d'%station] = int(arrived[station][-1] - boarded[station])
+
+        hours = duration/3600.
+        res['trips'] = trips
+        res['passengers'] = passengers
+        res['load_factor'] = passengers/float(max(trips*self.seats, 1))
+        res['pod_utilization'] = time_moving/(self.num_pods*float(duration))
+        res['throughput'] = passengers/hours
+
+        hourly = np.add.reduceat(boardings[0][:duration] + boardings[1][:duration],
+                                 np.arange(0, duration, 3600))
+        res['throughput_peak'] = hourly.max()
+        #every pod full on every trip. Departures from each station are limited
+        #by how fast the pods cycle, the departure slots or the airlocks (two
+        #cycles per departure)
+        cycle = 2*(self.time_mission + 2*self.time_airlock + self.time_unload + self.time_board)
+        departures = min(self.num_pods/cycle, 1./self.headway_min, self.n_airlocks/(2*self.time_airlock))
+        res['capacity'] = 2*self.seats*3600.*departures
+        return res
+
+
+if __name__ == "__main__":
+    import time
+
+    #a commuter day: peaks at 8am and 6pm on top of an all day base
+    def demand(hour):
+        return 300. + 600.*np.exp(-((hour-8.)/1.5)**2) + 600.*np.exp(-((hour-18.)/1.5)**2)
+
+    month = 30*DAY
+    arrivals = [poisson_arrivals(demand, month, seed=i) for i in (0, 1)]
+    sim = StationSimulator()
+
+    start = time.time()
+    res = sim.run(arrivals)
+    print "30 days at 1 s resolution in %.2f s: %d trips, %d passengers"%(
+        time.time()-start, res['trips'], res['passengers'])
+    print "throughput %.0f passengers/h (peak hour %d, capacity %.0f)"%(
+        res['throughput'], res['throughput_peak'], res['capacity'])
+    print "load factor %.2f, pod utilization %.2f"%(res['load_factor'], res['pod_utilization'])
+    for station in (0, 1):
+        print "station %d: mean queue %.1f, longest queue %d, mean wait %.1f min"%(station,
+            res['queue_mean_%d'%station], res['queue_max_%d'%station], res['wait_mean_%d'%station]/60.)
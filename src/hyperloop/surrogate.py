@@ -0,0 +1,198 @@
+"""
+    surrogate.py -
+        Kriging surrogate of the full HyperloopPod, trained from sweep results.
+        Predictions (with an error estimate) are vectorized over any number of
+        points. Points where the estimated error is too large can be sent back
+        to a true HyperloopPod solve.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+
+
+DESIGN_INPUTS = ('Mach_pod_max', 'Mach_c1_in', 'c1_PR_des', 'Mach_bypass', 'Ps_tube')
+DESIGN_OUTPUTS = ('flow_limit.radius_tube', 'compress.pwr_req', 'pod.energy', 'mission.time')
+
+
+class KrigingModel(object):
+    """Ordinary kriging with a gaussian correlation function. All outputs
+    share one set of correlation lengths, so a single factorization serves
+    every output.
+
+    nugget: added to the correlation matrix diagonal for conditioning
+    """
+
+    def __init__(self, nugget=1e-10):
+        self.nugget = nugget
+
+    def _corr(self, A, B):
+        d2 = np.zeros((A.shape[0], B.shape[0]))
+        for k, theta in enumerate(self.theta):
+            d2 += theta*(A[:, k, None]-B[None, :, k])**2
+        return np.exp(-d2)
+
+    def _factor(self, log_theta):
+        self.theta = 10**log_theta
+        n = self.X.shape[0]
+        R = self._corr(self.X, self.X) + self.nugget*n*np.eye(n)
+        chol = cho_factor(R, lower=True)
+
+        ones = np.ones(n)
+        Ri_1 = cho_solve(chol, ones)
+        mu = ones.dot(cho_solve(chol, self.Y))/ones.dot(Ri_1)
+        resid = self.Y - mu
+        alpha = cho_solve(chol, resid)
+        sigma2 = np.sum(resid*alpha, axis=0)/n
+        log_det = 2*np.sum(np.log(np.diag(chol[0])))
+        return chol, Ri_1, mu, alpha, sigma2, log_det
+
+    def _neg_log_likelihood(self, log_theta):
+        try:
+            _, _, _, _, sigma2, log_det = self._factor(log_theta)
+        except np.linalg.LinAlgError:
+            return 1e20
+        n, m = self.Y.shape
+        return .5*n*np.sum(np.log(np.maximum(sigma2, 1e-300))) + .5*m*log_det
+
+    def fit(self, X, Y, n_starts=3):
+        """X: (n, n_inputs) training inputs, Y: (n, n_outputs) training outputs.
+        The correlation lengths are picked by maximum likelihood"""
+
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        Y = np.asarray(Y, dtype=float).reshape(X.shape[0], -1)
+
+        #scale everything to order one
+        self.X_lo = X.min(axis=0)
+        self.X_range = X.max(axis=0) - self.X_lo
+        self.X_range[self.X_range == 0] = 1.
+        self.Y_mean = Y.mean(axis=0)
+        self.Y_std = Y.std(axis=0)
+        self.Y_std[self.Y_std == 0] = 1.
+        self.X = (X-self.X_lo)/self.X_range
+        self.Y = (Y-self.Y_mean)/self.Y_std
+
+        d = X.shape[1]
+        best = None
+        for start in np.linspace(-1, 1.5, n_starts):
+            res = minimize(self._neg_log_likelihood, start*np.ones(d), method='L-BFGS-B',
+                           bounds=[(-3, 3)]*d)
+            if best is None or res.fun < best.fun:
+                best = res
+
+        self.chol, self._Ri_1, self.mu, self.alpha, self.sigma2, _ = self._factor(best.x)
+        self._1_Ri_1 = np.sum(self._Ri_1)
+        return self
+
+    def predict(self, X):
+        """Returns (mean, std) arrays of shape (n_points, n_outputs). std is the
+        kriging estimate of the prediction error"""
+
+        X = (np.atleast_2d(np.asarray(X, dtype=float))-self.X_lo)/self.X_range
+        r = self._corr(X, self.X)
+        mean = self.mu + r.dot(self.alpha)
+
+        v = solve_triangular(self.chol[0], r.T, lower=True)
+        u = 1 - r.dot(self._Ri_1)
+        mse = 1 - np.sum(v**2, axis=0) + u**2/self._1_Ri_1
+        std = np.sqrt(np.maximum(mse, 0)[:, None]*self.sigma2)
+
+        return mean*self.Y_std + self.Y_mean, std*self.Y_std
+
+
+class PodSurrogate(object):
+    """Surrogate of HyperloopPod outputs as functions of the design inputs
+
+    inputs: names of the design variables the surrogate is a function of
+    outputs: names of the HyperloopPod outputs to model
+    """
+
+    def __init__(self, inputs=DESIGN_INPUTS, outputs=DESIGN_OUTPUTS):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.model = None
+        self._X = None
+        self._Y = None
+
+    def fit(self, results):
+        """trains from a list of sweep results (dicts), failed points are skipped"""
+
+        results = [res for res in results if res.get('converged', True)]
+        X = np.array([[res[name] for name in self.inputs] for res in results], dtype=float)
+        Y = np.array([[res[name] for name in self.outputs] for res in results], dtype=float)
+        return self.fit_arrays(X, Y)
+
+    def fit_database(self, db, where=None):
+        """trains from the converged cases in a SweepDatabase"""
+        data = db.query(self.inputs+self.outputs, where)
+        X = np.column_stack([data[name] for name in self.inputs])
+        Y = np.column_stack([data[name] for name in self.outputs])
+        return self.fit_arrays(X, Y)
+
+    def fit_arrays(self, X, Y):
+        ok = np.all(np.isfinite(X), axis=1) & np.all(np.isfinite(Y), axis=1)
+        self._X = X[ok]
+        self._Y = Y[ok]
+        self.model = KrigingModel().fit(self._X, self._Y)
+        return self
+
+    def _as_array(self, points):
+        if isinstance(points, dict):
+            return np.column_stack([np.ravel(points[name]) for name in self.inputs])
+        if len(points) and isinstance(points[0], dict):
+            return np.array([[p[name] for name in self.inputs] for p in points], dtype=float)
+        return np.atleast_2d(np.asarray(points, dtype=float))
+
+    def predict(self, points):
+        """points: dict of input arrays, list of dicts or an (n, n_inputs) array.
+        Returns two OrderedDicts (mean and error estimate) of output arrays"""
+
+        mean, std = self.model.predict(self._as_array(points))
+        return (OrderedDict((name, mean[:, i]) for i, name in enumerate(self.outputs)),
+                OrderedDict((name, std[:, i]) for i, name in enumerate(self.outputs)))
+
+    def evaluate(self, points, rel_tol=.01, n_procs=None, update=True):
+        """Like predict, but any point whose estimated error is larger than
+        rel_tol (relative to the predicted value) for any output is solved
+        with the full HyperloopPod instead. With update=True the new solves
+        are added to the training data.
+
+        Returns (values, from_model), where from_model is a boolean array
+        """
+        from hyperloop.sweep import run_sweep
+
+        X = self._as_array(points)
+        mean, std = self.model.predict(X)
+        from_model = np.all(std <= rel_tol*np.abs(mean), axis=1)
+
+        refine = np.flatnonzero(~from_model)
+        if len(refine):
+            solve = [OrderedDict(zip(self.inputs, X[i])) for i in refine]
+            results = run_sweep(solve, outputs=self.outputs, n_procs=n_procs)
+            for i, res in zip(refine, results):
+                if res['converged']:
+                    mean[i] = [res[name] for name in self.outputs]
+                else:
+                    from_model[i] = True #keep the prediction, nothing better available
+            if update:
+                solved = [res for res in results if res['converged']]
+                if solved:
+                    X_new = np.array([[res[name] for name in self.inputs] for res in solved])
+                    Y_new = np.array([[res[name] for name in self.outputs] for res in solved])
+                    self.fit_arrays(np.vstack((self._X, X_new)), np.vstack((self._Y, Y_new)))
+
+        return OrderedDict((name, mean[:, i]) for i, name in enumerate(self.outputs)), from_model
+
+
+if __name__ == "__main__":
+    from hyperloop.results_db import SweepDatabase
+
+    inputs = ('Mach_pod_max', 'Mach_c1_in', 'c1_PR_des')
+    surr = PodSurrogate(inputs, ('flow_limit.radius_tube',))
+    surr.fit_database(SweepDatabase(), {'Mach_pod_max': (None, .9)})
+
+    machs = np.linspace(.8, .9, 11)
+    mean, std = surr.predict({'Mach_pod_max': machs, 'Mach_c1_in': .65*np.ones(11), 'c1_PR_des': 13*np.ones(11)})
+    for m, r, e in zip(machs, mean['flow_limit.radius_tube'], std['flow_limit.radius_tube']):
+        print "%5.3f %10.3f +/- %.3f"%(m, r, e)
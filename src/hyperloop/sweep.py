@@ -0,0 +1,312 @@
+"""
+    sweep.py -
+        Runs design sweeps of the HyperloopPod assembly across a pool of
+        worker processes. Each worker holds its own configured HyperloopPod,
+        so a design point costs one solve and no re-configuration.
+
+        In continuation mode the points are treated as a path: the solver
+        unknowns for the next point are extrapolated from the converged
+        neighbours instead of starting from the same initial guesses.
+"""
+import itertools
+import multiprocessing
+from collections import OrderedDict
+
+import numpy as np
+
+from openmdao.main.api import set_as_top
+
+from hyperloop.hyperloop_sim import HyperloopPod
+from hyperloop.case_cache import boundary_inputs, converged
+
+
+#initial guesses for the solver unknowns, same as the hyperloop_sim.py example
+INITIAL_GUESSES = OrderedDict([
+    ('compress.W_in', .35),
+    ('compress.c2_PR_des', 5.),
+    ('compress.Ts_tube', 322.),
+    ('flow_limit.Ts_tube', 322.),
+    ('tube_wall_temp.temp_boundary', 322.),
+    ('flow_limit.radius_tube', 178.),
+    ('pod.radius_tube_inner', 178.),
+])
+
+#solver unknowns, grouped the same way as the HyperloopPod solver parameters
+STATE_GROUPS = [
+    ('compress.W_in',),
+    ('compress.c2_PR_des',),
+    ('compress.Ts_tube', 'flow_limit.Ts_tube', 'tube_wall_temp.temp_boundary'),
+    ('flow_limit.radius_tube', 'pod.radius_tube_inner'),
+]
+
+_pod = None #the HyperloopPod owned by a worker process
+_outputs = None
+_guesses = None
+_cache = None
+
+
+def design_grid(axes):
+    """Returns the full factorial of the given design axes as a list of
+    design points. `axes` is an OrderedDict (or a list of (name, values)
+    pairs) so that the ordering of the points is predictable"""
+
+    axes = OrderedDict(axes)
+    names = axes.keys()
+    return [OrderedDict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def build_pod():
+    """Creates a HyperloopPod for sweeping. Case recording is turned off,
+    because the sweep collects the results itself"""
+
+    hl = set_as_top(HyperloopPod())
+    hl.driver.recorders = []
+    return hl
+
+
+def apply_values(hl, values):
+    for name, value in values.iteritems():
+        hl.set(name, value)
+
+
+def solve_point(hl, point, outputs, guesses=INITIAL_GUESSES, cache=None):
+    """Solves a single design point on the given assembly and returns the
+    inputs and the requested outputs in a single OrderedDict. Failed solves,
+    including ones that end without meeting the solver tolerance, are
+    reported with converged=False instead of raising. If a CaseCache is
+    given, previously converged points are read from it instead of solved"""
+
+    apply_values(hl, point)
+
+    result = OrderedDict(point)
+    if cache is not None:
+        inputs = boundary_inputs(hl)
+        cached = cache.get(inputs)
+        if cached is not None and all(name in cached for name in outputs):
+            result['converged'] = True
+            for name in outputs:
+                result[name] = cached[name]
+            return result
+
+    if guesses:
+        apply_values(hl, guesses)
+
+    try:
+        hl.run()
+    except Exception as err:
+        result['converged'] = False
+        result['error'] = str(err)
+        for name in outputs:
+            result[name] = float('nan')
+        return result
+
+    result['converged'] = converged(hl)
+    for name in outputs:
+        result[name] = float(hl.get(name))
+    if cache is not None and result['converged']:
+        cache.put(inputs, OrderedDict((name, result[name]) for name in outputs))
+    return result
+
+
+def get_state(hl):
+    """current values of the solver unknowns, one per group in STATE_GROUPS"""
+    return np.array([hl.get(group[0]) for group in STATE_GROUPS])
+
+
+def state_guesses(state):
+    """maps a state vector back onto every variable in its group"""
+    guesses = OrderedDict()
+    for group, value in zip(STATE_GROUPS, state):
+        for name in group:
+            guesses[name] = float(value)
+    return guesses
+
+
+def predict_state(path_s, states, s_new, order=2):
+    """Extrapolates the solver unknowns to the path location `s_new` with a
+    polynomial through the last `order`+1 converged points (order=1 is a
+    secant predictor, order=0 just reuses the last converged state). Points
+    repeated at the same path location only count once, the latest one, so
+    with too few distinct points the order drops"""
+
+    if not len(states):
+        return None
+
+    #the latest state at each of the last order+1 distinct locations
+    s, X = [], []
+    for s_i, x_i in zip(path_s[::-1], states[::-1]):
+        if len(s) == order+1:
+            break
+        if s_i not in s:
+            s.append(s_i)
+            X.append(x_i)
+    n = len(s)
+    X = np.array(X)
+    pred = np.zeros(X.shape[1])
+    for j in xrange(n): #Lagrange form
+        w = 1.
+        for m in xrange(n):
+            if m != j:
+                w *= (s_new-s[m])/(s[j]-s[m])
+        pred += w*X[j]
+    return pred
+
+
+def _distance(point_a, point_b):
+    return sum((float(point_b[k])-float(point_a[k]))**2 for k in point_a)**.5
+
+
+def _midpoint(point_a, point_b):
+    mid = OrderedDict()
+    for k in point_b:
+        mid[k] = .5*(float(point_a[k])+float(point_b[k]))
+    return mid
+
+
+class _Path(object):
+    """converged history along a continuation path"""
+
+    def __init__(self):
+        self.s = []
+        self.points = []
+        self.states = []
+
+    def add(self, s, point, state):
+        self.s.append(s)
+        self.points.append(point)
+        self.states.append(state)
+
+
+def _continue_to(hl, path, point, s, outputs, order, max_cuts, guesses):
+    state = predict_state(path.s, path.states, s, order)
+    if state is not None:
+        guesses = state_guesses(state)
+
+    result = solve_point(hl, point, outputs, guesses)
+    if result['converged']:
+        path.add(s, point, get_state(hl))
+        return result
+
+    #step cutting: reach the point through the midpoint of the failed step
+    if max_cuts == 0 or not path.s:
+        return result
+    mid = _midpoint(path.points[-1], point)
+    s_mid = .5*(path.s[-1]+s)
+    mid_result = _continue_to(hl, path, mid, s_mid, outputs, order, max_cuts-1, guesses)
+    if not mid_result['converged']:
+        return result
+    return _continue_to(hl, path, point, s, outputs, order, max_cuts-1, guesses)
+
+
+def continuation_sweep(hl, points, outputs=None, order=2, max_cuts=3, guesses=INITIAL_GUESSES):
+    """Solves the design points in sequence, treating them as a path through
+    the design space. The unknowns for each point are predicted from the
+    converged neighbours (see predict_state), and a failed step is retried
+    through up to `max_cuts` successive midpoints.
+
+    The path is parameterized by the euclidean distance between consecutive
+    points, so all points should set the same variables. `guesses` are only
+    used for the first point."""
+
+    if outputs is None:
+        outputs = list(hl.driver.printvars)
+
+    path = _Path()
+    results = []
+    s = 0.
+    prev = None
+    for point in points:
+        if prev is not None:
+            s += _distance(prev, point)
+        prev = point
+        results.append(_continue_to(hl, path, point, s, outputs, order, max_cuts, guesses))
+    return results
+
+
+def _init_worker(outputs, guesses, cache):
+    global _pod, _outputs, _guesses, _cache
+
+    _pod = build_pod()
+    _outputs = outputs or list(_pod.driver.printvars)
+    _guesses = guesses
+    _cache = cache
+
+
+def _solve_worker(point):
+    return solve_point(_pod, point, _outputs, _guesses, _cache)
+
+
+def _continue_worker(points):
+    return continuation_sweep(_pod, points, _outputs, guesses=_guesses)
+
+
+def _split(points, n_blocks):
+    """splits the points into n_blocks contiguous blocks of nearly equal size"""
+    bounds = np.linspace(0, len(points), n_blocks+1).astype(int)
+    return [points[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def run_sweep(points, outputs=None, n_procs=None, guesses=INITIAL_GUESSES, chunksize=1,
+              continuation=False, cache=None):
+    """Solves every design point in `points` and returns the results in the
+    same order.
+
+    points: list of dicts mapping HyperloopPod variables (e.g. 'Mach_pod_max',
+        'Mach_c1_in', 'c1_PR_des', 'Mach_bypass', 'Ps_tube') to values
+    outputs: variables to collect from each solve, defaults to the
+        HyperloopPod printvars
+    n_procs: number of worker processes, defaults to the number of cores.
+        With n_procs=1 everything runs in the calling process
+    guesses: initial values for the solver unknowns, applied before every
+        point so the results don't depend on which worker solved what
+    continuation: treat `points` as an ordered path. The path is split into
+        one contiguous block per worker and each block is solved with
+        continuation_sweep, so only the first point of a block starts cold
+    cache: a CaseCache to read previously converged points from and store
+        new ones in. Not used with continuation, which needs the converged
+        state of every point
+    """
+
+    points = list(points)
+    if n_procs is None:
+        n_procs = multiprocessing.cpu_count()
+    n_procs = max(1, min(n_procs, len(points)))
+
+    if n_procs == 1:
+        _init_worker(outputs, guesses, cache)
+        if continuation:
+            return _continue_worker(points)
+        return [_solve_worker(point) for point in points]
+
+    pool = multiprocessing.Pool(n_procs, _init_worker, (outputs, guesses, cache))
+    try:
+        if continuation:
+            blocks = pool.map(_continue_worker, _split(points, n_procs), 1)
+            results = [res for block in blocks for res in block]
+        else:
+            results = list(pool.imap(_solve_worker, points, chunksize))
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return results
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    points = design_grid([
+        ('Mach_c1_in', [.65, .7, .75]),
+        ('Mach_pod_max', np.arange(.781, .95, .01)),
+    ])
+
+    results = run_sweep(points)
+
+    from hyperloop.results_db import SweepDatabase
+    SweepDatabase().store(results)
+
+    for res in results:
+        print "%(Mach_c1_in)5.2f %(Mach_pod_max)6.3f"%res, res['converged'], res['flow_limit.radius_tube']
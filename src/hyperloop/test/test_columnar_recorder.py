@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from hyperloop.columnar_recorder import ColumnarCaseRecorder, ColumnarCaseReader
+
+
+class ColumnarRecorderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'cases.col')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+
+        rec = ColumnarCaseRecorder(self.path, chunk_size=2)
+        rec.startup()
+        for i in xrange(3):
+            rec.record_values([('i', i), ('x', .5*i), ('name', 'skipped')])
+        #a second run through the same recorder keeps the first one's cases
+        rec.close()
+        rec.startup()
+        rec.record_values([('i', 3), ('x', 1.5)])
+        rec.close()
+        #and so does recording after close
+        rec.record_values({'i': 4})
+        rec.close()
+
+        reader = ColumnarCaseReader(self.path)
+        self.assertEqual(reader.keys(), ['i', 'x'])
+        self.assertEqual(len(reader), 5)
+        self.assertEqual(list(reader['i']), range(5))
+        self.assertTrue(np.allclose(reader['x'][:4], [0., .5, 1., 1.5]))
+        self.assertTrue(np.isnan(reader['x'][4]))
+
+    def test_startup_while_open(self):
+
+        rec = ColumnarCaseRecorder(self.path)
+        rec.record_values([('x', 1.)])
+        self.assertRaises(RuntimeError, rec.startup)
+        rec.close()
+
+        #a new recorder starts over unless told to append
+        rec = ColumnarCaseRecorder(self.path, append=True)
+        rec.record_values([('x', 2.)])
+        rec.close()
+        self.assertEqual(list(ColumnarCaseReader(self.path)['x']), [1., 2.])
+        rec = ColumnarCaseRecorder(self.path)
+        rec.record_values([('x', 3.)])
+        rec.close()
+        self.assertEqual(list(ColumnarCaseReader(self.path)['x']), [3.])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from openmdao.main.api import set_as_top
+from openmdao.util.testutil import assert_rel_error
+
+#the pycycle elements, not just a package of that name
+try:
+    from pycycle.api import FlowStation
+    from hyperloop.cycle.compression_system import CompressionSystem
+except ImportError:
+    CompressionSystem = None
+
+
+@unittest.skipIf(CompressionSystem is None, "pycycle is not installed")
+class CompressionSystemTestCase(unittest.TestCase):
+
+    def test_off_design_at_design_point(self):
+
+        hlc = set_as_top(CompressionSystem())
+        hlc.Mach_pod_max = .8
+        hlc.run()
+        #move the bearing target onto the design run, so the design point is converged
+        hlc.Ps_bearing += hlc.Ps_bearing_residual/.001
+        hlc.run()
+        pwr_des = hlc.pwr_req
+        W_in_des = hlc.W_in
+
+        res = hlc.evaluate_off_design([.8, .7])
+        self.assertTrue(res['converged'].all())
+        #off-design at the design Mach reproduces the design point
+        assert_rel_error(self, res['pwr_req'][0], pwr_des, 1e-6)
+        assert_rel_error(self, res['W_in'][0], W_in_des, 1e-6)
+        assert_rel_error(self, res['c1_PR_des'][0], hlc.c1_PR_des, 1e-6)
+        #a slower pod swallows less air
+        self.assertTrue(res['W_in'][1] < res['W_in'][0])
+
+        #the cycle is re-run at the design point afterwards
+        assert_rel_error(self, hlc.pwr_req, pwr_des, 1e-10)
+        assert_rel_error(self, hlc.Mach_pod_max, .8, 1e-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
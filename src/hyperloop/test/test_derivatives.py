@@ -0,0 +1,158 @@
+import unittest
+
+import numpy as np
+
+from pycycle.api import FlowStation
+
+from hyperloop import thermo_tables
+from hyperloop.aero import Aero
+from hyperloop.geometry.battery import Battery
+from hyperloop.geometry.inlet import InletGeom
+from hyperloop.geometry.passenger_capsule import PassengerCapsule
+from hyperloop.geometry.tube_structure import TubeStructural
+from hyperloop.tube_limit_flow import TubeLimitFlow
+from hyperloop.tube_wall_temp import TubeWallTemp
+from hyperloop.cycle.compression_system import Performance
+from hyperloop.test.test_thermo_tables import synthetic_table
+
+
+def finite_difference(comp, rel_step=1e-6):
+    """central difference jacobian of comp's deriv outputs with respect to
+    its deriv inputs, in the provideJ layout"""
+
+    inputs, outputs = comp.list_deriv_vars()
+    J = np.zeros((len(outputs), len(inputs)))
+    for j, name in enumerate(inputs):
+        x = getattr(comp, name)
+        step = rel_step*max(abs(x), 1.)
+        setattr(comp, name, x+step)
+        comp.execute()
+        plus = np.array([getattr(comp, out) for out in outputs])
+        setattr(comp, name, x-step)
+        comp.execute()
+        minus = np.array([getattr(comp, out) for out in outputs])
+        setattr(comp, name, x)
+        J[:, j] = (plus-minus)/(2*step)
+    comp.execute()
+    return J
+
+
+class DerivativesTestCase(unittest.TestCase):
+
+    def check_partials(self, comp, tol=1e-6):
+        """provideJ against finite differences, row by row relative to the
+        largest partial of each output"""
+
+        comp.execute()
+        J = comp.provideJ()
+        fd = finite_difference(comp)
+        self.assertEqual(J.shape, fd.shape)
+        scale = np.maximum(np.abs(fd).max(axis=1), 1e-10)
+        err = np.abs(J-fd).max(axis=1)/scale
+        self.assertTrue(np.all(err < tol), "relative errors by output: %s"%err)
+
+    def test_aero(self):
+
+        comp = Aero()
+        comp.coef_drag = 2.
+        comp.area_capsule = 18000.
+        comp.velocity_capsule = 300.
+        comp.rho = .0012
+        comp.gross_thrust = 500.
+        self.check_partials(comp)
+
+    def test_battery(self):
+
+        comp = Battery()
+        comp.time_mission = 2100.
+        comp.area_cross_section = 1.3
+        comp.energy = 420.
+        self.check_partials(comp)
+
+    def test_inlet(self):
+
+        comp = InletGeom()
+        comp.inlet_wall_thickness = 5.
+        comp.area_in = 7000.
+        comp.area_out = 1500.
+        comp.hub_to_tip = .4
+        comp.area_passenger_capsule = 14000.
+        self.check_partials(comp)
+
+    def test_passenger_capsule(self):
+
+        comp = PassengerCapsule()
+        comp.n_rows = 14
+        comp.length_row = 150.
+        self.check_partials(comp)
+
+    def test_tube_structure(self):
+
+        comp = TubeStructural()
+        comp.Ps_tube = 99.
+        comp.radius_inner = 111.5
+        self.check_partials(comp)
+
+    def test_performance(self):
+
+        comp = Performance()
+        comp.C1_pwr = 300.
+        comp.C2_pwr = 150.
+        comp.Fg = 200.
+        comp.F_ram = 120.
+        comp.Ps_bearing_target = 1.6
+        comp.Ps_bearing = 1.7
+        self.check_partials(comp)
+
+    def test_tube_limit_flow(self):
+
+        #the partials treat the air as calorically perfect, so they are exact
+        #on calorically perfect property tables
+        air_table = thermo_tables._air_table
+        thermo_tables._air_table = synthetic_table(theta=None)
+        try:
+            comp = TubeLimitFlow()
+            comp.radius_tube = 111.5
+            comp.radius_inlet = 73.7
+            comp.Ps_tube = 99.
+            comp.Ts_tube = 292.1
+            comp.Mach_pod = .8
+            comp.Mach_bypass = .95
+            comp.use_property_tables = True
+            self.check_partials(comp, 1e-5)
+        finally:
+            thermo_tables._air_table = air_table
+
+    def tube_wall_temp(self, solve_steady_state):
+
+        comp = TubeWallTemp()
+        comp.nozzle_air = FlowStation()
+        comp.nozzle_air.setTotalTP(1710, 0.304434211)
+        comp.nozzle_air.W = 1.08
+        comp.bearing_air = FlowStation()
+        comp.bearing_air.setTotalTP(1100, 0.3)
+        comp.bearing_air.W = .4
+        comp.diameter_outer_tube = 2.22504
+        comp.length_tube = 482803.
+        comp.num_pods = 34.
+        comp.temp_boundary = 322.361
+        comp.temp_outside_ambient = 305.6
+        comp.solar_insolation = 1000.
+        comp.nn_incidence_factor = .7
+        comp.surface_reflectance = .5
+        comp.emissivity_tube = .5
+        comp.sb_constant = 0.00000005670373
+        comp.solve_steady_state = solve_steady_state
+        return comp
+
+    def test_tube_wall_temp(self):
+
+        self.check_partials(self.tube_wall_temp(False), 1e-5)
+
+    def test_tube_wall_temp_steady_state(self):
+
+        self.check_partials(self.tube_wall_temp(True), 1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.trajectory import scale_profile, fly_profile
+from hyperloop.fleet_sim import FleetSimulator, headway_schedule, pod_heat_rate, exhaust_heat_rate
+
+
+class FleetSimulatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        t, v = scale_profile(308., 563270.)
+        self.trip = fly_profile(t, v, pwr_compressor=420.)
+
+    def test_events_match_bins(self):
+
+        fleet = FleetSimulator(self.trip, n_segments=100, capacity=2)
+        events = []
+        res = fleet.run(headway_schedule(20., 3*3600.), bin_width=60.,
+                        hook=lambda t, n: events.append((t, n)))
+        self.assertEqual(len(events), 2*len(res['departures']))
+        self.assertEqual(events[-1][1], 0)
+
+        #the time average of the event by event pod count is the binned one
+        times, counts = np.array(events).T
+        area = np.concatenate(([0.], np.cumsum(counts[:-1]*np.diff(times))))
+        edges = np.concatenate((res['time'], [res['time'][-1]+60.]))
+        i = np.maximum(np.searchsorted(times, edges, side='right')-1, 0)
+        area_edges = np.where(edges < times[0], 0., area[i] + counts[i]*(edges-times[i]))
+        self.assertTrue(np.allclose(np.diff(area_edges)/60., res['pods_in_tube'], atol=1e-6))
+
+    def test_capacity(self):
+
+        #departures every 2 s is more than the first block lets through
+        fleet = FleetSimulator(self.trip, n_segments=563, capacity=3)
+        res = fleet.run(headway_schedule(2., 600.), bin_width=1.)
+        self.assertTrue(res['delay'].max() > 0)
+        self.assertTrue(np.all(np.diff(res['departures']) >= 0))
+        self.assertTrue(res['occupancy'].max() <= 3*(1+1e-9))
+
+    def test_heat_rate(self):
+
+        scheduled = headway_schedule(30., 3600.)
+        #a constant heat rate scales the pod count
+        fleet = FleetSimulator(self.trip, n_segments=50)
+        res = fleet.run(scheduled, bin_width=60.)
+        self.assertTrue(np.allclose(res['heat_rate_pods'], pod_heat_rate()*res['pods_in_tube'], 
+                                    rtol=1e-9, atol=1e-3))
+
+        #heat along the trajectory from the exhaust at each speed
+        speed = np.asarray(self.trip['speed'])
+        off_design = {'speed': np.array([300., 100., 200., 250.]), 'converged': np.array([True, True, True, False]), 
+                      'nozzle_WCp': np.array([600., 200., 400., 0.]), 'nozzle_Tt': 900.*np.ones(4), 
+                      'bearing_WCp': np.array([100., 0., 50., 0.]), 'bearing_Tt': 400.*np.ones(4)}
+        heat = exhaust_heat_rate(speed, off_design, temp_boundary=322.)
+        self.assertAlmostEqual(exhaust_heat_rate(300., off_design), 600.*578.+100.*78.)
+        self.assertAlmostEqual(exhaust_heat_rate(150., off_design), 300.*578.+25.*78.)
+        self.assertAlmostEqual(exhaust_heat_rate(0., off_design), 200.*578.)
+
+        fleet = FleetSimulator(self.trip, n_segments=50, heat_rate_pod=heat)
+        res = fleet.run(scheduled, bin_width=60.)
+        #all the heat of every trip ends up in the bins
+        trip_heat = np.trapz(heat, self.trip['time'])
+        self.assertAlmostEqual(res['heat_rate_pods'].sum()*60./(len(scheduled)*trip_heat), 1., 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
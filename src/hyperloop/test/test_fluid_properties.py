@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.cycle.fluid_properties import WATER_DATA, AIR_DATA, R_AIR, water, air
+
+
+class FluidPropertiesTestCase(unittest.TestCase):
+
+    def test_water_nodes(self):
+
+        props = water()(WATER_DATA[:, 0])
+        for i, name in enumerate(('rho', 'cp', 'mu', 'k')):
+            self.assertTrue(np.allclose(props[name], WATER_DATA[:, i+1], rtol=1e-4), name)
+        self.assertTrue(np.allclose(props['nu'], props['mu']/props['rho']))
+        self.assertTrue(np.allclose(props['Pr'], props['cp']*props['mu']/props['k']))
+        #about 7 at room temperature
+        self.assertAlmostEqual(float(water()(293.15)['Pr']), 7.0, 1)
+
+    def test_air_nodes(self):
+
+        props = air()(AIR_DATA[:, 0])
+        for i, name in enumerate(('cp', 'mu', 'k')):
+            self.assertTrue(np.allclose(props[name], AIR_DATA[:, i+1], rtol=1e-4), name)
+        self.assertTrue(np.allclose(props['rho'], 101325./(R_AIR*AIR_DATA[:, 0])))
+        self.assertTrue(np.allclose(props['nu'], props['mu']/props['rho']))
+        self.assertTrue(np.allclose(props['Pr'], props['cp']*props['mu']/props['k']))
+
+        #density and kinematic viscosity scale with pressure
+        low = air()(300., 50000.)
+        self.assertAlmostEqual(float(low['rho']), 50000./(R_AIR*300.))
+        self.assertAlmostEqual(float(low['nu']/props['nu'][3]), 101325./50000.)
+
+    def test_clipping(self):
+
+        self.assertAlmostEqual(float(water().cp(200.)), WATER_DATA[0, 2])
+        self.assertAlmostEqual(float(air().cp(2000.)), AIR_DATA[-1, 1])
+        T = np.array([[300., 310.], [320., 330.]])
+        self.assertEqual(water().rho(T).shape, (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from openmdao.main.api import set_as_top, Assembly
+from openmdao.util.testutil import assert_rel_error
+from openmdao.lib.drivers.api import BroydenSolver
+from pycycle.api import FlowStation
+
+from hyperloop.cycle.heat_exchanger import HeatExchanger
+
+
+def air_in():
+    fs = FlowStation()
+    fs.setTotalTP(1423.8, 0.302712118187) #R, psi
+    fs.W = .49
+    return fs
+
+
+class HeatBalance(Assembly):
+
+    def configure(self):
+
+        hx = self.add('hx', HeatExchanger())
+        driver = self.add('driver', BroydenSolver())
+        driver.add_parameter('hx.T_hot_out', low=0., high=1000.)
+        driver.add_parameter('hx.T_cold_out', low=0., high=1000.)
+        driver.add_constraint('hx.residual_qmax=0')
+        driver.add_constraint('hx.residual_e_balance=0')
+        driver.workflow.add(['hx'])
+
+
+class HeatExchangerTestCase(unittest.TestCase):
+
+    def setup_hx(self, hx):
+        hx.Fl_I = air_in()
+        hx.W_cold = .45
+        hx.Cp_cold = 4.186
+        hx.T_cold_in = 288.15
+        hx.design = True
+
+    def test_explicit(self):
+
+        test = set_as_top(HeatBalance())
+        self.setup_hx(test.hx)
+        avg = (test.hx.Fl_I.Tt*.555555556 + test.hx.T_cold_in)/2.
+        test.hx.T_hot_out = avg
+        test.hx.T_cold_out = avg
+        test.run()
+        assert_rel_error(self, test.hx.T_hot_out, 299.97, 1e-4)
+
+        hx = set_as_top(HeatExchanger())
+        self.setup_hx(hx)
+        hx.explicit = True
+        hx.run()
+
+        #the explicit outlets zero both residuals and match the solver
+        self.assertTrue(abs(hx.residual_qmax) < 1e-8)
+        self.assertTrue(abs(hx.residual_e_balance) < 1e-8)
+        assert_rel_error(self, hx.T_hot_exit, test.hx.T_hot_out, 1e-5)
+        assert_rel_error(self, hx.T_cold_exit, test.hx.T_cold_out, 1e-5)
+        assert_rel_error(self, hx.Fl_O.Tt, hx.T_hot_exit*1.8, 1e-6)
+
+        #the state inputs are left alone
+        self.assertEqual(hx.T_hot_out, 338.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
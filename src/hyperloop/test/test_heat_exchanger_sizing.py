@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.cycle.heat_exchanger_sizing import size_heat_exchangers, nusselt, pareto_front, design_space
+
+
+class HeatExchangerSizingTestCase(unittest.TestCase):
+
+    def test_verified_design(self):
+
+        #the verified problem in the heat_exchanger_sizing.py demo
+        res = size_heat_exchangers(288.1, 406.6, 791., 338.4, .49)
+        self.assertAlmostEqual(res['Re_a']/966613., 1., 2)
+        self.assertAlmostEqual(res['Re_w']/41650., 1., 2)
+        self.assertAlmostEqual(res['L']/14.078, 1., 2)
+        self.assertTrue(res['feasible'])
+
+    def test_validity_range(self):
+
+        #a big shell slows the water below the Gnielinski range
+        res = size_heat_exchangers(288.1, 406.6, 791., 338.4, .49, Di_shell=.2, correlation='gnielinski')
+        self.assertTrue(res['Re_w'] < 3000.)
+        self.assertFalse(res['feasible'])
+        res = size_heat_exchangers(288.1, 406.6, 791., 338.4, .49, correlation='gnielinski')
+        self.assertTrue(res['feasible'])
+
+        #below Re = 1000 Gnielinski is negative, which must never be feasible
+        self.assertTrue(nusselt(800., 2., correlation='gnielinski') < 0)
+        res = size_heat_exchangers(288.1, 406.6, 791., 338.4, .49, Di_shell=.3, correlation='gnielinski')
+        self.assertFalse(res['feasible'])
+        designs, pareto = design_space(791., .49, T_aout=[320., 340.], T_win=[285., 300.],
+                                       T_wout=np.linspace(330., 420., 4), correlation='gnielinski')
+        feasible = designs['feasible']
+        self.assertTrue(np.all(designs['Re_w'][feasible] >= 3000.))
+        self.assertTrue(np.all(designs['Re_a'][feasible] >= 3000.))
+        self.assertTrue(np.all(designs['L'][feasible] > 0))
+        self.assertTrue(np.all(feasible[pareto]))
+
+    def test_pareto_front(self):
+
+        costs = np.array([[1., 5.], [2., 2.], [1., 5.], [3., 3.], [5., 1.], [2., 6.]])
+        #[3, 3] is dominated by [2, 2] and [2, 6] by [1, 5], duplicates are both kept
+        self.assertEqual(list(pareto_front(costs)), [0, 1, 2, 4])
+        self.assertEqual(list(pareto_front(np.ones((3, 2)))), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
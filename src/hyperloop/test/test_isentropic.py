@@ -0,0 +1,29 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.isentropic import area_ratio, lookup_mach
+
+
+class AreaMachTestCase(unittest.TestCase):
+
+    def test_inverse(self):
+
+        mach = np.linspace(.05, .99, 50)
+        for gam in (1.2, 1.4, 1.6):
+            self.assertTrue(np.allclose(lookup_mach(area_ratio(mach, gam), gam), mach, atol=1e-9))
+
+    def test_choked(self):
+
+        #no isentropic solution below A/A* = 1, the flow is choked
+        self.assertEqual(lookup_mach(1.), 1.)
+        self.assertEqual(lookup_mach(.8), 1.)
+        mach = lookup_mach(np.array([-2., .5, 2., np.nan, np.inf]))
+        self.assertTrue(np.allclose(mach[:2], 1.))
+        self.assertTrue(abs(area_ratio(mach[2])-2.) < 1e-9)
+        self.assertTrue(np.isnan(mach[3]))
+        self.assertEqual(mach[4], 0.)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.mission import Mission
+
+
+class MissionTestCase(unittest.TestCase):
+
+    def setup_mission(self):
+        m = Mission()
+        m.speed_max = 300.
+        m.tube_length = 563270.
+        m.pwr_marg = .3
+        m.pwr_req = 420.
+        m.route_distance = np.zeros(0)
+        m.route_speed = np.zeros(0)
+        m.coef_drag = 2.
+        m.area_capsule = 18000.
+        m.Ps_tube = 99.
+        m.Ts_tube = 292.1
+        m.pwr_speed = np.linspace(0., 340., 8)
+        m.pwr_curve = 50. + 420.*(m.pwr_speed/308.)**3
+        return m
+
+    def test_power_curve_derivatives(self):
+
+        m = self.setup_mission()
+        m.execute()
+        inputs, outputs = m.list_deriv_vars()
+        self.assertEqual(inputs[-1], 'pwr_curve')
+        J = m.provideJ()
+        self.assertEqual(J.shape, (2, 4+len(m.pwr_curve)))
+
+        energy = m.energy
+        curve = m.pwr_curve.copy()
+        for j in xrange(len(curve)):
+            m.pwr_curve = curve.copy()
+            m.pwr_curve[j] += 1.
+            m.execute()
+            #the energy is linear in the curve points
+            self.assertAlmostEqual(m.energy-energy, J[1, 4+j], 8)
+        m.pwr_curve = curve
+
+        m.speed_max = 300.*(1+1e-5)
+        m.execute()
+        self.assertAlmostEqual((m.energy-energy)/(300.*1e-5)/J[1, 0], 1., 3)
+        self.assertAlmostEqual(J[1, 3], energy/1.3)
+
+    def test_constant_power(self):
+
+        m = self.setup_mission()
+        m.pwr_curve = np.zeros(0)
+        m.execute()
+        self.assertEqual(len(m.list_deriv_vars()[0]), 4)
+        #a flat curve at pwr_req flies the same trip as the closed form
+        m.pwr_curve = 420.*np.ones(len(m.pwr_speed))
+        closed = m.energy
+        m.execute()
+        self.assertAlmostEqual(m.energy/closed, 1., 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
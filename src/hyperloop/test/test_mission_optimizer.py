@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.mission_optimizer import MissionOptimizer, G
+
+
+class MissionOptimizerTestCase(unittest.TestCase):
+
+    def test_min_time(self):
+
+        length = 100e3
+        limit = (np.array([0, 40e3, 45e3, 60e3, 65e3, length]), np.array([300, 300, 150, 150, 300, 300]))
+        opt = MissionOptimizer(n_nodes=300, accel_max=.5*G, decel_max=.3*G)
+        res = opt.solve(length, limit)
+        self.assertTrue(res['success'])
+
+        v_max = np.interp(res['distance'], *limit)
+        self.assertTrue(np.all(res['speed'] <= v_max*(1+1e-6)))
+        self.assertTrue(np.all(res['acceleration'] <= .5*G*(1+1e-6)))
+        self.assertTrue(np.all(res['acceleration'] >= -.3*G*(1+1e-6)))
+        #the fastest profile is the acceleration envelope
+        v_max[0] = v_max[-1] = opt.speed_end
+        envelope = opt.envelope(res['distance'], v_max)
+        self.assertTrue(np.max(np.abs(res['speed']-envelope)) < 1.)
+        trip_time = np.sum(2*np.diff(res['distance'])/(envelope[1:]+envelope[:-1]))
+        self.assertTrue(abs(res['trip_time']-trip_time) < 1e-3*trip_time)
+
+    def test_min_energy(self):
+
+        length = 100e3
+        opt = MissionOptimizer('time', n_nodes=200)
+        t_min = opt.solve(length, 300.)['trip_time']
+
+        opt_e = MissionOptimizer('energy', n_nodes=200, time_max=1.2*t_min,
+                                 pwr_onboard=lambda v: 420.*(v/300.)**3)
+        res = opt_e.solve(length, 300.)
+        self.assertTrue(res['success'])
+        self.assertTrue(res['trip_time'] <= 1.2*t_min*(1+1e-6))
+        self.assertTrue(np.all(np.abs(res['acceleration']) <= .5*G*(1+1e-6)))
+        #slower than the speed limit to save energy
+        self.assertTrue(res['speed'].max() < 299.)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+import numpy as np
+
+from openmdao.util.testutil import assert_rel_error
+
+from hyperloop.cycle.compression_system import CompressionSystem, OFF_DESIGN_STATES, _total_ratio
+
+
+class Stream(object):
+
+    def __init__(self, W, Tt, Pt, Cp=.24):
+        self.W = W
+        self.Tt = Tt
+        self.Pt = Pt
+        self.Cp = Cp
+
+
+class Element(object):
+
+    def __init__(self, Fl_I):
+        self.Fl_I = Fl_I
+
+
+class StandInCycle(CompressionSystem):
+    """CompressionSystem.evaluate_off_design on a smooth stand-in for the
+    pycycle elements. A design run sizes three 'areas' from the states, and
+    off-design the residuals are the states' misfit to them"""
+
+    def __init__(self):
+        super(StandInCycle, self).__init__()
+        self.nozzle = Element(Stream(1., 1000., 1.))
+        self.runs = 0
+
+    def configure(self):
+        pass
+
+    def set_design_mode(self, design=True):
+        self._design_mode = design
+
+    def _areas(self):
+        tr = _total_ratio(self.Mach_pod_max)
+        W, c1, c2 = self.W_in, self.c1_PR_des, self.c2_PR_des
+        return np.array([W/tr, W*(1+.1*c1)/(c1*tr**.8), c2*c1**.3*tr**.5])
+
+    def run(self):
+        self.runs += 1
+        if self._design_mode:
+            self._sized = self._areas()
+        W, c1, c2 = self.W_in, self.c1_PR_des, self.c2_PR_des
+        self.speed_max = 340.*self.Mach_pod_max
+        self.pwr_req = 100.*W*c1**.4*c2**.3
+        self.F_net = 300.*W*self.Mach_pod_max
+        self.nozzle_Fl_O = Stream(W/.4536, 1000.+50*c1, 1.)
+        self.bearing_Fl_O = Stream(.2/.4536, 600.+100*c2, 1.)
+
+    def off_design_residuals(self):
+        return self._areas()/self._sized - 1.
+
+
+class OffDesignSolverTestCase(unittest.TestCase):
+
+    def test_stand_in_cycle(self):
+
+        cycle = StandInCycle()
+        cycle.Mach_pod_max = .8
+        cycle.W_in = .69
+        cycle.c1_PR_des = 12.47
+        cycle.c2_PR_des = 5.
+        cycle.set_design_mode(True)
+        cycle.run()
+        pwr_des = cycle.pwr_req
+        states_des = [getattr(cycle, name) for name in OFF_DESIGN_STATES]
+
+        Mach = np.array([.9, .5, .8, .7, .6, .85])
+        res = cycle.evaluate_off_design(Mach, tol=1e-10)
+        self.assertTrue(res['converged'].all())
+        self.assertTrue(np.all(res['Mach_pod'] == Mach))
+
+        #the design Mach is met at the design states, straight after the
+        #finite difference jacobian: 1 run, 3 steps and the run back
+        self.assertEqual(res['runs'][2], 5)
+        for name, value in zip(OFF_DESIGN_STATES, states_des):
+            assert_rel_error(self, res[name][2], value, 1e-10)
+        assert_rel_error(self, res['pwr_req'][2], pwr_des, 1e-10)
+        #the first speed above the design builds its own jacobian again, the
+        #others carry the broyden updated one on from their neighbour
+        self.assertEqual(res['runs'][5], max(res['runs']))
+        self.assertTrue(np.all(res['runs'][[0, 1, 3, 4]] < res['runs'][5]))
+
+        #every point solves the sized cycle
+        for i, M in enumerate(Mach):
+            cycle.Mach_pod_max = M
+            for name in OFF_DESIGN_STATES:
+                setattr(cycle, name, res[name][i])
+            self.assertTrue(np.all(np.abs(cycle.off_design_residuals()) < 1e-9))
+        #a slower pod swallows less air
+        self.assertTrue(np.all(np.diff(res['W_in'][np.argsort(Mach)]) > 0))
+
+        #the cycle is back at the design point afterwards
+        cycle = StandInCycle()
+        cycle.Mach_pod_max = .8
+        for name, value in zip(OFF_DESIGN_STATES, states_des):
+            setattr(cycle, name, value)
+        cycle.set_design_mode(True)
+        cycle.run()
+        cycle.evaluate_off_design(Mach)
+        self.assertTrue(cycle._design_mode)
+        self.assertEqual(cycle.Mach_pod_max, .8)
+        self.assertEqual([getattr(cycle, name) for name in OFF_DESIGN_STATES], states_des)
+        assert_rel_error(self, cycle.pwr_req, pwr_des, 1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
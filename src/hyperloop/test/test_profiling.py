@@ -0,0 +1,60 @@
+import unittest
+
+from hyperloop.profiling import MethodHook
+
+
+class Counter(object):
+
+    def __init__(self):
+        self.count = 0
+
+    def execute(self, step=1):
+        self.count += step
+        return self.count
+
+
+def tag(label, log):
+    def hook(call, *args, **kwargs):
+        log.append(label)
+        return call(*args, **kwargs)
+    return hook
+
+
+class MethodHookTestCase(unittest.TestCase):
+
+    def test_chain(self):
+
+        comp = Counter()
+        log = []
+        first = MethodHook(comp, 'execute', tag('first', log))
+        second = MethodHook(comp, 'execute', tag('second', log))
+        self.assertEqual(comp.execute(step=2), 2)
+        self.assertEqual(log, ['second', 'first'])
+
+        #taking out the inner hook leaves the outer one working
+        first.remove()
+        del log[:]
+        self.assertEqual(comp.execute(), 3)
+        self.assertEqual(log, ['second'])
+
+        second.remove()
+        self.assertFalse('execute' in comp.__dict__)
+        del log[:]
+        self.assertEqual(comp.execute(), 4)
+        self.assertEqual(log, [])
+
+    def test_remove_in_order(self):
+
+        comp = Counter()
+        log = []
+        first = MethodHook(comp, 'execute', tag('first', log))
+        second = MethodHook(comp, 'execute', tag('second', log))
+        second.remove()
+        comp.execute()
+        self.assertEqual(log, ['first'])
+        first.remove()
+        self.assertFalse('execute' in comp.__dict__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from collections import OrderedDict
+
+from hyperloop.profiling import MethodHook
+from hyperloop.residual_trace import ResidualTrace
+
+
+def tag(label, log):
+    def hook(call, *args, **kwargs):
+        log.append(label)
+        return call(*args, **kwargs)
+    return hook
+
+
+class Workflow(object):
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self):
+        self.driver.x *= .5
+
+
+class Solver(object):
+    """just enough of a driver for a ResidualTrace"""
+
+    def __init__(self):
+        self.x = 1.
+        self.workflow = Workflow(self)
+
+    def get_parameters(self):
+        return OrderedDict([('x', None)])
+
+    def get_eq_constraints(self):
+        return OrderedDict([('x=0', None)])
+
+    def get_param_values(self):
+        return [self.x]
+
+    def eval_eq_constraints(self):
+        return [self.x]
+
+    def execute(self):
+        for i in xrange(3):
+            self.workflow.run()
+
+
+class TraceWithProfilerTestCase(unittest.TestCase):
+
+    def test_attach_detach_any_order(self):
+
+        solver = Solver()
+        log = []
+        timer = MethodHook(solver.workflow, 'run', tag('timer', log))
+        trace = ResidualTrace(solver)
+        solver.execute()
+        self.assertEqual(len(trace), 3)
+        self.assertEqual(len(log), 3)
+
+        #the trace keeps working with the hook under it gone, and the other way round
+        timer.remove()
+        solver.execute()
+        self.assertEqual(len(trace), 6)
+        self.assertEqual(len(log), 3)
+        self.assertEqual(list(trace.residuals[:, 0]), [.5**i for i in xrange(1, 7)])
+
+        timer = MethodHook(solver.workflow, 'run', tag('timer', log))
+        trace.detach()
+        solver.execute()
+        self.assertEqual(len(trace), 6)
+        self.assertEqual(len(log), 6)
+        timer.remove()
+        self.assertFalse('run' in solver.workflow.__dict__)
+        self.assertFalse('execute' in solver.__dict__)
+
+
+if __name__ == "__main__":
+    unittest.main()
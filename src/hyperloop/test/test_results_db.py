@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+import numpy as np
+
+from hyperloop.results_db import SweepDatabase
+
+
+class SweepDatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'sweeps.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def results(self):
+        results = []
+        for Mach_c1_in in (.65, .7):
+            for Mach_pod_max in (.8, .85, .9):
+                res = OrderedDict([('Mach_c1_in', Mach_c1_in), ('Mach_pod_max', Mach_pod_max)])
+                res['converged'] = Mach_pod_max < .9
+                res['pwr_req'] = 100.*Mach_c1_in + Mach_pod_max
+                res['error'] = 'skipped'
+                results.append(res)
+        return results
+
+    def test_round_trip(self):
+
+        db = SweepDatabase(self.path)
+        db.store(self.results())
+        db.close()
+
+        #the cases are still there in a new connection
+        db = SweepDatabase(self.path)
+        self.assertEqual(db.columns(), ['Mach_c1_in', 'Mach_pod_max', 'converged', 'pwr_req'])
+        self.assertEqual(db.count(), 4)
+        self.assertEqual(db.count(converged=None), 6)
+
+        res = db.query(['Mach_pod_max', 'pwr_req'], where={'Mach_c1_in': .7}, order_by='Mach_pod_max')
+        self.assertTrue(np.allclose(res['Mach_pod_max'], [.8, .85]))
+        self.assertTrue(np.allclose(res['pwr_req'], [70.8, 70.85]))
+
+        res = db.query(['pwr_req'], where={'Mach_pod_max': (.84, None)}, converged=False)
+        self.assertTrue(np.allclose(np.sort(res['pwr_req']), [65.9, 70.9]))
+        self.assertTrue(np.allclose(db.distinct('Mach_c1_in'), [.65, .7]))
+
+        #a new column leaves the old cases missing it
+        db.store([{'Mach_c1_in': .75, 'Mach_pod_max': .8, 'F_net': 10.}])
+        res = db.query(['Mach_c1_in', 'F_net'], order_by='Mach_c1_in')
+        self.assertTrue(np.all(np.isnan(res['F_net'][:-1])))
+        self.assertEqual(res['F_net'][-1], 10.)
+
+        self.assertRaises(KeyError, db.query, ['missing'])
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
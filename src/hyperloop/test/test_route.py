@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.route import R_EARTH, G, speed_envelope
+
+
+def arc_route(radius, spacing, length):
+    """a circular arc of the given radius, as lat, lon, elev points"""
+    theta = np.arange(0, length+spacing/2., spacing)/radius
+    x, y = radius*np.sin(theta), radius*(1-np.cos(theta))
+    lat = 35. + np.degrees(y/R_EARTH)
+    lon = -120. + np.degrees(x/(R_EARTH*np.cos(np.radians(lat))))
+    return np.c_[lat, lon, np.zeros(len(lat))]
+
+
+class RouteTestCase(unittest.TestCase):
+
+    def test_curve_limit(self):
+
+        route = arc_route(20e3, 10., 50e3)
+        env = speed_envelope(route, speed_max=500., accel_lateral=.5*G)
+        self.assertTrue(abs(env['length']-50e3) < 1e-4*50e3)
+        #v**2/R = accel_lateral away from the ends
+        mid = len(env['distance'])//2
+        self.assertTrue(abs(env['speed_limit'][mid] - np.sqrt(.5*G*20e3)) < 5e-3*np.sqrt(.5*G*20e3))
+
+        #the same envelope whatever the chunk size
+        env_chunked = speed_envelope(route, speed_max=500., accel_lateral=.5*G, chunk_size=777)
+        self.assertTrue(np.allclose(env_chunked['speed'], env['speed']))
+
+    def test_sparse_route(self):
+
+        #points every 2 km on a 200 km route, on a 100 m grid
+        route = arc_route(50e3, 2e3, 200e3)
+        env = speed_envelope(route, speed_max=500., resolution=100.)
+        #the grid covers the whole route, not just the bins with points in them
+        self.assertEqual(env['distance'][-1], env['length'])
+        self.assertTrue(abs(env['length']-200e3) < 1e-3*200e3)
+        self.assertEqual(len(env['distance']), int(np.ceil(env['length']/100.))+1)
+        #bins between the points take their neighbours' limit
+        self.assertTrue(np.allclose(env['speed_limit'][1:-1], np.sqrt(.5*G*50e3), rtol=1e-2))
+
+        #a straight line between two points, nothing but the top speed
+        route = arc_route(1e12, 200e3, 200e3)
+        env = speed_envelope(route, speed_max=300.)
+        self.assertEqual(len(route), 2)
+        self.assertTrue(abs(env['distance'][-1]-200e3) < 1.)
+        self.assertTrue(np.all(env['speed_limit'] == 300.))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.station_sim import StationSimulator, poisson_arrivals, DAY
+
+
+class StationSimulatorTestCase(unittest.TestCase):
+
+    def test_capacity(self):
+
+        #far more passengers than 6 pods can carry, every pod leaves full
+        sim = StationSimulator(num_pods=6)
+        arrivals = [poisson_arrivals(3000., 2*DAY, seed=i) for i in (0, 1)]
+        res = sim.run(arrivals)
+        self.assertTrue(abs(res['throughput']-res['capacity']) < .01*res['capacity'])
+        self.assertTrue(res['load_factor'] > .99)
+        self.assertTrue(res['unserved_0'] > 0)
+        #the waits of the passengers served fit in the run
+        self.assertTrue(0 < res['wait_mean_0'] < 2*DAY)
+
+        #the departure slots limit a big fleet instead
+        sim = StationSimulator(num_pods=200, headway_min=120.)
+        res = sim.run(arrivals)
+        self.assertEqual(res['capacity'], 2*sim.seats*3600./120.)
+        self.assertTrue(abs(res['throughput']-res['capacity']) < .01*res['capacity'])
+
+    def test_light_load(self):
+
+        sim = StationSimulator()
+        arrivals = [poisson_arrivals(300., DAY, seed=i) for i in (0, 1)]
+        res = sim.run(arrivals)
+        self.assertEqual(res['unserved_0'], 0)
+        self.assertEqual(res['passengers'], sum(a.sum() for a in arrivals))
+        #everybody is served, so Little's law holds exactly
+        self.assertTrue(abs(res['wait_mean_0'] - res['queue_mean_0']*DAY/arrivals[0].sum()) < 1e-9*res['wait_mean_0'])
+        self.assertTrue(res['wait_mean_0'] < sim.time_board_max + 2*sim.time_mission)
+
+
+if __name__ == "__main__":
+    unittest.main()
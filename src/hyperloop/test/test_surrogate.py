@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.surrogate import KrigingModel, PodSurrogate
+
+
+def training_data():
+    x1, x2 = np.meshgrid(np.linspace(.7, .9, 5), np.linspace(10., 14., 4))
+    X = np.column_stack((x1.ravel(), x2.ravel()))
+    Y = np.column_stack((100.*X[:, 0]**2 + X[:, 1], np.sin(5*X[:, 0])*X[:, 1]))
+    return X, Y
+
+
+class SurrogateTestCase(unittest.TestCase):
+
+    def test_training_points(self):
+
+        X, Y = training_data()
+        model = KrigingModel().fit(X, Y)
+        mean, std = model.predict(X)
+        #the kriging mean interpolates the training data (up to the nugget), 
+        #with almost no error there
+        scale = Y.std(axis=0)
+        self.assertTrue(np.all(np.abs(mean-Y) < 1e-3*scale))
+        self.assertTrue(np.all(std < 1e-2*scale))
+
+        mean, std_out = model.predict([[.75, 11.], [.95, 15.]])
+        self.assertAlmostEqual(mean[0, 0]/(100.*.75**2 + 11.), 1., 2)
+        #outside the training data the error estimate grows
+        self.assertTrue(np.all(std_out[1] > 10*std.max(axis=0)))
+
+    def test_pod_surrogate(self):
+
+        X, Y = training_data()
+        results = [{'Mach_pod_max': x[0], 'c1_PR_des': x[1], 'a': y[0], 'b': y[1], 'converged': True}
+                   for x, y in zip(X, Y)]
+        results.append({'Mach_pod_max': .8, 'c1_PR_des': 12., 'a': np.nan, 'b': 0., 'converged': False})
+        surr = PodSurrogate(('Mach_pod_max', 'c1_PR_des'), ('a', 'b')).fit(results)
+        self.assertEqual(len(surr._X), len(X))
+
+        mean, std = surr.predict({'Mach_pod_max': X[:, 0], 'c1_PR_des': X[:, 1]})
+        self.assertEqual(mean.keys(), ['a', 'b'])
+        self.assertTrue(np.all(np.abs(mean['a']-Y[:, 0]) < 1e-3*Y[:, 0].std()))
+        self.assertTrue(np.all(np.abs(mean['b']-Y[:, 1]) < 1e-3*Y[:, 1].std()))
+
+
+if __name__ == "__main__":
+    unittest.main()
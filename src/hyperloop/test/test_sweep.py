@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from hyperloop.sweep import design_grid, predict_state, _split
+
+
+class SweepTestCase(unittest.TestCase):
+
+    def test_design_grid(self):
+
+        points = design_grid([('Mach_c1_in', [.65, .7]), ('Mach_pod_max', [.8, .9, 1.])])
+        self.assertEqual(len(points), 6)
+        self.assertEqual(points[0].keys(), ['Mach_c1_in', 'Mach_pod_max'])
+        #the last axis varies fastest
+        self.assertEqual([p['Mach_pod_max'] for p in points[:3]], [.8, .9, 1.])
+        self.assertEqual([p['Mach_c1_in'] for p in points], [.65]*3 + [.7]*3)
+
+    def test_split(self):
+
+        points = range(10)
+        blocks = _split(points, 3)
+        self.assertEqual(len(blocks), 3)
+        #contiguous, in order, and nearly equal in size
+        self.assertEqual([p for block in blocks for p in block], points)
+        self.assertTrue(max(map(len, blocks)) - min(map(len, blocks)) <= 1)
+
+        #more blocks than points leaves some empty
+        blocks = _split(points[:2], 4)
+        self.assertEqual(sum(map(len, blocks)), 2)
+
+    def test_predict_state(self):
+
+        states = [np.array([1., 10.]), np.array([2., 20.]), np.array([3., 30.])]
+        #a quadratic through linear data is still linear
+        pred = predict_state([0., 1., 2.], states, 3.)
+        self.assertTrue(np.allclose(pred, [4., 40.]))
+        self.assertTrue(np.allclose(predict_state([0., 1., 2.], states, 3., order=0), [3., 30.]))
+        self.assertEqual(predict_state([], [], 1.), None)
+
+        #a point solved twice at the same location counts once
+        pred = predict_state([0., 1., 1.], states, 2.)
+        self.assertTrue(np.allclose(pred, [5., 50.]))
+        pred = predict_state([1., 1.], states[1:], 2.)
+        self.assertTrue(np.allclose(pred, [3., 30.]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import unittest
+from math import sqrt
+
+import numpy as np
+
+from hyperloop import thermo_tables
+from hyperloop.thermo_tables import AirTable, TabulatedFlowStation, G_C, J
+from hyperloop.tube_limit_flow import TubeLimitFlow, kantrowitz_limit
+
+try:
+    from pycycle.flowstation import FlowStation
+except ImportError:
+    FlowStation = None
+
+
+R = 53.35 #ft*lbf/(lbm*degR)
+
+
+def perfect_air(T, P, theta=None):
+    """thermally perfect air with a single vibrational mode at temperature
+    theta, or calorically perfect air (gamma 1.4) when theta is None"""
+    T = T[:, None]*np.ones((1, len(P)))
+    if theta is None:
+        Cp = 3.5*R/J*np.ones(T.shape)
+        h = Cp*T
+        s0 = Cp*np.log(T)
+    else:
+        x = theta/T
+        Cp = R/J*(3.5 + x**2*np.exp(x)/(np.exp(x)-1)**2)
+        h = R/J*(3.5*T + theta/(np.exp(x)-1))
+        s0 = R/J*(3.5*np.log(T) + x/(np.exp(x)-1) - np.log(1-np.exp(-x)))
+    return {
+        'ht': h,
+        's': s0 - R/J*np.log(P[None, :]),
+        'Cp': Cp,
+        'gamt': Cp/(Cp-R/J),
+        'rhot': 144*P[None, :]/(R*T),
+    }
+
+
+def synthetic_table(theta=5500., **kwargs):
+    """an AirTable generated from perfect_air instead of pycycle"""
+    generate_table = thermo_tables.generate_table
+    thermo_tables.generate_table = lambda T, P: perfect_air(T, P, theta)
+    try:
+        return AirTable(cache_dir=None, **kwargs)
+    finally:
+        thermo_tables.generate_table = generate_table
+
+
+class AirTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.table = synthetic_table()
+
+    def test_nodes(self):
+
+        table = self.table
+        T, P = np.meshgrid(table.T[::10], np.exp(table.log_P), indexing='ij')
+        p = table(T, P)
+        exact = perfect_air(table.T[::10], np.exp(table.log_P), 5500.)
+        self.assertTrue(np.allclose(p['h'], exact['ht'], rtol=1e-12))
+        self.assertTrue(np.allclose(p['s'], exact['s'], rtol=1e-12))
+        self.assertTrue(np.allclose(p['Cp'], exact['Cp'], rtol=1e-12))
+        self.assertTrue(np.allclose(p['gam'], exact['gamt'], rtol=1e-12))
+        self.assertTrue(np.allclose(p['R'], R, rtol=1e-12))
+
+    def test_slopes(self):
+
+        table = self.table
+        P = np.array([.05])
+        T = table.T[5:-5:20]
+        eps = 1e-3
+        exact = perfect_air(T, P, 5500.)
+        #the hermite slopes at the nodes are Cp and Cp/T
+        dh = (table(T+eps, P)['h'] - table(T-eps, P)['h'])/(2*eps)
+        ds = (table(T+eps, P)['s'] - table(T-eps, P)['s'])/(2*eps)
+        self.assertTrue(np.allclose(dh, exact['Cp'][:, 0], rtol=1e-6))
+        self.assertTrue(np.allclose(ds, exact['Cp'][:, 0]/T, rtol=1e-6))
+
+        #between the nodes the cubic stays close to the smooth curve
+        T_mid = table.T[:-1] + .5*table._dT
+        exact = perfect_air(T_mid, P, 5500.)
+        self.assertTrue(np.allclose(table(T_mid, P)['h'], exact['ht'][:, 0], rtol=1e-7))
+
+        #s is linear in log(P), so it is exact between the pressure nodes
+        P_mid = np.exp(table.log_P[:-1] + .5*table._dlog_P)
+        T = np.array([table.T[40]])
+        self.assertTrue(np.allclose(table(T, P_mid)['s'], perfect_air(T, P_mid, 5500.)['s'][0], rtol=1e-12))
+
+    def test_range(self):
+
+        self.assertRaises(ValueError, self.table, 300., 1.)
+        self.assertRaises(ValueError, self.table, 500., 200.)
+
+
+class TabulatedFlowStationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.table = synthetic_table()
+
+    def test_round_trip(self):
+
+        for Ts, Ps, MN in ((525.8, 0.01436, .9), (1000., 0.3, .5), (1700., 1.5, .6)):
+            fs = TabulatedFlowStation(self.table)
+            fs.setStaticTsPsMN(Ts, Ps, MN)
+            self.assertAlmostEqual(fs.Ts, Ts, 10)
+            self.assertAlmostEqual(fs.Vflow/fs.Vsonic, MN, 12)
+            #adiabatic and isentropic between the static and total states
+            self.assertAlmostEqual((fs.ht-fs.hs)/(fs.Vflow**2/(2*G_C*J)), 1., 8)
+            self.assertAlmostEqual(fs.s, self.table(fs.Ts, fs.Ps)['s'], 10)
+
+            #back again from the totals
+            fs2 = TabulatedFlowStation(self.table)
+            fs2.setTotalTP(fs.Tt, fs.Pt)
+            fs2.Mach = MN
+            self.assertAlmostEqual(fs2.Ts/Ts, 1., 8)
+            self.assertAlmostEqual(fs2.Ps/Ps, 1., 8)
+            self.assertAlmostEqual(fs2.Vflow/fs.Vflow, 1., 8)
+
+            #zero Mach gives the totals
+            fs2.Mach = 0.
+            self.assertEqual((fs2.Ts, fs2.Ps), (fs.Tt, fs.Pt))
+            self.assertEqual(fs2.Vflow, 0.)
+
+    def test_area(self):
+
+        for Tt, Pt, MN in ((540., 0.02, .3), (1000., 0.3, .6), (1700., 1.5, .95)):
+            fs = TabulatedFlowStation(self.table)
+            fs.W = 10.
+            fs.setTotalTP(Tt, Pt)
+            fs.Mach = MN
+            A = fs.area
+
+            #the same flow through the same area finds the same Mach
+            fs2 = TabulatedFlowStation(self.table)
+            fs2.W = 10.
+            fs2.setTotalTP(Tt, Pt)
+            fs2.area = A
+            self.assertAlmostEqual(fs2.Mach, MN, 8)
+            self.assertAlmostEqual(fs2.area/A, 1., 10)
+            self.assertAlmostEqual(fs2.Ps/fs.Ps, 1., 8)
+
+            #more flow than the area can pass at Mach 1
+            fs2.W = 20.
+            self.assertRaises(ValueError, setattr, fs2, 'area', A/2)
+
+    def test_calorically_perfect(self):
+
+        fs = TabulatedFlowStation(synthetic_table(theta=None))
+        fs.setStaticTsPsMN(525.8, 0.01436, .8)
+        self.assertAlmostEqual(fs.Tt/525.8, 1+.2*.8**2, 10)
+        self.assertAlmostEqual(fs.Pt/0.01436, (1+.2*.8**2)**3.5, 6)
+        self.assertAlmostEqual(fs.Vsonic, sqrt(1.4*R*G_C*525.8), 8)
+
+    @unittest.skipIf(FlowStation is None, "pycycle is not installed")
+    def test_flowstation(self):
+
+        table = AirTable(T_range=(360., 2000.), P_range=(1e-3, 10.), n_T=83, n_P=9, cache_dir=None)
+        fs = FlowStation()
+        tfs = TabulatedFlowStation(table)
+        for Ts, Ps, MN in ((525.8, 0.01436, .9), (1000., 0.3, .5), (1700., 1.5, .6)):
+            fs.setStaticTsPsMN(Ts, Ps, MN)
+            tfs.setStaticTsPsMN(Ts, Ps, MN)
+            for name in ('Tt', 'Pt', 'ht', 'gamt', 'rhos', 'Vflow'):
+                self.assertAlmostEqual(getattr(tfs, name)/getattr(fs, name), 1., 4)
+
+
+class TubeLimitFlowTablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._air_table = thermo_tables._air_table
+        thermo_tables._air_table = synthetic_table(theta=None)
+
+    def tearDown(self):
+        thermo_tables._air_table = self._air_table
+
+    def test_kantrowitz(self):
+
+        comp = TubeLimitFlow()
+        comp.radius_tube = 111.5
+        comp.radius_inlet = 73.7
+        comp.Ps_tube = 99.
+        comp.Ts_tube = 292.1
+        comp.Mach_pod = .8
+        comp.Mach_bypass = .95
+        comp.use_property_tables = True
+        comp.execute()
+        self.assertTrue(isinstance(comp.fs_tube, TabulatedFlowStation))
+
+        #calorically perfect tables give the closed form
+        res = kantrowitz_limit(111.5, 73.7, 99., 292.1, .8, .95)
+        for name in ('limit_Mach', 'limit_speed', 'W_tube', 'W_kant', 'W_excess'):
+            self.assertAlmostEqual(getattr(comp, name)/float(res[name]), 1., 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from math import pi, sqrt
+
+import numpy as np
+
+from hyperloop.isentropic import area_ratio
+from hyperloop.tube_limit_flow import kantrowitz_limit, R_AIR
+
+
+class KantrowitzLimitTestCase(unittest.TestCase):
+
+    def test_closed_form(self):
+
+        gam = 1.4
+        r_tube, r_inlet, Ps, Ts = 111.5, 73.7, 99., 292.1
+        res = kantrowitz_limit(r_tube, r_inlet, Ps, Ts, Mach_pod=.8, Mach_bypass=1.)
+
+        A_tube = pi*(r_tube/100.)**2
+        A_bypass = A_tube - pi*(r_inlet/100.)**2
+        #the limit Mach is where the tube to bypass area ratio is A/A*
+        limit_Mach = float(res['limit_Mach'])
+        self.assertTrue(limit_Mach < 1.)
+        self.assertAlmostEqual(area_ratio(limit_Mach, gam), A_tube/A_bypass, 9)
+        self.assertAlmostEqual(float(res['limit_speed']), limit_Mach*sqrt(gam*R_AIR*Ts), 6)
+
+        #tube demand flow rho*V*A
+        V = .8*sqrt(gam*R_AIR*Ts)
+        self.assertAlmostEqual(float(res['W_tube']), Ps/(R_AIR*Ts)*V*A_tube, 12)
+
+        #choked flow through the bypass at the tube total conditions
+        Tt = Ts*(1+.2*.8**2)
+        Pt = Ps*(1+.2*.8**2)**3.5
+        W_choked = Pt*A_bypass*sqrt(gam/(R_AIR*Tt))*((gam+1)/2.)**(-(gam+1)/(2*(gam-1)))
+        self.assertAlmostEqual(float(res['W_kant'])/W_choked, 1., 12)
+        self.assertAlmostEqual(float(res['W_excess']), float(res['W_tube']-res['W_kant']), 12)
+
+    def test_broadcast(self):
+
+        MN = np.linspace(.1, 1., 10)
+        res = kantrowitz_limit(np.array([[100.], [150.], [200.]]), 73.7, Mach_pod=MN)
+        self.assertEqual(res['W_kant'].shape, (3, 10))
+        #a bigger tube leaves more bypass area, so it chokes at a higher speed
+        self.assertTrue(np.all(np.diff(res['limit_Mach'][:, 0]) > 0))
+        #flow demand grows with the pod Mach, linearly
+        self.assertTrue(np.allclose(res['W_tube'][:, 1:]/res['W_tube'][:, :1], MN[1:]/MN[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
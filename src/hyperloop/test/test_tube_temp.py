@@ -1,9 +1,14 @@
 import unittest
 
+import numpy as np
+
 from openmdao.main.api import set_as_top, Assembly
 from openmdao.util.testutil import assert_rel_error
 from openmdao.lib.drivers.api import BroydenSolver
-from hyperloop.tube_wall_temp import TubeWallTemp
+from hyperloop.tube_wall_temp import TubeWallTemp, SB_CONSTANT, equilibrium_temperature, heat_balance
+from hyperloop.tube_route_temp import route_wall_temperature
+from hyperloop.tube_transient_temp import transient_wall_temperature
+from hyperloop.annual_climate import annual_run, synthetic_weather
 
 
 class TubeHeatBalance(Assembly):
@@ -54,6 +59,109 @@ class TubeWallTestCase(unittest.TestCase):
         assert_rel_error(self,test.tm.q_rad_tot,201533208, 0.02)
         assert_rel_error(self,test.tm.q_total_out,394673364., 0.02)
 
+    def test_steady_state_solve(self): 
+
+        tm = set_as_top(TubeWallTemp())
+        tm.nozzle_air.setTotalTP(1710, 0.304434211)
+        tm.nozzle_air.W = 1.08
+        tm.bearing_air.W = 0.
+        tm.diameter_outer_tube = 2.22504
+        tm.length_tube = 482803.
+        tm.num_pods = 34.
+        tm.temp_boundary = 340.
+        tm.temp_outside_ambient = 305.6
+        tm.solve_steady_state = True
+
+        tm.run()
+        assert_rel_error(self, tm.temp_equilibrium, 322.361, 0.001)
+        assert_rel_error(self, tm.ss_temp_residual, 340.-tm.temp_equilibrium, 1e-8)
+
+        #the component balance is zero at the equilibrium temperature
+        tm.temp_boundary = tm.temp_equilibrium
+        tm.run()
+        self.assertTrue(abs(tm.q_total_out-tm.q_total_in) < 1e-6*tm.q_total_out)
+
+    def test_equilibrium_batch(self): 
+
+        temp_ambient = np.linspace(250., 320., 8)
+        num_pods = np.array([[0.], [20.], [40.]])
+        temps = equilibrium_temperature(temp_ambient, num_pods, solar_insolation=800.)
+        self.assertEqual(temps.shape, (3, 8))
+
+        q_out, q_in, dq = heat_balance(temps, temp_ambient, num_pods, solar_insolation=800.)
+        self.assertTrue(np.all(np.abs(q_out-q_in) < 1e-6*q_out))
+        #more pods, hotter tube
+        self.assertTrue(np.all(np.diff(temps, axis=0) > 0))
+
+    def test_equilibrium_small_diameter(self): 
+
+        temp_ambient = np.array([250., 305.6])
+        for diameter in (.05, .1, .2): 
+            temps = equilibrium_temperature(temp_ambient, 34., solar_insolation=800., 
+                                            diameter_outer_tube=diameter)
+            q_out, q_in, dq = heat_balance(temps, temp_ambient, 34., solar_insolation=800., 
+                                           diameter_outer_tube=diameter)
+            self.assertTrue(np.all(np.abs(q_out-q_in) < 1e-6*q_out))
+
+    def test_route(self): 
+
+        #uniform conditions, nothing to conduct
+        res = route_wall_temperature(np.full(50, 305.6), 34./482803.)
+        self.assertTrue(np.allclose(res['temp_boundary'], res['temp_local'], rtol=1e-9))
+        self.assertTrue(np.allclose(res['temp_boundary'], equilibrium_temperature(305.6, 34./482803., 
+                                                                                 length_tube=1.)))
+
+        #a shaded stretch, conduction evens out the step
+        shading = np.where(np.arange(200) < 100, 0., .8)
+        res = route_wall_temperature(305.6, 34./482803., shading=shading)
+        T = res['temp_boundary']
+        T_local = res['temp_local']
+        self.assertTrue(T[99] < T_local[99] and T[100] > T_local[100])
+        #conduction only moves heat around, and closes every segment's balance
+        self.assertTrue(abs(np.sum(res['q_conduction'])) < 1e-6*np.max(np.abs(res['q_conduction'])))
+        q_out, q_in, dq = heat_balance(T, 305.6, 34./482803., 1000.*(1-shading), length_tube=1.)
+        self.assertTrue(np.allclose(q_out, q_in + res['q_conduction'], rtol=1e-9, atol=1e-9))
+
+    def test_transient(self): 
+
+        T_eq = equilibrium_temperature(305.6, 34., 1000.)
+        time = np.arange(0, 30*24*3600., 3600.)
+
+        #backward Euler settles on the steady state from either side
+        for temp_initial in (T_eq-20., T_eq+20.): 
+            res = transient_wall_temperature(time, temp_initial=temp_initial)
+            self.assertTrue(np.all(np.diff(np.abs(res['temp_boundary']-T_eq)) <= 1e-9))
+            assert_rel_error(self, res['temp_boundary'][-1], T_eq, 1e-6)
+
+        #and stays there, even with day long steps
+        res = transient_wall_temperature(np.arange(0, 10*86400., 86400.))
+        self.assertTrue(np.allclose(res['temp_boundary'], T_eq, rtol=1e-9))
+        self.assertTrue(np.allclose(res['q_total_in'], res['q_total_out'], rtol=1e-6))
+
+    def test_annual_run(self): 
+
+        weather = synthetic_weather()
+        res = annual_run(weather, length_tube=563270.)
+        self.assertEqual(len(res['temp_boundary']), 8760)
+        hour = 4000
+        assert_rel_error(self, res['temp_boundary'][hour], equilibrium_temperature(
+            weather['temp_outside_ambient'][hour], solar_insolation=weather['solar_insolation'][hour], 
+            length_tube=563270.), 1e-9)
+
+        #tube arguments are passed through, sb_constant included
+        res_sb = annual_run(weather, length_tube=563270., sb_constant=2*SB_CONSTANT)
+        self.assertTrue(np.all(res_sb['temp_boundary'] < res['temp_boundary']))
+
+    def test_balance_args_before_run(self): 
+
+        tm = set_as_top(TubeWallTemp())
+        tm.nozzle_air.setTotalTP(1710, 0.304434211)
+        tm.nozzle_air.W = 1.08
+        tm.bearing_air.W = 0.
+        args = tm.balance_args(num_pods=0.)
+        assert_rel_error(self, args['temp_pod_exhaust'], 950., 1e-3)
+        self.assertEqual(args['num_pods'], 0.)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""
+    thermo_tables.py -
+        Tabulated air properties as a faster stand in for pycycle FlowStation
+        state setting. Enthalpy, entropy, Cp, gamma and density are generated
+        once from FlowStation.setTotalTP on a (T, log P) grid and cached on
+        disk. Lookups use cubic Hermite interpolation in temperature (the
+        tabulated Cp gives the exact slopes of h and s) and linear
+        interpolation in log pressure.
+
+        Everything is in the pycycle units: degR, psi, Btu/lbm, ft/s, lbm.
+"""
+import os
+import hashlib
+from math import sqrt, log
+
+import numpy as np
+
+from hyperloop.case_cache import DEFAULT_CACHE_DIR
+from hyperloop.isentropic import lookup_mach
+
+
+G_C = 32.174 #lbm*ft/(lbf*s**2)
+J = 778.169 #ft*lbf/Btu
+
+#properties stored in the table, in FlowStation attribute names
+PROPERTIES = ('ht', 's', 'Cp', 'gamt', 'rhot')
+
+
+def _pycycle_version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('pycycle').version
+    except Exception:
+        return 'unknown'
+
+
+def generate_table(T, P):
+    """properties from pycycle at every (T, P) grid point, shape (len(T), len(P))"""
+    from pycycle.flowstation import FlowStation
+
+    data = dict((name, np.empty((len(T), len(P)))) for name in PROPERTIES)
+    fs = FlowStation()
+    for i, Tt in enumerate(T):
+        for j, Pt in enumerate(P):
+            fs.setTotalTP(Tt, Pt)
+            for name in PROPERTIES:
+                data[name][i, j] = getattr(fs, name)
+    return data
+
+
+class AirTable(object):
+    """Air properties on a regular grid in T and log(P)
+
+    T_range: (low, high) temperature, degR
+    P_range: (low, high) pressure, psi
+    cache_dir: where generated tables are kept, None to skip the disk cache
+    """
+
+    def __init__(self, T_range=(360., 3600.), P_range=(1e-3, 100.), n_T=181, n_P=11,
+                 cache_dir=DEFAULT_CACHE_DIR):
+        self.T = np.linspace(T_range[0], T_range[1], n_T)
+        self.log_P = np.linspace(log(P_range[0]), log(P_range[1]), n_P)
+        self._dT = self.T[1]-self.T[0]
+        self._dlog_P = self.log_P[1]-self.log_P[0]
+
+        key = hashlib.sha1(repr((T_range, P_range, n_T, n_P, _pycycle_version()))).hexdigest()
+        filename = None
+        if cache_dir is not None:
+            filename = os.path.join(cache_dir, 'thermo', 'air_%s.npz'%key[:16])
+
+        data = None
+        if filename is not None and os.path.exists(filename):
+            try:
+                with np.load(filename) as stored:
+                    data = dict((name, stored[name]) for name in PROPERTIES)
+            except (IOError, ValueError, KeyError):
+                data = None
+        if data is None:
+            data = generate_table(self.T, np.exp(self.log_P))
+            if filename is not None:
+                self._save(filename, data)
+        self.data = data
+
+        #specific gas constant, ft*lbf/(lbm*degR)
+        P = np.exp(self.log_P)
+        self.data['R'] = 144*P[None, :]/(data['rhot']*self.T[:, None])
+
+    def _save(self, filename, data):
+        directory = os.path.dirname(filename)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError: #another process got there first
+                pass
+        #write then rename, so other processes never load a partial table
+        tmp = '%s.%d.tmp.npz'%(filename[:-4], os.getpid())
+        np.savez(tmp, **data)
+        os.rename(tmp, filename)
+
+    def __call__(self, T, P):
+        """OrderedDict-like dict of h, s, Cp, gam, rho and R arrays at (T, P)"""
+
+        T = np.asarray(T, dtype=float)
+        log_P = np.log(np.asarray(P, dtype=float))
+        if np.any(T < self.T[0]) or np.any(T > self.T[-1]):
+            raise ValueError("temperature outside of the property table (%g to %g degR)"%(self.T[0], self.T[-1]))
+        if np.any(log_P < self.log_P[0]-1e-12) or np.any(log_P > self.log_P[-1]+1e-12):
+            raise ValueError("pressure outside of the property table (%g to %g psi)"%(
+                np.exp(self.log_P[0]), np.exp(self.log_P[-1])))
+
+        x = (T-self.T[0])/self._dT
+        i = np.clip(x.astype(int), 0, len(self.T)-2)
+        t = x-i
+        y = (log_P-self.log_P[0])/self._dlog_P
+        j = np.clip(y.astype(int), 0, len(self.log_P)-2)
+        u = y-j
+
+        def linear(table):
+            return (1-t)*((1-u)*table[i, j]+u*table[i, j+1]) + t*((1-u)*table[i+1, j]+u*table[i+1, j+1])
+
+        #cubic hermite basis, slopes scaled by the grid spacing
+        h00 = (1+2*t)*(1-t)**2
+        h10 = t*(1-t)**2*self._dT
+        h01 = t**2*(3-2*t)
+        h11 = t**2*(t-1)*self._dT
+
+        def hermite(table, slope):
+            lo = h00*table[i, j]+h10*slope[i, j]+h01*table[i+1, j]+h11*slope[i+1, j]
+            hi = h00*table[i, j+1]+h10*slope[i, j+1]+h01*table[i+1, j+1]+h11*slope[i+1, j+1]
+            return (1-u)*lo+u*hi
+
+        Cp = self.data['Cp']
+        R = linear(self.data['R'])
+        return {
+            'h': hermite(self.data['ht'], Cp),
+            's': hermite(self.data['s'], Cp/self.T[:, None]),
+            'Cp': linear(Cp),
+            'gam': linear(self.data['gamt']),
+            'R': R,
+            'rho': 144*np.exp(log_P)/(R*T),
+        }
+
+
+_air_table = None
+
+def air_table():
+    """the default AirTable, shared by the whole process"""
+    global _air_table
+    if _air_table is None:
+        _air_table = AirTable()
+    return _air_table
+
+
+class TabulatedFlowStation(object):
+    """The subset of the pycycle FlowStation interface used by the hyperloop
+    components (setTotalTP, setStaticTsPsMN, the Mach and area setters and 
+    the total and static properties), backed by an AirTable. Only valid for 
+    air."""
+
+    def __init__(self, table=None):
+        self.table = table or air_table()
+        self.W = 0.
+        self._Mach = 0.
+
+    def _props(self, T, P):
+        p = self.table(T, P)
+        return dict((name, float(value)) for name, value in p.iteritems())
+
+    def _set_total(self, Tt, Pt):
+        self.Tt = Tt
+        self.Pt = Pt
+        p = self._props(Tt, Pt)
+        self.ht = p['h']
+        self.s = p['s']
+        self.Cp = p['Cp']
+        self.gamt = p['gam']
+        self.rhot = p['rho']
+
+    def _set_static(self, Ts, Ps, p=None):
+        self.Ts = Ts
+        self.Ps = Ps
+        if p is None:
+            p = self._props(Ts, Ps)
+        self.hs = p['h']
+        self.Cps = p['Cp']
+        self.gams = p['gam']
+        self.rhos = p['rho']
+        self.Vsonic = sqrt(p['gam']*p['R']*G_C*Ts)
+        self.Vflow = self._Mach*self.Vsonic
+
+    def _isentropic_P(self, T, s, P_guess):
+        """pressure at temperature T with entropy s, Newton on log(P)"""
+        log_P = log(P_guess)
+        for it in xrange(20):
+            p = self._props(T, np.exp(log_P))
+            step = (p['s']-s)/(-p['R']/J)
+            log_P -= step
+            if abs(step) < 1e-12:
+                break
+        return np.exp(log_P), self._props(T, np.exp(log_P))
+
+    def setTotalTP(self, Tt, Pt):
+        self._set_total(Tt, Pt)
+        self._solve_static()
+
+    def setStaticTsPsMN(self, Ts, Ps, MN):
+        self._Mach = MN
+        p = self._props(Ts, Ps)
+        self._set_static(Ts, Ps, p)
+
+        #total enthalpy, then the total temperature on the same isentrope
+        ht = p['h'] + self.Vflow**2/(2*G_C*J)
+        Tt = Ts*(1+(p['gam']-1)/2*MN**2)
+        for it in xrange(20):
+            Pt, pt = self._isentropic_P(Tt, p['s'], Ps)
+            step = (pt['h']-ht)/pt['Cp']
+            Tt -= step
+            if abs(step) < 1e-10*Tt:
+                break
+        Pt, pt = self._isentropic_P(Tt, p['s'], Pt)
+        self._set_total(Tt, Pt)
+
+    def _solve_static(self):
+        """static state from the totals and Mach"""
+        M = self._Mach
+        if M == 0:
+            self._set_static(self.Tt, self.Pt)
+            return
+
+        Ts = self.Tt/(1+(self.gamt-1)/2*M**2)
+        Ps = self.Pt
+        for it in xrange(20):
+            Ps, p = self._isentropic_P(Ts, self.s, Ps)
+            V2 = M**2*p['gam']*p['R']*G_C*Ts
+            res = self.ht - p['h'] - V2/(2*G_C*J)
+            step = res/(p['Cp'] + M**2*p['gam']*p['R']/(2*J))
+            Ts += step
+            if abs(step) < 1e-10*Ts:
+                break
+        Ps, p = self._isentropic_P(Ts, self.s, Ps)
+        self._set_static(Ts, Ps, p)
+
+    @property
+    def Mach(self):
+        return self._Mach
+
+    @Mach.setter
+    def Mach(self, MN):
+        self._Mach = MN
+        self._solve_static()
+
+    @property
+    def area(self):
+        """flow area for the current mass flow, in**2"""
+        return 144*self.W/(self.rhos*self.Vflow)
+
+    @area.setter
+    def area(self, A):
+        #subsonic Mach that passes the current mass flow through A, started 
+        #from the area-Mach table at the sonic area and finished with Newton 
+        #steps on the perfect gas slope
+        self.Mach = 1.
+        ratio = A/self.area
+        if ratio < 1.:
+            raise ValueError("area of %g in**2 is below the sonic area for W=%g lbm/s"%(A, self.W))
+        MN = float(lookup_mach(ratio, self.gamt))
+        for it in xrange(20):
+            self.Mach = MN
+            A_MN = self.area
+            dA = A_MN*(MN**2-1)/(MN*(1+(self.gams-1)/2*MN**2))
+            step = (A_MN-A)/dA
+            MN = min(MN-step, 1.)
+            if abs(step) < 1e-12:
+                break
+        self.Mach = MN
+
+
+if __name__ == "__main__":
+    import time
+    from pycycle.flowstation import FlowStation
+
+    start = time.time()
+    table = air_table()
+    print "table ready in %.2f s"%(time.time()-start)
+
+    fs = FlowStation()
+    tfs = TabulatedFlowStation()
+    for Ts, Ps, MN in ((525.8, 0.01436, .9), (1000., 0.3, .5), (1700., 1.5, .6)):
+        fs.setStaticTsPsMN(Ts, Ps, MN)
+        tfs.setStaticTsPsMN(Ts, Ps, MN)
+        print "Ts=%6.1f Ps=%7.4f MN=%3.1f:"%(Ts, Ps, MN),
+        for name in ('Tt', 'Pt', 'ht', 'gamt', 'rhos', 'Vflow'):
+            print "%s %.2e"%(name, abs(getattr(tfs, name)/getattr(fs, name)-1)),
+        print
@@ -0,0 +1,130 @@
+"""
+    trajectory.py -
+        Time domain integration of pod speed profiles. From a speed history
+        it computes the distance covered, the acceleration, the aerodynamic
+        drag and the propulsive power the tube's linear motors have to
+        supply, the onboard (compressor and bearing) power, and the
+        cumulative energies. Everything is vectorized over time steps and
+        over any number of profiles at once (the leading axes).
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+
+#speed profile data from hyperloop alpha proposal, pg 43 (s, mph)
+PROPOSAL_PROFILE = np.array([[0,0],
+    [12.5, 300],
+    [165, 300],
+    [182, 555],
+    [427, 555],
+    [444, 760],
+    [1660, 760],
+    [1670, 555],
+    [1756, 555],
+    [1765, 300],
+    [2112, 299],
+    [2132, 0]])
+
+
+def normalized_profile(profile=PROPOSAL_PROFILE):
+    """profile scaled to unit time and unit top speed"""
+    profile = np.array(profile, dtype=float)
+    profile[:, 0] /= profile[:, 0].max()
+    profile[:, 1] /= profile[:, 1].max()
+    return profile
+
+
+def speed_fraction(profile=PROPOSAL_PROFILE):
+    """average speed of a profile as a fraction of its top speed"""
+    norm = normalized_profile(profile)
+    return np.trapz(norm[:, 1], norm[:, 0])
+
+
+def scale_profile(speed_max, tube_length, profile=PROPOSAL_PROFILE, n_steps=500):
+    """Stretches the shape of `profile` to the given top speed (m/s) and a
+    trip of tube_length (m). speed_max and tube_length broadcast against
+    each other, giving one profile per element.
+
+    Returns (time, speed) arrays with n_steps time steps on the last axis.
+    The profile's corners are always included, so integrals over the
+    piecewise linear profile are exact"""
+
+    norm = normalized_profile(profile)
+    t_norm = np.union1d(np.linspace(0, 1, n_steps-len(norm)+2), norm[:, 0])
+    v_norm = np.interp(t_norm, norm[:, 0], norm[:, 1])
+
+    speed_max = np.asarray(speed_max, dtype=float)[..., None]
+    trip_time = np.asarray(tube_length, dtype=float)[..., None]/(speed_max*speed_fraction(profile))
+    return t_norm*trip_time, v_norm*speed_max
+
+
+def _cumtrapz(y, x):
+    out = np.zeros(np.broadcast(y, x).shape)
+    out[..., 1:] = np.cumsum(.5*(y[..., 1:]+y[..., :-1])*np.diff(x, axis=-1), axis=-1)
+    return out
+
+
+def drag_force(speed, coef_drag=2., rho=.00118, area_capsule=1.8):
+    """aerodynamic drag (N) of the capsule: .5*Cd*rho*V**2*A, area in m**2"""
+    return .5*coef_drag*rho*speed**2*area_capsule
+
+
+def fly_profile(time, speed, coef_drag=2., rho=.00118, area_capsule=1.8, mass_pod=15000.,
+                pwr_compressor=420., pwr_bearing=0.):
+    """Integrates speed histories in time.
+
+    time, speed: arrays (s, m/s), time steps along the last axis and any
+        number of profiles along the leading axes
+    pwr_compressor: onboard compressor power (kW), a constant or a function
+        of speed (a power curve)
+    pwr_bearing: air bearing power (kW), a constant or a function of speed
+
+    Returns an OrderedDict of arrays with the shape of speed: distance (m),
+    acceleration (m/s**2), drag (N), pwr_propulsion (kW, drag plus inertia,
+    supplied by the tube), pwr_onboard (kW, compressor plus bearings),
+    energy (kW*h, cumulative onboard) and energy_propulsion (kW*h)
+    """
+
+    time = np.asarray(time, dtype=float)
+    speed = np.asarray(speed, dtype=float)
+    time, speed = np.broadcast_arrays(time, speed)
+
+    distance = _cumtrapz(speed, time)
+    acceleration = np.gradient(speed, axis=-1)/np.gradient(time, axis=-1)
+    drag = drag_force(speed, coef_drag, rho, area_capsule)
+    pwr_propulsion = (drag + mass_pod*acceleration)*speed/1000.
+
+    pwr_onboard = np.zeros(speed.shape)
+    for pwr in (pwr_compressor, pwr_bearing):
+        pwr_onboard += pwr(speed) if callable(pwr) else pwr
+
+    return OrderedDict([
+        ('time', time),
+        ('speed', speed),
+        ('distance', distance),
+        ('acceleration', acceleration),
+        ('drag', drag),
+        ('pwr_propulsion', pwr_propulsion),
+        ('pwr_onboard', pwr_onboard),
+        ('energy', _cumtrapz(pwr_onboard, time)/3600.),
+        ('energy_propulsion', _cumtrapz(pwr_propulsion, time)/3600.),
+    ])
+
+
+if __name__ == "__main__":
+    import time as timer
+
+    #1000 variants of top speed and trip length
+    speed_max = np.linspace(250, 340, 1000)
+    tube_length = 563270.*np.linspace(.9, 1.1, 1000)
+
+    start = timer.time()
+    t, v = scale_profile(speed_max, tube_length)
+    res = fly_profile(t, v, pwr_compressor=lambda v: 420.*(v/308.)**3)
+    print "%d profiles x %d steps in %.3f s"%(t.shape[0], t.shape[1], timer.time()-start)
+
+    for i in (0, 500, 999):
+        print "speed_max %5.1f m/s: trip %6.1f s, %7.1f km, onboard energy %6.1f kW*h, propulsion %6.1f kW*h"%(
+            speed_max[i], t[i, -1], res['distance'][i, -1]/1000., res['energy'][i, -1],
+            res['energy_propulsion'][i, -1])
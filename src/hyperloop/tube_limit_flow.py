@@ -1,13 +1,23 @@
 from math import pi
+from collections import OrderedDict
+
 import numpy as np
 
 import pylab as p
 
 from openmdao.main.api import Component
 from openmdao.main.api import convert_units as cu
-from openmdao.lib.datatypes.api import Float
+from openmdao.lib.datatypes.api import Float, Bool
+
+from pycycle.flowstation import FlowStation
+
+from hyperloop.isentropic import lookup_mach
+from hyperloop.thermo_tables import TabulatedFlowStation
+
+#calorically perfect air for the vectorized calculations
+GAM_AIR = 1.4
+R_AIR = 287.05 #J/(kg*K)
 
-from pycycle.flowstation import FlowStation, secant
 
 class TubeLimitFlow(Component): 
     """Finds the limit velocity for a body traveling through a tube"""
@@ -18,6 +28,7 @@ class TubeLimitFlow(Component):
     Ts_tube = Float(292.1, iotype="in", desc="static temperature in the tube", units="degK")
     Mach_pod = Float(1.0, iotype="in", desc="travel Mach of the pod")
     Mach_bypass = Float(.95, iotype="in", desc="Mach in the air passing around the pod")
+    use_property_tables = Bool(False, iotype="in", desc="use tabulated air properties instead of the full pycycle thermo")
     #Outputs
     limit_speed = Float(iotype="out", desc="pod travel speed where flow choking occurs", units="m/s")
     limit_Mach = Float(iotype="out", desc="pod travel Mach number where flow choking occurs")
@@ -28,7 +39,10 @@ class TubeLimitFlow(Component):
 
     def execute(self):
 
-    	fs_tube = self.fs_tube = FlowStation()
+        if self.use_property_tables: 
+            fs_tube = self.fs_tube = TabulatedFlowStation()
+        else: 
+            fs_tube = self.fs_tube = FlowStation()
 
         tube_rad = cu(self.radius_tube,'cm','ft') #convert to ft
         inlet_rad = cu(self.radius_inlet,'cm','ft')
@@ -42,19 +56,9 @@ class TubeLimitFlow(Component):
 
         area_ratio_target = self._tube_area/self._bypass_area
 
-        #iterate over pod speed until the area ratio = A_tube / A_bypass
-        def f(m_guess): 
-            fs_tube.setStaticTsPsMN(self._Ts, self._Ps , m_guess) #set the static conditions iteratively until correct (Ts, Ps are known)
-            gam = fs_tube.gamt
-            g_exp = (gam+1)/(2*(gam-1))
-            ar = ((gam+1)/2)**(-1*g_exp)*((1+ (gam-1)/2*m_guess**2)**g_exp)/m_guess
-            return ar - area_ratio_target
-        #Solve for Mach where AR = AR_target
-        self.limit_Mach = secant(f, .3, x_min=0, x_max=1) #value not actually needed, fs_tube contains necessary flow information
-        self.limit_speed = cu(fs_tube.Vflow,'ft','m') #convert to meters/second
-        
         #excess mass flow calculation
         fs_tube.setStaticTsPsMN(self._Ts, self._Ps, self.Mach_pod)
+        self._gam = fs_tube.gamt
         self.W_tube = cu(fs_tube.rhos*fs_tube.Vflow*self._tube_area,'lbm','kg') #convert to kg/sec
 
         fs_tube.Mach = self.Mach_bypass #Kantrowitz flow is at these total conditions, but with Mach 1
@@ -63,27 +67,96 @@ class TubeLimitFlow(Component):
 
         self.W_excess = self.W_tube - self.W_kant
 
+        #Mach where AR = A_tube / A_bypass, from the area-Mach table. The 
+        #first lookup uses gamma at the pod conditions, one more flow station 
+        #evaluation at that Mach gives gamma at the limit conditions
+        m_guess = lookup_mach(area_ratio_target, self._gam)
+        fs_tube.setStaticTsPsMN(self._Ts, self._Ps, m_guess)
+        self.limit_Mach = lookup_mach(area_ratio_target, fs_tube.gamt)
+        #same static state, so the speed of sound doesn't change
+        self.limit_speed = cu(fs_tube.Vflow*self.limit_Mach/m_guess,'ft','m') #convert to meters/second
+
         #self.mu_air = self.fs_tube.mu/0.671968975
 
+    def list_deriv_vars(self): 
+        return ('radius_tube', 'radius_inlet', 'Ps_tube', 'Ts_tube', 'Mach_pod', 'Mach_bypass'), \
+            ('W_tube', 'W_kant', 'W_excess')
+
+    def provideJ(self): 
+        """partials of the mass flows, treating the tube air as a calorically 
+        perfect gas at the tube gamma. Both flows scale with Ps/sqrt(Ts)"""
+
+        gam = self._gam
+        k = (gam-1)/2.
+        r_tube = self.radius_tube
+        r_inlet = self.radius_inlet
+        M_pod = self.Mach_pod
+        M_bypass = self.Mach_bypass
+        W_tube = self.W_tube
+        W_kant = self.W_kant
+        r_sq_bypass = r_tube**2 - r_inlet**2
+
+        dW_tube = np.array([2*W_tube/r_tube, 0., W_tube/self.Ps_tube, 
+            -W_tube/(2*self.Ts_tube), W_tube/M_pod, 0.])
+        #the bypass flow is at the tube total conditions
+        dW_kant = np.array([2*W_kant*r_tube/r_sq_bypass, -2*W_kant*r_inlet/r_sq_bypass, 
+            W_kant/self.Ps_tube, -W_kant/(2*self.Ts_tube), 
+            W_kant*(gam+1)/2.*M_pod/(1+k*M_pod**2), 
+            W_kant*(1-M_bypass**2)/(M_bypass*(1+k*M_bypass**2))])
+
+        return np.vstack((dW_tube, dW_kant, dW_tube-dW_kant))
+
+
+def kantrowitz_limit(radius_tube, radius_inlet, Ps_tube=99., Ts_tube=292.1, Mach_pod=1., 
+                     Mach_bypass=.95, gam=GAM_AIR): 
+    """Array version of TubeLimitFlow. All arguments broadcast against each 
+    other, in the TubeLimitFlow units (cm, Pa, degK). The air is treated as 
+    calorically perfect with ratio of specific heats `gam`. 
+
+    Returns an OrderedDict with limit_Mach, limit_speed (m/s), W_tube, 
+    W_kant and W_excess (kg/s)"""
+
+    radius_tube, radius_inlet, Ps, Ts, Mach_pod, Mach_bypass = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (radius_tube, radius_inlet, Ps_tube, Ts_tube, Mach_pod, Mach_bypass)])
+    k = (gam-1)/2.
+    p_exp = gam/(gam-1)
+
+    tube_area = pi*(radius_tube/100.)**2 #m**2
+    bypass_area = tube_area - pi*(radius_inlet/100.)**2 
+
+    limit_Mach = lookup_mach(tube_area/bypass_area, gam)
+    sound_speed = np.sqrt(gam*R_AIR*Ts)
+
+    W_tube = Ps/(R_AIR*Ts)*Mach_pod*sound_speed*tube_area
+
+    #Kantrowitz flow is at the tube total conditions, but with the bypass Mach
+    Tt = Ts*(1+k*Mach_pod**2)
+    Pt = Ps*(1+k*Mach_pod**2)**p_exp
+    Ts_bypass = Tt/(1+k*Mach_bypass**2)
+    Ps_bypass = Pt/(1+k*Mach_bypass**2)**p_exp
+    W_kant = Ps_bypass/(R_AIR*Ts_bypass)*Mach_bypass*np.sqrt(gam*R_AIR*Ts_bypass)*bypass_area
+
+    return OrderedDict([
+        ('limit_Mach', limit_Mach), 
+        ('limit_speed', limit_Mach*sound_speed), 
+        ('W_tube', W_tube), 
+        ('W_kant', W_kant), 
+        ('W_excess', W_tube - W_kant), 
+    ])
+
 
 def plot_data(comp, c='b'):
     """utility function to make the Kantrowitz Limit Plot""" 
 
-    MN = []
-    W_tube = []
-    W_kant = []
-
-    for m in np.arange(.1,1.1,.1): 
-        comp.Mach_pod = m
-        comp.run()
-        #print comp.radius_tube, comp.Mach_pod, comp.W_tube, comp.W_kant, comp.W_excess
-
-        MN.append(m)
-        W_kant.append(comp.W_kant)
-        W_tube.append(comp.W_tube)
+    MN = np.arange(.1,1.1,.1)
+    res = kantrowitz_limit(comp.radius_tube, comp.radius_inlet, comp.Ps_tube, comp.Ts_tube, 
+                           MN, comp.Mach_bypass)
+    W_tube = res['W_tube']
+    W_kant = res['W_kant']
+    area_ratio = (comp.radius_tube/comp.radius_inlet)**2
 
-    fig = p.plot(MN,W_tube, '-', label="%3.1f Req."%(comp._tube_area/comp._inlet_area), lw=3, c=c)
-    p.plot(MN,W_kant, '--', label="%3.1f Limit"%(comp._tube_area/comp._inlet_area),   lw=3, c=c)
+    fig = p.plot(MN,W_tube, '-', label="%3.1f Req."%area_ratio, lw=3, c=c)
+    p.plot(MN,W_kant, '--', label="%3.1f Limit"%area_ratio,   lw=3, c=c)
     #p.legend(loc="best")
     p.tick_params(axis='both', which='major', labelsize=15)
     p.xlabel('Pod Mach Number', fontsize=18)
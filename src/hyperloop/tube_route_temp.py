@@ -0,0 +1,114 @@
+"""
+    tube_route_temp.py -
+        Steady state tube wall temperature resolved along the route. The tube
+        is split into short segments, each with its own ambient temperature,
+        shading and pod heat. Segments exchange heat with their neighbours by
+        conduction along the steel wall. Each segment's balance uses the
+        TubeWallTemp correlations (heat_balance), and the coupled system is
+        solved by Newton's method with a tridiagonal (banded) Jacobian.
+"""
+from math import pi
+from collections import OrderedDict
+
+import numpy as np
+from scipy.linalg import solve_banded
+
+from hyperloop.tube_wall_temp import SB_CONSTANT, heat_balance, equilibrium_temperature
+from hyperloop.geometry.tube_structure import THICKNESS_RATIO
+
+
+CONDUCTIVITY_STEEL = 45. #W/(m*K)
+
+
+def route_wall_temperature(temp_outside_ambient, pod_density=34./482803., solar_insolation=1000.,
+                           shading=0., segment_length=10., diameter_outer_tube=2.23, WCp_pod=563.,
+                           temp_pod_exhaust=950., nn_incidence_factor=.7, surface_reflectance=.5,
+                           emissivity_tube=.5, conductivity_wall=CONDUCTIVITY_STEEL,
+                           tol=1e-9, max_iter=50):
+    """Wall temperature of every segment along the route. The per segment
+    inputs are arrays (or scalars, for values that are the same everywhere),
+    with one entry per segment. The route ends are adiabatic.
+
+    pod_density: pods per meter of tube in each segment (heat deposition)
+    shading: fraction of the sunlight blocked in each segment
+    segment_length: length of each segment, m
+
+    Returns an OrderedDict of per segment arrays: temp_boundary,
+    temp_local (the equilibrium without axial conduction) and q_conduction
+    (net heat conducted into each segment, W/m), plus the number of Newton
+    iterations used.
+    """
+
+    T_amb = np.atleast_1d(np.asarray(temp_outside_ambient, dtype=float))
+    n = max(T_amb.size, *[np.size(x) for x in (pod_density, solar_insolation, shading,
+                                              diameter_outer_tube, temp_pod_exhaust)])
+    T_amb = np.broadcast_to(T_amb, (n,))
+    insolation = np.broadcast_to(np.asarray(solar_insolation, dtype=float)*(1-np.asarray(shading)), (n,))
+
+    balance_args = dict(temp_outside_ambient=T_amb, num_pods=pod_density, solar_insolation=insolation,
+                        diameter_outer_tube=diameter_outer_tube, length_tube=1., WCp_pod=WCp_pod,
+                        temp_pod_exhaust=temp_pod_exhaust, nn_incidence_factor=nn_incidence_factor,
+                        surface_reflectance=surface_reflectance, emissivity_tube=emissivity_tube)
+
+    #conductance between neighbouring segments, thin steel shell
+    thickness = diameter_outer_tube/2.*THICKNESS_RATIO
+    wall_area = pi*diameter_outer_tube*thickness
+    G = np.broadcast_to(conductivity_wall*wall_area/segment_length**2, (n,)) #W/(m*K)
+    G_face = .5*(G[1:]+G[:-1]) if n > 1 else np.zeros(0)
+
+    def conduction(T):
+        q = np.zeros(n)
+        if n > 1:
+            flow = G_face*(T[1:]-T[:-1]) #into segment i from i+1
+            q[:-1] += flow
+            q[1:] -= flow
+        return q
+
+    #without conduction every segment is independent, which is a close start
+    T_local = equilibrium_temperature(**balance_args)
+    T = np.array(T_local, dtype=float, ndmin=1)
+
+    ab = np.zeros((3, n))
+    for i in xrange(max_iter):
+        q_out, q_in, dq_dT = heat_balance(T, **balance_args)
+        q_cond = conduction(T)
+        res = q_out - q_in - q_cond
+
+        ab[1] = dq_dT
+        if n > 1:
+            ab[1, :-1] += G_face
+            ab[1, 1:] += G_face
+            ab[0, 1:] = -G_face
+            ab[2, :-1] = -G_face
+        step = solve_banded((1, 1), ab, res)
+        T -= step
+        if np.max(np.abs(step)) <= tol*np.max(T):
+            break
+
+    return OrderedDict([
+        ('temp_boundary', T),
+        ('temp_local', T_local),
+        ('q_conduction', conduction(T)),
+        ('iterations', i+1),
+    ])
+
+
+if __name__ == "__main__":
+    import time
+
+    length = 563270. #m
+    dx = 10.
+    x = np.arange(0, length, dx) + dx/2.
+
+    #hotter inland, a shaded stretch, and denser traffic near the stations
+    temp_ambient = 300. + 8.*np.sin(pi*x/length)
+    shading = np.where((x > 200e3) & (x < 230e3), .8, 0.)
+    pod_density = 34./length*(1 + 2*np.exp(-(x/20e3)**2) + 2*np.exp(-((length-x)/20e3)**2))
+
+    start = time.time()
+    res = route_wall_temperature(temp_ambient, pod_density, shading=shading, segment_length=dx)
+    print "%d segments solved in %.2f s (%d Newton iterations)"%(len(x), time.time()-start, res['iterations'])
+
+    T = res['temp_boundary']
+    print "wall temperature: min %.2f K, max %.2f K"%(T.min(), T.max())
+    print "largest axial conduction effect: %.3f K"%np.max(np.abs(T-res['temp_local']))
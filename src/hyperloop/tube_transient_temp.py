@@ -0,0 +1,157 @@
+"""
+    tube_transient_temp.py -
+        Time response of the (lumped) tube wall temperature to changing pod
+        traffic, ambient temperature and sunlight. The TubeWallTemp heat
+        terms drive the thermal mass of the steel wall, integrated with
+        backward Euler, so time steps of minutes to hours stay stable.
+        Every step can be streamed to a ColumnarCaseRecorder, so long runs
+        don't keep their history in memory.
+"""
+from math import pi
+from collections import OrderedDict
+
+import numpy as np
+
+from hyperloop.tube_wall_temp import SB_CONSTANT, natural_convection, equilibrium_temperature
+from hyperloop.geometry.tube_structure import THICKNESS_RATIO
+
+
+DENSITY_STEEL = 7850. #kg/m**3
+CP_STEEL = 490. #J/(kg*K)
+
+RECORDED = ('time', 'temp_boundary', 'temp_outside_ambient', 'num_pods', 'solar_insolation',
+            'total_heat_rate_pods', 'q_total_solar', 'q_rad_tot', 'total_q_nat_conv',
+            'q_total_in', 'q_total_out')
+
+
+def diurnal_insolation(time, peak=1000., sunrise=6., sunset=18.):
+    """clear sky insolation (W/m**2) at time (s from midnight), half sine between
+    sunrise and sunset (hours)"""
+    hour = np.mod(np.asarray(time, dtype=float)/3600., 24.)
+    day = (hour > sunrise) & (hour < sunset)
+    return np.where(day, peak*np.sin(pi*(hour-sunrise)/(sunset-sunrise)), 0.)
+
+
+def heat_terms(temp_boundary, temp_outside_ambient, num_pods, solar_insolation, diameter_outer_tube,
+               length_tube, WCp_pod, temp_pod_exhaust, nn_incidence_factor, surface_reflectance,
+               emissivity_tube, sb_constant=SB_CONSTANT):
+    """the TubeWallTemp heat terms (W, whole tube) and d(out - in)/dT"""
+
+    area = pi*diameter_outer_tube*length_tube
+    conv = natural_convection(temp_boundary, temp_outside_ambient, diameter_outer_tube)
+    terms = OrderedDict()
+    terms['total_heat_rate_pods'] = num_pods*WCp_pod*(temp_pod_exhaust-temp_boundary)
+    terms['q_total_solar'] = (1-surface_reflectance)*nn_incidence_factor*solar_insolation*\
+        length_tube*diameter_outer_tube
+    terms['q_rad_tot'] = area*sb_constant*emissivity_tube*(temp_boundary**4-temp_outside_ambient**4)
+    terms['total_q_nat_conv'] = area*conv['q_per_area_nat_conv']
+    terms['q_total_in'] = terms['total_heat_rate_pods'] + terms['q_total_solar']
+    terms['q_total_out'] = terms['q_rad_tot'] + terms['total_q_nat_conv']
+    d_dT = area*(conv['dq_dT'] + 4*sb_constant*emissivity_tube*temp_boundary**3) + num_pods*WCp_pod
+    return terms, d_dT
+
+
+def _at(value, k, t):
+    """value of a schedule at step k: callables get the time, sequences are indexed"""
+    if callable(value):
+        return float(value(t))
+    if np.ndim(value):
+        return float(value[k])
+    return float(value)
+
+
+def transient_wall_temperature(time, temp_outside_ambient=305.6, num_pods=34., solar_insolation=1000.,
+                               temp_initial=None, diameter_outer_tube=2.23, length_tube=482803.,
+                               WCp_pod=563., temp_pod_exhaust=950., nn_incidence_factor=.7,
+                               surface_reflectance=.5, emissivity_tube=.5, recorder=None, tol=1e-9):
+    """Integrates the wall temperature over the given times (s) with backward
+    Euler. The ambient temperature, pod count and insolation can each be a
+    constant, an array with one value per time or a function of time.
+
+    temp_initial: starting wall temperature, the steady state for the first
+        conditions by default
+    recorder: ColumnarCaseRecorder (or anything with record_values) that gets
+        every step. With a recorder, nothing is accumulated in memory and
+        the final state is returned; without one, an OrderedDict with an
+        array per recorded variable is returned.
+    """
+
+    time = np.asarray(time, dtype=float)
+    consts = dict(diameter_outer_tube=diameter_outer_tube, length_tube=length_tube, WCp_pod=WCp_pod,
+                  temp_pod_exhaust=temp_pod_exhaust, nn_incidence_factor=nn_incidence_factor,
+                  surface_reflectance=surface_reflectance, emissivity_tube=emissivity_tube)
+
+    #thermal mass of the wall, J/K
+    thickness = diameter_outer_tube/2.*THICKNESS_RATIO
+    mass_cp = DENSITY_STEEL*CP_STEEL*pi*diameter_outer_tube*thickness*length_tube
+
+    def conditions(k):
+        t = time[k]
+        return (_at(temp_outside_ambient, k, t), _at(num_pods, k, t), _at(solar_insolation, k, t))
+
+    T_amb, pods, insolation = conditions(0)
+    if temp_initial is None:
+        temp_initial = equilibrium_temperature(T_amb, pods, insolation, diameter_outer_tube, length_tube,
+                                               WCp_pod, temp_pod_exhaust, nn_incidence_factor,
+                                               surface_reflectance, emissivity_tube)
+    T = float(temp_initial)
+
+    history = None
+    if recorder is None:
+        history = OrderedDict((name, np.empty(len(time))) for name in RECORDED)
+
+    def record(k, T, T_amb, pods, insolation, terms):
+        row = [('time', time[k]), ('temp_boundary', T), ('temp_outside_ambient', T_amb),
+               ('num_pods', pods), ('solar_insolation', insolation)]
+        row.extend((name, float(value)) for name, value in terms.iteritems())
+        if history is None:
+            recorder.record_values(row)
+        else:
+            for name, value in row:
+                history[name][k] = value
+
+    terms, _ = heat_terms(T, T_amb, pods, insolation, **consts)
+    record(0, T, T_amb, pods, insolation, terms)
+
+    for k in xrange(1, len(time)):
+        dt = time[k]-time[k-1]
+        T_amb, pods, insolation = conditions(k)
+        T_old = T
+        #mass_cp*(T - T_old)/dt = q_in(T) - q_out(T), solved by Newton
+        for it in xrange(50):
+            terms, d_dT = heat_terms(T, T_amb, pods, insolation, **consts)
+            res = mass_cp*(T-T_old)/dt + terms['q_total_out'] - terms['q_total_in']
+            step = res/(mass_cp/dt + d_dT)
+            T -= step
+            if abs(step) <= tol*T:
+                break
+        terms, _ = heat_terms(T, T_amb, pods, insolation, **consts)
+        record(k, T, T_amb, pods, insolation, terms)
+
+    if history is None:
+        recorder.flush()
+        final = OrderedDict([('time', time[-1]), ('temp_boundary', T)])
+        final.update((name, float(value)) for name, value in terms.iteritems())
+        return final
+    return history
+
+
+if __name__ == "__main__":
+    import time as timer
+    from hyperloop.columnar_recorder import ColumnarCaseRecorder, ColumnarCaseReader
+
+    #one week at 1 minute steps: diurnal sun and ambient, no pods from 1am to 5am
+    t = np.arange(0, 7*24*3600., 60.)
+    hour = np.mod(t/3600., 24.)
+    ambient = 300. + 6.*np.sin(2*pi*(hour-9.)/24.)
+    pods = np.where((hour > 1) & (hour < 5), 0., 34.)
+
+    recorder = ColumnarCaseRecorder('tube_transient.col')
+    start = timer.time()
+    final = transient_wall_temperature(t, ambient, pods, diurnal_insolation, recorder=recorder)
+    recorder.close()
+    print "%d steps in %.2f s"%(len(t), timer.time()-start)
+
+    reader = ColumnarCaseReader('tube_transient.col')
+    T = reader['temp_boundary']
+    print "wall temperature: min %.2f K, max %.2f K, final %.2f K"%(T.min(), T.max(), final['temp_boundary'])